@@ -0,0 +1,207 @@
+"""
+Offline build benchmark: runs listener.py against a simulated minescript world
+and drives it with main.py-style per-block calls and Builder.build scenarios
+fed by a canned LLM. Reports blocks/sec, round trips and p50/p99 round-trip
+latency, saves results as JSON and compares them with the previous run.
+
+Usage: python benchmarks/build_bench.py [--command-latency 0.0005] [--scenarios hut_small,checker_1k]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, os.path.join(BENCH_DIR, "sim"))  # Simulated minescript wins over any real one
+os.environ.setdefault("CRAFTSMEN_LOG_LEVEL", "WARNING")
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")  # Never used; the model is faked
+
+import minescript  # noqa: E402
+import listener  # noqa: E402
+import wire_protocol  # noqa: E402
+from builder import Builder  # noqa: E402
+from fake_llm import HUT_PALETTE, FakeStructuredModel, checker_plan, hut_plan  # noqa: E402
+from metrics import Histogram  # noqa: E402
+from minecraft_client import MinecraftClient  # noqa: E402
+
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+ORIGIN = (0, 64, 0)
+
+# name -> (kind, size); main_style sizes are a block count along x
+SCENARIOS = {
+    "main_style_100": ("main_style", (100, 1, 1)),
+    "hut_small": ("builder_hut", (7, 5, 7)),
+    "hut_large": ("builder_hut", (24, 10, 24)),
+    "checker_1k": ("builder_checker", (10, 10, 10)),
+    "checker_8k": ("builder_checker", (20, 20, 20)),
+}
+
+
+def run_main_style(client, size):
+    """main.py without the sleeps: move, place and read back one block at a time."""
+    count = size[0]
+    x0, y0, z0 = ORIGIN
+    for i in range(count):
+        client.move_to(x0 + i, y0 + 2, z0)
+        if not client.place_block(x0 + i, y0, z0, "stone"):
+            raise RuntimeError(f"Failed to place block {i}")
+    for i in range(count):
+        if client.get_block_at(x0 + i, y0, z0) != "stone":
+            raise RuntimeError(f"Verification failed at block {i}")
+    return count, 0
+
+
+def run_builder(client, plan, args):
+    builder = Builder(
+        client,
+        model="offline",
+        max_blocks=len(plan.ops),
+        throttle_seconds=args.throttle_seconds,
+        cache_plans=False,
+    )
+    fake = FakeStructuredModel([plan], latency=args.llm_latency)
+    builder._structured_model = fake
+    end = tuple(o + s - 1 for o, s in zip(ORIGIN, size_of(plan)))
+    builder.build("benchmark", ORIGIN, end, HUT_PALETTE, verify=args.verify)
+    return len(plan.ops), fake.calls
+
+
+def size_of(plan):
+    return tuple(max(getattr(op, axis) for op in plan.ops) + 1 for axis in ("x", "y", "z"))
+
+
+def merged_round_trips(snapshot):
+    """One histogram over every round_trip_seconds series in a client snapshot."""
+    merged = Histogram()
+    for series in snapshot["histograms"]:
+        if series["name"] == "round_trip_seconds":
+            merged.counts = [a + b for a, b in zip(merged.counts, series["counts"])]
+            merged.count += series["count"]
+            merged.sum += series["sum"]
+    return merged
+
+
+def run_scenario(name, client, args):
+    kind, size = SCENARIOS[name]
+    minescript.reset()
+    client.metrics.reset()
+    listener.metrics.reset()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with output:
+        if kind == "main_style":
+            blocks, llm_calls = run_main_style(client, size)
+        else:
+            plan = checker_plan(size) if kind == "builder_checker" else hut_plan(size)
+            blocks, llm_calls = run_builder(client, plan, args)
+    seconds = time.perf_counter() - started
+
+    snapshot = client.metrics.snapshot()
+    round_trips = sum(c["value"] for c in snapshot["counters"] if c["name"] == "requests_total")
+    latency = merged_round_trips(snapshot)
+    return {
+        "scenario": name,
+        "blocks": blocks,
+        "seconds": seconds,
+        "blocks_per_second": blocks / seconds if seconds else None,
+        "round_trips": round_trips,
+        "p50_ms": (latency.quantile(0.5) or 0) * 1000,
+        "p99_ms": (latency.quantile(0.99) or 0) * 1000,
+        "game_commands": minescript.counters["execute"],
+        "llm_calls": llm_calls,
+    }
+
+
+def previous_results(directory, exclude=None):
+    paths = sorted(glob.glob(os.path.join(directory, "build_bench-*.json")))
+    paths = [path for path in paths if path != exclude]
+    if not paths:
+        return None, None
+    with open(paths[-1], encoding='utf-8') as f:
+        return paths[-1], json.load(f)
+
+
+def print_comparison(results, baseline_path, baseline):
+    by_name = {row["scenario"]: row for row in baseline["results"]}
+    print(f"\nCompared with {os.path.basename(baseline_path)}:")
+    for row in results:
+        old = by_name.get(row["scenario"])
+        if not old or not old.get("blocks_per_second"):
+            continue
+        rate = (row["blocks_per_second"] / old["blocks_per_second"] - 1) * 100
+        p99 = row["p99_ms"] - old["p99_ms"]
+        print(f"  {row['scenario']:<16} blocks/s {rate:+7.1f}%   p99 {p99:+8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    parser.add_argument("--port", type=int, default=25561)
+    parser.add_argument("--command-latency", type=float, default=0.0002, help="Seconds per game command")
+    parser.add_argument("--block-latency", type=float, default=0.0, help="Seconds per block changed")
+    parser.add_argument("--tick-seconds", type=float, default=0.05)
+    parser.add_argument("--commands-per-tick", type=int, default=0, help="0 = unlimited")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake model call")
+    parser.add_argument("--throttle-seconds", type=float, default=0.05)
+    parser.add_argument("--protocol", choices=("binary1", "json"), default=None, help="Force one wire protocol")
+    parser.add_argument("--verify", action="store_true", help="Verify builder scenarios after placing")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--compare", help="Results file to compare with (default: the latest one)")
+    parser.add_argument("--verbose", action="store_true", help="Show builder output")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    settings = {
+        "command_latency": args.command_latency,
+        "block_latency": args.block_latency,
+        "tick_seconds": args.tick_seconds,
+        "commands_per_tick": args.commands_per_tick,
+    }
+    minescript.configure(**settings)
+    listener.PORT = args.port
+    threading.Thread(target=listener.start_server, daemon=True).start()
+    time.sleep(0.2)
+    protocols = [args.protocol] if args.protocol else wire_protocol.SUPPORTED_PROTOCOLS
+    client = MinecraftClient(port=args.port, protocols=protocols)
+
+    results = []
+    print(f"{'scenario':<16}{'blocks':>8}{'seconds':>9}{'blocks/s':>10}{'trips':>7}"
+          f"{'p50 ms':>8}{'p99 ms':>8}{'cmds':>7}")
+    for name in names:
+        row = run_scenario(name, client, args)
+        results.append(row)
+        print(f"{name:<16}{row['blocks']:>8}{row['seconds']:>9.2f}{row['blocks_per_second']:>10.0f}"
+              f"{row['round_trips']:>7}{row['p50_ms']:>8.2f}{row['p99_ms']:>8.2f}{row['game_commands']:>7}")
+    client.close()
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, time.strftime("build_bench-%Y%m%d-%H%M%S.json"))
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline_path, baseline = args.compare, json.load(f)
+    else:
+        baseline_path, baseline = previous_results(args.results_dir, exclude=path)
+    with open(path, "w", encoding='utf-8') as f:
+        json.dump({
+            "created": time.time(),
+            "settings": dict(settings, throttle_seconds=args.throttle_seconds, llm_latency=args.llm_latency,
+                             protocol=client._client.protocol, verify=args.verify),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nSaved {path}")
+    if baseline is not None:
+        print_comparison(results, baseline_path, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Stand-in for the structured-output chat models used by Builder, returning
+canned PlanSchema (or PrimitivePlanSchema) responses so builds can be
+benchmarked offline.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Sequence, Tuple, Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from builder import BlockOpSchema, PlanSchema  # noqa: E402
+from primitives import PrimitivePlanSchema, PrimitiveSchema  # noqa: E402
+
+HUT_PALETTE = [
+    "minecraft:cobblestone",
+    "minecraft:oak_planks",
+    "minecraft:oak_log",
+    "minecraft:glass",
+]
+
+
+class FakeStructuredModel:
+    """
+    Drop-in for ChatOpenAI(...).with_structured_output(schema, include_raw=True).
+    Cycles through the canned responses; latency simulates model time.
+    """
+    def __init__(self, responses: Sequence[Union[PlanSchema, PrimitivePlanSchema]], latency: float = 0.0):
+        self.responses = list(responses)
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, messages):
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        usage = {
+            "input_tokens": sum(len(str(message.content)) // 4 for message in messages),
+            "output_tokens": len(response.model_dump_json()) // 4,
+        }
+        return {"raw": SimpleNamespace(usage_metadata=usage), "parsed": response, "parsing_error": None}
+
+
+def hut_plan(size: Tuple[int, int, int]) -> PlanSchema:
+    """Cobblestone floor, log corners, plank walls with glass windows and a plank roof."""
+    width, height, length = size
+    ops: List[BlockOpSchema] = []
+    for y in range(height):
+        for z in range(length):
+            for x in range(width):
+                edge_x = x in (0, width - 1)
+                edge_z = z in (0, length - 1)
+                if y == 0:
+                    block = "minecraft:cobblestone"
+                elif y == height - 1:
+                    block = "minecraft:oak_planks"
+                elif edge_x and edge_z:
+                    block = "minecraft:oak_log"
+                elif edge_x or edge_z:
+                    window = y == height // 2 and (x + z) % 3 == 1
+                    block = "minecraft:glass" if window else "minecraft:oak_planks"
+                else:
+                    continue
+                ops.append(BlockOpSchema(x=x, y=y, z=z, block=block))
+    return PlanSchema(ops=ops)
+
+
+def hut_primitives(size: Tuple[int, int, int]) -> PrimitivePlanSchema:
+    """The same blocks as hut_plan, described as planes, a wall ring and lines."""
+    width, height, length = size
+    top_x, top_y, top_z = width - 1, height - 1, length - 1
+    primitives = [
+        PrimitiveSchema(kind="plane", block="minecraft:cobblestone", x2=top_x, z2=top_z),
+        PrimitiveSchema(kind="plane", block="minecraft:oak_planks", y1=top_y, x2=top_x, y2=top_y, z2=top_z),
+        PrimitiveSchema(kind="walls", block="minecraft:oak_planks", y1=1, x2=top_x, y2=top_y - 1, z2=top_z),
+    ]
+    for x in (0, top_x):
+        for z in (0, top_z):
+            primitives.append(PrimitiveSchema(
+                kind="line", block="minecraft:oak_log", x1=x, y1=1, z1=z, x2=x, y2=top_y - 1, z2=z
+            ))
+    y = height // 2
+    for z in range(length):
+        for x in range(width):
+            edge_x = x in (0, top_x)
+            edge_z = z in (0, top_z)
+            if (edge_x or edge_z) and not (edge_x and edge_z) and (x + z) % 3 == 1:
+                primitives.append(PrimitiveSchema(
+                    kind="line", block="minecraft:glass", x1=x, y1=y, z1=z, x2=x, y2=y, z2=z
+                ))
+    return PrimitivePlanSchema(primitives=primitives)
+
+
+def checker_plan(size: Tuple[int, int, int]) -> PlanSchema:
+    """Alternating blocks in every cell: the worst case for fill merging."""
+    width, height, length = size
+    return PlanSchema(ops=[
+        BlockOpSchema(x=x, y=y, z=z, block=HUT_PALETTE[(x + y + z) % 2])
+        for y in range(height)
+        for z in range(length)
+        for x in range(width)
+    ])
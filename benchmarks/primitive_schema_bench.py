@@ -0,0 +1,107 @@
+"""
+Benchmark: per-block ops schema vs. primitive schema on the example hut prompt.
+Calls the model directly (no game connection needed) and reports latency,
+input/output tokens, response items (ops or primitives), blocks described,
+compiled commands and whether the plan validated.
+
+Needs OPENAI_API_KEY, unless --offline replays the same hut in both schemas
+from fake_llm (tokens are then estimated as characters / 4).
+
+Usage: python benchmarks/primitive_schema_bench.py [--runs 3] [--model gpt-5.1] [--offline]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage, SystemMessage  # noqa: E402
+
+from builder import BlockOp, Builder, PlanSchema  # noqa: E402
+from fake_llm import FakeStructuredModel, hut_plan, hut_primitives  # noqa: E402
+from plan_compiler import compile_plan  # noqa: E402
+from primitives import PrimitivePlan, PrimitivePlanSchema  # noqa: E402
+
+PROMPT = "Build a small wooden hut with a door and windows."
+SIZE = (7, 5, 7)
+PALETTE = [
+    "minecraft:oak_planks",
+    "minecraft:oak_log",
+    "minecraft:cobblestone",
+    "minecraft:glass",
+    "minecraft:oak_stairs",
+    "minecraft:oak_slab",
+    "minecraft:oak_door",
+]
+
+
+def run_once(builder, model, primitives):
+    max_blocks = builder.primitive_max_blocks if primitives else builder.max_blocks
+    system_text, user_text = builder._compose_prompt(PROMPT, SIZE, PALETTE, max_blocks, None, primitives)
+    messages = [SystemMessage(content=system_text), HumanMessage(content=user_text)]
+    started = time.perf_counter()
+    response = model.invoke(messages)
+    seconds = time.perf_counter() - started
+
+    usage = getattr(response["raw"], "usage_metadata", None) or {}
+    parsed = response["parsed"]
+    if parsed is None:
+        return seconds, usage, 0, 0, 0, f"parse failed: {response.get('parsing_error')}"
+    if primitives:
+        plan = PrimitivePlan.from_schema(parsed)
+        items = len(parsed.primitives)
+    else:
+        plan = [BlockOp(x=op.x, y=op.y, z=op.z, block=op.block) for op in parsed.ops]
+        items = len(parsed.ops)
+    error = builder._validate_plan(plan, SIZE, PALETTE, max_blocks)
+    compiled = plan.compile() if primitives else compile_plan(plan)
+    return seconds, usage, items, len(plan), compiled.commands_out, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--model", default="gpt-5.1")
+    parser.add_argument("--offline", action="store_true", help="Use canned fake_llm responses instead of the API")
+    args = parser.parse_args()
+
+    builder = Builder(client=None, model=args.model, cache_plans=False)
+    schemas = (
+        ("ops", PlanSchema, hut_plan, False),
+        ("primitives", PrimitivePlanSchema, hut_primitives, True),
+    )
+    print(f"{args.runs} {'offline ' if args.offline else ''}runs of: {PROMPT}")
+    print(
+        f"{'schema':<12}{'latency s':>11}{'in tok':>9}{'out tok':>9}"
+        f"{'items':>8}{'blocks':>8}{'cmds':>7}{'valid':>8}"
+    )
+    for label, schema, canned, primitives in schemas:
+        if args.offline:
+            model = FakeStructuredModel([canned(SIZE)])
+        else:
+            from langchain_openai import ChatOpenAI
+            model = ChatOpenAI(model=args.model).with_structured_output(schema, include_raw=True)
+        latencies, inputs, outputs, items, blocks, commands, valid = [], [], [], [], [], [], 0
+        for _ in range(args.runs):
+            seconds, usage, item_count, count, command_count, error = run_once(builder, model, primitives)
+            latencies.append(seconds)
+            inputs.append(usage.get("input_tokens", 0))
+            outputs.append(usage.get("output_tokens", 0))
+            items.append(item_count)
+            blocks.append(count)
+            commands.append(command_count)
+            if error is None:
+                valid += 1
+            else:
+                print(f"  {label}: {error}")
+        print(
+            f"{label:<12}{statistics.median(latencies):>11.2f}{statistics.median(inputs):>9.0f}"
+            f"{statistics.median(outputs):>9.0f}{statistics.median(items):>8.0f}{statistics.median(blocks):>8.0f}"
+            f"{statistics.median(commands):>7.0f}{valid:>5}/{args.runs}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Simulated minescript module for offline benchmarks: an in-memory voxel world
+with configurable latency, so listener.py runs without Minecraft.
+
+Latency settings (seconds) come from the environment or configure():
+  MINESCRIPT_SIM_COMMAND_LATENCY  fixed cost of every execute() call
+  MINESCRIPT_SIM_BLOCK_LATENCY    extra cost per block changed by a command
+  MINESCRIPT_SIM_TICK_SECONDS     length of a server tick (0.05 = 20 TPS)
+  MINESCRIPT_SIM_COMMANDS_PER_TICK  commands run per tick before waiting for
+                                    the next one (0 = unlimited)
+"""
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+AIR = "minecraft:air"
+
+world = {}  # (x, y, z) -> block id; missing cells are air
+inventory = {}  # item id -> count
+position = [0.5, 64.0, 0.5]
+counters = {"execute": 0, "blocks_changed": 0, "getblock": 0}
+events = {"first_change": None}  # Wall-clock time of the first block change since reset
+
+_settings = {
+    "command_latency": float(os.environ.get("MINESCRIPT_SIM_COMMAND_LATENCY", "0")),
+    "block_latency": float(os.environ.get("MINESCRIPT_SIM_BLOCK_LATENCY", "0")),
+    "tick_seconds": float(os.environ.get("MINESCRIPT_SIM_TICK_SECONDS", "0.05")),
+    "commands_per_tick": int(os.environ.get("MINESCRIPT_SIM_COMMANDS_PER_TICK", "0")),
+}
+_started = time.monotonic()
+_tick_state = {"tick": 0, "used": 0}
+_lock = threading.Lock()
+
+
+def configure(**settings):
+    """Overrides latency settings, e.g. configure(command_latency=0.001)."""
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown settings: {sorted(unknown)}")
+    _settings.update(settings)
+
+
+def reset():
+    """Empties the world and inventory and zeroes the counters."""
+    with _lock:
+        world.clear()
+        inventory.clear()
+        position[:] = [0.5, 64.0, 0.5]
+        for key in counters:
+            counters[key] = 0
+        events["first_change"] = None
+
+
+def _current_tick():
+    tick_seconds = _settings["tick_seconds"]
+    return int((time.monotonic() - _started) / tick_seconds) if tick_seconds > 0 else 0
+
+
+def _wait_for_tick_budget():
+    """Blocks until the current tick still has room for another command."""
+    budget = _settings["commands_per_tick"]
+    if budget <= 0 or _settings["tick_seconds"] <= 0:
+        return
+    while True:
+        tick = _current_tick()
+        if tick != _tick_state["tick"]:
+            _tick_state["tick"], _tick_state["used"] = tick, 0
+        if _tick_state["used"] < budget:
+            _tick_state["used"] += 1
+            return
+        next_tick = _started + (tick + 1) * _settings["tick_seconds"]
+        time.sleep(max(0.0, next_tick - time.monotonic()))
+
+
+def _block_id(name):
+    return name if ":" in name else f"minecraft:{name}"
+
+
+def _set(x, y, z, block):
+    if block == AIR:
+        world.pop((x, y, z), None)
+    else:
+        world[(x, y, z)] = block
+
+
+def execute(command):
+    _wait_for_tick_budget()
+    parts = command.lstrip("/").split()
+    changed = 0
+    with _lock:
+        counters["execute"] += 1
+        op = parts[0]
+        if op == "setblock":
+            x, y, z = (int(v) for v in parts[1:4])
+            _set(x, y, z, _block_id(parts[4]))
+            changed = 1
+        elif op == "fill":
+            x1, y1, z1, x2, y2, z2 = (int(v) for v in parts[1:7])
+            block = _block_id(parts[7])
+            for x in range(min(x1, x2), max(x1, x2) + 1):
+                for y in range(min(y1, y2), max(y1, y2) + 1):
+                    for z in range(min(z1, z2), max(z1, z2) + 1):
+                        _set(x, y, z, block)
+                        changed += 1
+        elif op == "clone":
+            x1, y1, z1, x2, y2, z2, dx, dy, dz = (int(v) for v in parts[1:10])
+            masked = len(parts) > 10 and parts[10] == "masked"
+            x1, x2 = sorted((x1, x2))
+            y1, y2 = sorted((y1, y2))
+            z1, z2 = sorted((z1, z2))
+            copied = [
+                (x - x1, y - y1, z - z1, world.get((x, y, z), AIR))
+                for x in range(x1, x2 + 1)
+                for y in range(y1, y2 + 1)
+                for z in range(z1, z2 + 1)
+            ]
+            for ox, oy, oz, block in copied:
+                if masked and block == AIR:
+                    continue
+                _set(dx + ox, dy + oy, dz + oz, block)
+                changed += 1
+        elif op == "tp":
+            position[:] = [float(v) for v in parts[1:4]]
+        elif op == "give":
+            item = _block_id(parts[2])
+            inventory[item] = inventory.get(item, 0) + (int(parts[3]) if len(parts) > 3 else 1)
+        elif op == "clear":
+            if len(parts) < 3:
+                inventory.clear()
+            else:
+                item = _block_id(parts[2])
+                if len(parts) > 3:
+                    inventory[item] = max(0, inventory.get(item, 0) - int(parts[3]))
+                else:
+                    inventory[item] = 0
+                if not inventory[item]:
+                    del inventory[item]
+        counters["blocks_changed"] += changed
+        if changed and events["first_change"] is None:
+            events["first_change"] = time.time()
+    delay = _settings["command_latency"] + _settings["block_latency"] * changed
+    if delay > 0:
+        time.sleep(delay)
+
+
+def getblock(x, y, z):
+    with _lock:
+        counters["getblock"] += 1
+        return world.get((int(x), int(y), int(z)), AIR)
+
+
+def getblocklist(positions):
+    with _lock:
+        counters["getblock"] += len(positions)
+        return [world.get((int(x), int(y), int(z)), AIR) for x, y, z in positions]
+
+
+def player_position():
+    return list(position)
+
+
+def player_inventory():
+    with _lock:
+        return [SimpleNamespace(item=item, count=count) for item, count in inventory.items()]
+
+
+def world_info():
+    # Without a tick length the server is reported as running at a steady 20 TPS
+    tick_seconds = _settings["tick_seconds"] or 0.05
+    ticks = int((time.monotonic() - _started) / tick_seconds)
+    return SimpleNamespace(game_ticks=ticks, day_ticks=ticks)
+
+
+def echo(*messages):
+    pass
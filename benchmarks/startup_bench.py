@@ -0,0 +1,187 @@
+"""
+Cold vs warm time-to-first-block: a one-shot process that imports builder,
+warms it up, connects and builds, against the same build sent to a resident
+builder_daemon through its CLI and through an open DaemonClient. The listener
+runs in-process on the simulated minescript world and the LLM is faked, so the
+numbers are startup and connection overhead only.
+
+Usage: python benchmarks/startup_bench.py [--runs 3] [--size 7,5,7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(BENCH_DIR, "sim"))  # Simulated minescript wins over any real one
+os.environ.setdefault("CRAFTSMEN_LOG_LEVEL", "WARNING")
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")  # Never used; the model is faked
+
+ORIGIN = (0, 64, 0)
+
+
+def fake_builder(args):
+    """A warmed-up Builder whose planning model returns a canned hut."""
+    from builder import Builder
+    from fake_llm import FakeStructuredModel, hut_plan
+    from minecraft_client import MinecraftClient
+    size = parse_size(args.size)
+    builder = Builder(
+        MinecraftClient(port=args.port),
+        model="offline",
+        max_blocks=size[0] * size[1] * size[2],
+        cache_plans=False,
+        throttle_seconds=args.throttle_seconds,
+    )
+    warm_up_seconds = builder.warm_up()  # Pays the real langchain/langgraph costs
+    builder._structured_model = FakeStructuredModel([hut_plan(size)])
+    return builder, warm_up_seconds
+
+
+def parse_size(text):
+    return tuple(int(v) for v in text.split(","))
+
+
+def bounds(args):
+    size = parse_size(args.size)
+    return ORIGIN, tuple(o + s - 1 for o, s in zip(ORIGIN, size))
+
+
+def run_one_shot(args):
+    # numpy and pydantic are imported first so their share of importing builder shows up on its own
+    started = time.perf_counter()
+    import numpy  # noqa: F401
+    numpy_seconds = time.perf_counter() - started
+    from pydantic import BaseModel  # noqa: F401
+    pydantic_seconds = time.perf_counter() - started - numpy_seconds
+    import builder  # noqa: F401
+    import_seconds = time.perf_counter() - started
+    instance, warm_up_seconds = fake_builder(args)
+    from fake_llm import HUT_PALETTE
+    bounds_min, bounds_max = bounds(args)
+    instance.build("benchmark", bounds_min, bounds_max, HUT_PALETTE, move_agent=False)
+    instance.client.close()
+    print(json.dumps({
+        "import_seconds": import_seconds,
+        "numpy_seconds": numpy_seconds,
+        "pydantic_seconds": pydantic_seconds,
+        "warm_up_seconds": warm_up_seconds,
+    }))
+
+
+def run_daemon(args):
+    from builder_daemon import BuilderDaemon
+    instance, _ = fake_builder(args)
+    BuilderDaemon(instance, port=args.daemon_port).serve_forever(warm_up=False)
+
+
+def role_command(role, args):
+    return [
+        sys.executable, os.path.abspath(__file__), "--role", role,
+        "--port", str(args.port), "--daemon-port", str(args.daemon_port),
+        "--size", args.size, "--throttle-seconds", str(args.throttle_seconds),
+    ]
+
+
+def time_to_first_block(minescript, start, action):
+    """Runs action and returns (seconds to the first block change, seconds in total, action result)."""
+    minescript.reset()
+    result = action()
+    total = time.time() - start
+    first = minescript.events["first_change"]
+    return (first - start if first is not None else None), total, result
+
+
+def wait_for_daemon(args, timeout=60.0):
+    from builder_daemon import DaemonClient
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with DaemonClient(port=args.daemon_port, timeout=1.0) as client:
+                client.request("ping")
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Builder daemon did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--size", default="7,5,7", help="Hut size as width,height,length")
+    parser.add_argument("--port", type=int, default=25563, help="Listener port")
+    parser.add_argument("--daemon-port", type=int, default=25564)
+    parser.add_argument("--throttle-seconds", type=float, default=0.05)
+    parser.add_argument("--role", choices=("one-shot", "daemon"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role == "one-shot":
+        return run_one_shot(args)
+    if args.role == "daemon":
+        return run_daemon(args)
+
+    import minescript
+    import listener
+    from builder_daemon import DaemonClient
+    from fake_llm import HUT_PALETTE
+
+    listener.PORT = args.port
+    threading.Thread(target=listener.start_server, daemon=True).start()
+    time.sleep(0.2)
+    bounds_min, bounds_max = bounds(args)
+    quiet = {"stdout": subprocess.PIPE, "stderr": subprocess.DEVNULL, "cwd": REPO_DIR, "check": True}
+    rows = {}
+
+    def one_shot():
+        output = subprocess.run(role_command("one-shot", args), **quiet).stdout.decode().strip().splitlines()
+        return json.loads(output[-1])
+
+    cold = [time_to_first_block(minescript, time.time(), one_shot) for _ in range(args.runs)]
+    rows["cold one-shot"] = cold
+
+    daemon = subprocess.Popen(role_command("daemon", args), stdout=subprocess.DEVNULL, cwd=REPO_DIR)
+    try:
+        wait_for_daemon(args)
+        cli = [
+            sys.executable, "builder_daemon.py", "--port", str(args.daemon_port), "build", "benchmark",
+            "--min", *map(str, bounds_min), "--max", *map(str, bounds_max),
+            "--palette", ",".join(HUT_PALETTE), "--no-move",
+        ]
+        rows["warm daemon CLI"] = [
+            time_to_first_block(minescript, time.time(), lambda: subprocess.run(cli, **quiet))
+            for _ in range(args.runs)
+        ]
+        with DaemonClient(port=args.daemon_port) as client:
+            request = lambda: client.request(  # noqa: E731
+                "build", prompt="benchmark", bounds_min=bounds_min, bounds_max=bounds_max,
+                palette=HUT_PALETTE, options={"move_agent": False},
+            )
+            rows["warm daemon request"] = [
+                time_to_first_block(minescript, time.time(), request) for _ in range(args.runs)
+            ]
+            client.request("shutdown")
+    finally:
+        daemon.wait(timeout=10)
+
+    print(f"{'mode':<22}{'first block ms':>16}{'total ms':>11}")
+    for mode, samples in rows.items():
+        first = statistics.median(s[0] for s in samples if s[0] is not None) * 1000
+        total = statistics.median(s[1] for s in samples) * 1000
+        print(f"{mode:<22}{first:>16.1f}{total:>11.1f}")
+    breakdown = [s[2] for s in cold]
+    median_ms = lambda key: statistics.median(b[key] for b in breakdown) * 1000  # noqa: E731
+    print(
+        f"\nOne-shot startup: import builder {median_ms('import_seconds'):.0f} ms "
+        f"(numpy {median_ms('numpy_seconds'):.0f} ms, pydantic {median_ms('pydantic_seconds'):.0f} ms), "
+        f"warm_up {median_ms('warm_up_seconds'):.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark: JSON lines vs. binary framing for block placements.
+Measures client encode time, listener decode time and bytes on the wire for
+individual place_block requests and for the same placements sent as batches.
+
+Usage: python benchmarks/wire_protocol_bench.py [--count 10000] [--batch-size 32]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wire_protocol  # noqa: E402
+
+PALETTE = [
+    "minecraft:oak_planks",
+    "minecraft:oak_log",
+    "minecraft:cobblestone",
+    "minecraft:glass",
+]
+
+
+def make_placements(count):
+    return [
+        ("place_block", 1000 + i % 64, 64 + (i // 4096), -2000 + (i // 64) % 64, PALETTE[i % len(PALETTE)])
+        for i in range(count)
+    ]
+
+
+def make_requests(placements, batch_size):
+    if batch_size <= 1:
+        return [(method, list(params)) for method, *params in placements]
+    requests = []
+    for start in range(0, len(placements), batch_size):
+        chunk = placements[start:start + batch_size]
+        items = [{"method": method, "params": list(params)} for method, *params in chunk]
+        requests.append(("batch", [items]))
+    return requests
+
+
+def bench_json(requests):
+    started = time.perf_counter()
+    wire = bytearray()
+    for request_id, (method, params) in enumerate(requests, start=1):
+        wire += (json.dumps({"id": request_id, "method": method, "params": params}) + "\n").encode('utf-8')
+    encode_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    decoded = [json.loads(line) for line in bytes(wire).split(b"\n") if line]
+    decode_seconds = time.perf_counter() - started
+    assert len(decoded) == len(requests)
+    return encode_seconds, decode_seconds, len(wire)
+
+
+def bench_binary(requests):
+    encoder = wire_protocol.BinaryEncoder()
+    started = time.perf_counter()
+    wire = bytearray()
+    for request_id, (method, params) in enumerate(requests, start=1):
+        wire += encoder.encode_request(request_id, method, params)
+    encode_seconds = time.perf_counter() - started
+
+    decoder = wire_protocol.BinaryDecoder()
+    started = time.perf_counter()
+    buffer = bytearray(wire)
+    decoded = [
+        cmd for cmd in (decoder.decode_request(frame) for frame in wire_protocol.split_frames(buffer))
+        if cmd is not None
+    ]
+    decode_seconds = time.perf_counter() - started
+    assert len(decoded) == len(requests)
+    return encode_seconds, decode_seconds, len(wire)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    placements = make_placements(args.count)
+    print(f"{args.count} placements")
+    print(f"{'mode':<22}{'encode ms':>12}{'decode ms':>12}{'bytes':>12}{'bytes/op':>10}")
+    for label, batch_size in (("single", 1), (f"batch x{args.batch_size}", args.batch_size)):
+        requests = make_requests(placements, batch_size)
+        for protocol, bench in (("json", bench_json), ("binary", bench_binary)):
+            encode_s, decode_s, size = bench(requests)
+            print(
+                f"{protocol + ' ' + label:<22}{encode_s * 1000:>12.1f}{decode_s * 1000:>12.1f}"
+                f"{size:>12}{size / args.count:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+Position = Tuple[int, int, int]
+ChunkKey = Tuple[int, int]
+
+
+def _chunk_key(x: int, z: int) -> ChunkKey:
+    return x >> 4, z >> 4
+
+
+def _simple_name(block_id: str) -> str:
+    return block_id.split(":")[-1]
+
+
+class BlockCache:
+    """
+    Client-side cache of known block ids, grouped by 16x16 chunk column.
+    Holds at most max_chunks chunks and evicts the least recently used one.
+    The world can change without us (players, redstone), so callers should
+    invalidate regions they no longer trust.
+    """
+    def __init__(self, max_chunks: int = 64):
+        self.max_chunks = max(1, max_chunks)
+        self._chunks: "OrderedDict[ChunkKey, Dict[Position, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, x: int, y: int, z: int) -> Optional[str]:
+        key = _chunk_key(x, z)
+        with self._lock:
+            chunk = self._chunks.get(key)
+            block = chunk.get((x, y, z)) if chunk is not None else None
+            if block is None:
+                self.misses += 1
+                return None
+            self._chunks.move_to_end(key)
+            self.hits += 1
+            return block
+
+    def put(self, x: int, y: int, z: int, block_id: str) -> None:
+        with self._lock:
+            self._chunk_for_write(_chunk_key(x, z))[(x, y, z)] = _simple_name(block_id)
+
+    def get_region(self, corner_a: Position, corner_b: Position) -> Optional[Dict[Position, str]]:
+        """Every block in the box (inclusive corners), or None unless all of them are cached."""
+        x1, x2 = sorted((corner_a[0], corner_b[0]))
+        y1, y2 = sorted((corner_a[1], corner_b[1]))
+        z1, z2 = sorted((corner_a[2], corner_b[2]))
+        volume = (x2 - x1 + 1) * (y2 - y1 + 1) * (z2 - z1 + 1)
+        blocks: Dict[Position, str] = {}
+        with self._lock:
+            keys = [
+                (cx, cz)
+                for cx in range(x1 >> 4, (x2 >> 4) + 1)
+                for cz in range(z1 >> 4, (z2 >> 4) + 1)
+            ]
+            for key in keys:
+                chunk = self._chunks.get(key)
+                if chunk is None:
+                    self.misses += volume
+                    return None
+                cx, cz = key
+                for x in range(max(x1, cx << 4), min(x2, (cx << 4) + 15) + 1):
+                    for z in range(max(z1, cz << 4), min(z2, (cz << 4) + 15) + 1):
+                        for y in range(y1, y2 + 1):
+                            block = chunk.get((x, y, z))
+                            if block is None:
+                                self.misses += volume
+                                return None
+                            blocks[(x, y, z)] = block
+            for key in keys:
+                self._chunks.move_to_end(key)
+            self.hits += volume
+            return blocks
+
+    def put_blocks(self, blocks: Dict[Position, str]) -> None:
+        """Records many known blocks at once, e.g. the result of a region read."""
+        with self._lock:
+            chunk_key = chunk = None
+            for pos, block_id in blocks.items():
+                key = _chunk_key(pos[0], pos[2])
+                if key != chunk_key:
+                    chunk_key, chunk = key, self._chunk_for_write(key)
+                chunk[pos] = _simple_name(block_id)
+
+    def put_region(self, corner_a: Position, corner_b: Position, block_id: str) -> None:
+        """Records a filled box (inclusive corners) as block_id."""
+        block = _simple_name(block_id)
+        x1, x2 = sorted((corner_a[0], corner_b[0]))
+        y1, y2 = sorted((corner_a[1], corner_b[1]))
+        z1, z2 = sorted((corner_a[2], corner_b[2]))
+        with self._lock:
+            for cx in range(x1 >> 4, (x2 >> 4) + 1):
+                for cz in range(z1 >> 4, (z2 >> 4) + 1):
+                    chunk = self._chunk_for_write((cx, cz))
+                    for x in range(max(x1, cx << 4), min(x2, (cx << 4) + 15) + 1):
+                        for z in range(max(z1, cz << 4), min(z2, (cz << 4) + 15) + 1):
+                            for y in range(y1, y2 + 1):
+                                chunk[(x, y, z)] = block
+
+    def invalidate_region(self, corner_a: Position, corner_b: Position) -> None:
+        """Forgets every cached block inside the box (inclusive corners)."""
+        x1, x2 = sorted((corner_a[0], corner_b[0]))
+        y1, y2 = sorted((corner_a[1], corner_b[1]))
+        z1, z2 = sorted((corner_a[2], corner_b[2]))
+        with self._lock:
+            for key in list(self._chunks):
+                cx, cz = key
+                if cx < x1 >> 4 or cx > x2 >> 4 or cz < z1 >> 4 or cz > z2 >> 4:
+                    continue
+                chunk = self._chunks[key]
+                for pos in [
+                    pos for pos in chunk
+                    if x1 <= pos[0] <= x2 and y1 <= pos[1] <= y2 and z1 <= pos[2] <= z2
+                ]:
+                    del chunk[pos]
+                if not chunk:
+                    del self._chunks[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chunks.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "chunks": len(self._chunks),
+                "max_chunks": self.max_chunks,
+                "blocks": sum(len(chunk) for chunk in self._chunks.values()),
+            }
+
+    def _chunk_for_write(self, key: ChunkKey) -> Dict[Position, str]:
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = {}
+            while len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._chunks.move_to_end(key)
+        return chunk
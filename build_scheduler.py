@@ -0,0 +1,310 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from builder import Builder
+from metrics import Metrics, get_logger
+from minecraft_client import MinecraftClient
+
+log = get_logger("scheduler")
+
+Box = Tuple[Tuple[int, int, int], Tuple[int, int, int]]
+
+# Builder.build options that only matter once a plan exists
+PLACEMENT_OPTIONS = ("move_agent", "verify", "repair", "diff", "snapshot")
+PLANNING_OPTIONS = ("use_plan_cache", "purge_plan_cache", "voxel", "hierarchical", "primitives")
+
+
+def boxes_overlap(a: Box, b: Box) -> bool:
+    (amin, amax), (bmin, bmax) = a, b
+    return all(amin[i] <= bmax[i] and bmin[i] <= amax[i] for i in range(3))
+
+
+class RegionIndex:
+    """
+    Claimed bounding boxes bucketed on a coarse grid, so an overlap check only
+    compares against claims sharing a grid cell instead of every claim.
+    """
+    def __init__(self, cell_size: int = 16):
+        self.cell_size = cell_size
+        self._claims: Dict[Any, Box] = {}
+        self._cells: Dict[Tuple[int, int, int], Set[Any]] = {}
+
+    def _cells_for(self, box: Box) -> Iterator[Tuple[int, int, int]]:
+        lo = [c // self.cell_size for c in box[0]]
+        hi = [c // self.cell_size for c in box[1]]
+        return itertools.product(*(range(lo[i], hi[i] + 1) for i in range(3)))
+
+    def overlapping(self, box: Box) -> Set[Any]:
+        """Ids of claims that intersect the box."""
+        found = set()
+        for cell in self._cells_for(box):
+            for claim_id in self._cells.get(cell, ()):
+                if claim_id not in found and boxes_overlap(self._claims[claim_id], box):
+                    found.add(claim_id)
+        return found
+
+    def claim(self, claim_id: Any, box: Box) -> bool:
+        """Claims the box unless it overlaps an existing claim."""
+        if self.overlapping(box):
+            return False
+        self._claims[claim_id] = box
+        for cell in self._cells_for(box):
+            self._cells.setdefault(cell, set()).add(claim_id)
+        return True
+
+    def release(self, claim_id: Any) -> None:
+        box = self._claims.pop(claim_id, None)
+        if box is None:
+            return
+        for cell in self._cells_for(box):
+            ids = self._cells.get(cell)
+            if ids is not None:
+                ids.discard(claim_id)
+                if not ids:
+                    del self._cells[cell]
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+
+@dataclass
+class ScheduledBuild:
+    id: int
+    prompt: str
+    bounds_min: Tuple[int, int, int]
+    bounds_max: Tuple[int, int, int]
+    palette: List[str]
+    planning_options: Dict[str, Any]
+    placement_options: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+    status: str = "queued"  # queued, planning, waiting, placing, done, failed
+    plan: Any = None
+    snapshot_id: Optional[str] = None  # Set when placed with snapshot=True
+    submitted: float = field(default_factory=time.perf_counter)
+    planning_started: Optional[float] = None
+    planned: Optional[float] = None
+    placement_started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def box(self) -> Box:
+        return self.bounds_min, self.bounds_max
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        """Seconds spent queued for a planner, planning, waiting for the region and placing."""
+        def span(start, end):
+            return None if start is None or end is None else end - start
+        return {
+            "queue_wait": span(self.submitted, self.planning_started),
+            "planning": span(self.planning_started, self.planned),
+            "region_wait": span(self.planned, self.placement_started),
+            "placement": span(self.placement_started, self.finished),
+            "total": span(self.submitted, self.finished),
+        }
+
+
+class BuildScheduler:
+    """
+    Runs many builds at once: prompts are planned concurrently on a shared
+    planner, then placed through a pool of client connections, each with its
+    own Builder. Builds whose bounds overlap are placed one after another in
+    submission order; disjoint ones are placed in parallel.
+
+    All connections drive the same player, so placement defaults to
+    move_agent=False. Each connection has its own listener inventory ledger,
+    so pooled builders switch its scope per build like a lone Builder.
+    """
+    def __init__(
+        self,
+        client_factory: Callable[[], MinecraftClient] = MinecraftClient,
+        pool_size: int = 4,
+        planning_workers: int = 4,
+        builder_factory: Callable[..., Builder] = Builder,
+        **builder_kwargs: Any,
+    ):
+        if pool_size < 1 or planning_workers < 1:
+            raise ValueError("pool_size and planning_workers must be at least 1")
+        self.metrics = Metrics()
+        self.planner = builder_factory(None, **builder_kwargs)
+        self._clients = [client_factory() for _ in range(pool_size)]
+        self._idle: "queue.SimpleQueue[Builder]" = queue.SimpleQueue()
+        for client in self._clients:
+            self._idle.put(builder_factory(client, **builder_kwargs))
+        self._idle_count = pool_size
+        self._planning = ThreadPoolExecutor(max_workers=planning_workers, thread_name_prefix="plan")
+        self._placing = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="place")
+        self._regions = RegionIndex()
+        self._lock = threading.Lock()
+        self._unplaced: List[ScheduledBuild] = []  # Queued, planning or waiting for their region, in submission order
+        self._builds: Dict[int, ScheduledBuild] = {}
+        self._ids = itertools.count(1)
+        self._closed = False
+
+    def submit(
+        self,
+        prompt: str,
+        bounds_min: Tuple[int, int, int],
+        bounds_max: Tuple[int, int, int],
+        palette: List[str],
+        **options: Any,
+    ) -> ScheduledBuild:
+        """
+        Queues a build. options are Builder.build keywords; the returned
+        record's future resolves to the placed plan.
+        """
+        unknown = set(options) - set(PLANNING_OPTIONS) - set(PLACEMENT_OPTIONS) - {"plan"}
+        if unknown:
+            raise ValueError(f"Unsupported build options: {', '.join(sorted(unknown))}")
+        bounds_min, bounds_max = self.planner._normalize_bounds(bounds_min, bounds_max)
+        placement = {"move_agent": False}
+        placement.update({k: v for k, v in options.items() if k in PLACEMENT_OPTIONS})
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BuildScheduler is closed")
+            # Ids are taken under the lock so _unplaced stays in submission order
+            build = ScheduledBuild(
+                id=next(self._ids),
+                prompt=prompt,
+                bounds_min=bounds_min,
+                bounds_max=bounds_max,
+                palette=list(palette),
+                planning_options={k: v for k, v in options.items() if k in PLANNING_OPTIONS},
+                placement_options=placement,
+                plan=options.get("plan"),
+            )
+            self._builds[build.id] = build
+            self._unplaced.append(build)
+        self.metrics.inc("builds_submitted_total")
+        self._planning.submit(self._plan, build)
+        return build
+
+    def _plan(self, build: ScheduledBuild) -> None:
+        build.planning_started = time.perf_counter()
+        build.status = "planning"
+        try:
+            if build.plan is None:
+                build.plan = self.planner.plan(
+                    build.prompt, build.bounds_min, build.bounds_max, build.palette, **build.planning_options
+                )
+        except Exception as e:
+            with self._lock:
+                # Later builds held back behind this one's region may go now
+                self._unplaced.remove(build)
+                self._dispatch()
+            self._finish(build, error=e)
+            return
+        build.planned = time.perf_counter()
+        build.status = "waiting"
+        with self._lock:
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Starts every planned build whose region is free; call with the lock held."""
+        blocked: List[Box] = []
+        for build in list(self._unplaced):
+            # An earlier build, planned or not, keeps its place ahead of later overlapping ones
+            if build.status != "waiting":
+                blocked.append(build.box)
+                continue
+            if self._idle_count == 0:
+                break
+            if any(boxes_overlap(build.box, box) for box in blocked) or not self._regions.claim(build.id, build.box):
+                blocked.append(build.box)
+                continue
+            self._unplaced.remove(build)
+            self._idle_count -= 1
+            build.placement_started = time.perf_counter()
+            build.status = "placing"
+            self._placing.submit(self._place, build, self._idle.get())
+
+    def _place(self, build: ScheduledBuild, builder: Builder) -> None:
+        error = None
+        try:
+            # hierarchical sets the block budget the finished plan is checked against
+            builder.build(
+                build.prompt, build.bounds_min, build.bounds_max, build.palette, plan=build.plan,
+                hierarchical=build.planning_options.get("hierarchical", False), **build.placement_options
+            )
+        except Exception as e:
+            error = e
+        if build.placement_options.get("snapshot"):
+            build.snapshot_id = builder.last_build_id
+        with self._lock:
+            self._regions.release(build.id)
+            self._idle.put(builder)
+            self._idle_count += 1
+        self._finish(build, error=error)
+        with self._lock:
+            self._dispatch()
+
+    def _finish(self, build: ScheduledBuild, error: Optional[BaseException] = None) -> None:
+        build.finished = time.perf_counter()
+        build.status = "failed" if error else "done"
+        timings = build.timings()
+        for name, seconds in timings.items():
+            if seconds is not None and name != "total":
+                self.metrics.observe(f"build_{name}_seconds", seconds)
+        self.metrics.inc("builds_total", status=build.status)
+        if error:
+            log.warning("Build %s failed after %.2fs: %s", build.id, timings["total"], error)
+            build.future.set_exception(error)
+        else:
+            log.info(
+                "Build %s done: queued %.2fs, planned %.2fs, region wait %.2fs, placed %.2fs",
+                build.id, timings["queue_wait"], timings["planning"] or 0.0,
+                timings["region_wait"] or 0.0, timings["placement"] or 0.0,
+            )
+            build.future.set_result(build.plan)
+
+    def wait(self, timeout: Optional[float] = None) -> List[ScheduledBuild]:
+        """Blocks until every submitted build has finished; returns them in submission order."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        builds = self.builds()
+        for build in builds:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                build.future.exception(timeout=remaining)
+            except FutureTimeoutError:
+                raise TimeoutError(f"Build {build.id} still {build.status} after {timeout}s") from None
+        return builds
+
+    def builds(self) -> List[ScheduledBuild]:
+        with self._lock:
+            return [self._builds[key] for key in sorted(self._builds)]
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-build status and timings in seconds."""
+        return [
+            dict(id=build.id, prompt=build.prompt, status=build.status, **build.timings())
+            for build in self.builds()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheduler": self.metrics.snapshot(),
+            "planner": self.planner.metrics.snapshot(),
+            "clients": [client.stats() for client in self._clients],
+        }
+
+    def close(self, wait: bool = True) -> None:
+        """Stops accepting builds; with wait=True queued builds finish first."""
+        with self._lock:
+            self._closed = True
+        if wait:
+            self.wait()
+        self._planning.shutdown(wait=wait)
+        self._placing.shutdown(wait=wait)
+        for client in self._clients:
+            client.close()
+
+    def __enter__(self) -> "BuildScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
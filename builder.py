@@ -1,15 +1,34 @@
 import time
+import uuid
+import queue
+import difflib
+import threading
+# numpy and pydantic stay eager: the schemas below are pydantic models built at
+# class-definition time, and VoxelPlan (numpy throughout) is part of the plan
+# type checks. langchain, langgraph and dotenv are deferred to first use.
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, TypedDict
-from dotenv import load_dotenv
-from langgraph.graph import END, StateGraph
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from typing import Dict, List, Optional, Tuple, TypedDict, Union
 from pydantic import BaseModel, Field
 from minecraft_client import MinecraftClient
+from plan_compiler import FILL_VOLUME_LIMIT, CompiledPlan, PlanCommand, compile_plan, iter_cells, split_box
+from execution_planner import DEFAULT_REACH, order_for_locality, plan_moves
+from rate_control import AdaptiveThrottle
+from plan_cache import PlanCache
+from region_snapshot import RegionSnapshot, SnapshotStore
+from templates import Template, TemplateRegistry
+from voxel_plan import VoxelPlan
+from plan_stream import IncrementalOpParser
+from primitives import PrimitivePlan, PrimitivePlanSchema
+from metrics import Metrics, get_logger
 
+log = get_logger("builder")
 
-load_dotenv()
+# How invalid ops are handled: ask the model to fix only them, clamp coordinates
+# and map blocks onto the palette, drop them, or redraft the whole plan.
+REPAIR_POLICIES = ("model", "clamp", "drop", "redraft")
 
 @dataclass
 class BlockOp:
@@ -19,6 +38,51 @@ class BlockOp:
     block: str
 
 
+class _LazyModel:
+    """
+    A chat model built on first use, so importing builder and constructing a
+    Builder stay cheap for scripts that never call the LLM.
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._factory()
+            return self._model
+
+    def invoke(self, *args, **kwargs):
+        return self.get().invoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        return self.get().stream(*args, **kwargs)
+
+
+def _chat_model(model: str):
+    """ChatOpenAI for the model name; langchain and .env are loaded on the first call."""
+    from dotenv import load_dotenv
+    from langchain_openai import ChatOpenAI
+    load_dotenv()
+    return ChatOpenAI(model=model)
+
+
+def _chat_messages(system_text: str, user_text: str) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    return [SystemMessage(content=system_text), HumanMessage(content=user_text)]
+
+
+def _describe_ops(indices: List[int], limit: int = 5) -> str:
+    """Formats plan op indices for error messages, e.g. "Ops 3, 4, 9 (+12 more)"."""
+    if len(indices) == 1:
+        return f"Op {indices[0]}"
+    shown = ", ".join(str(idx) for idx in indices[:limit])
+    extra = f" (+{len(indices) - limit} more)" if len(indices) > limit else ""
+    return f"Ops {shown}{extra}"
+
+
 class BlockOpSchema(BaseModel):  # Structured response for LLM via langchain
     x: int = Field(description="Relative x coordinate within bounds.")
     y: int = Field(description="Relative y coordinate within bounds.")
@@ -30,6 +94,34 @@ class PlanSchema(BaseModel):  # Structured response for LLM via langchain
     ops: List[BlockOpSchema]
 
 
+class RegionSchema(BaseModel):  # Structured response for LLM via langchain
+    name: str = Field(description="Short name, e.g. walls or roof.")
+    purpose: str = Field(description="What this part of the build contains.")
+    min_x: int = Field(description="Relative min x (inclusive).")
+    min_y: int = Field(description="Relative min y (inclusive).")
+    min_z: int = Field(description="Relative min z (inclusive).")
+    max_x: int = Field(description="Relative max x (inclusive).")
+    max_y: int = Field(description="Relative max y (inclusive).")
+    max_z: int = Field(description="Relative max z (inclusive).")
+
+
+class LayoutSchema(BaseModel):  # Structured response for LLM via langchain
+    regions: List[RegionSchema]
+
+
+class OpFixSchema(BaseModel):  # Structured response for LLM via langchain
+    index: int = Field(description="Index of the invalid op being fixed.")
+    drop: bool = Field(default=False, description="True to remove the op instead of fixing it.")
+    x: int = Field(default=0, description="Corrected relative x coordinate.")
+    y: int = Field(default=0, description="Corrected relative y coordinate.")
+    z: int = Field(default=0, description="Corrected relative z coordinate.")
+    block: str = Field(default="", description="Corrected block id from the palette.")
+
+
+class RepairSchema(BaseModel):  # Structured response for LLM via langchain
+    fixes: List[OpFixSchema]
+
+
 class BuilderState(TypedDict, total=False):
     prompt: str
     bounds_min: Tuple[int, int, int]
@@ -38,9 +130,17 @@ class BuilderState(TypedDict, total=False):
     palette: List[str]
     max_blocks: int
     attempts: int
-    plan: List[BlockOp]
+    voxel: bool
+    primitives: bool
+    plan: Union[List[BlockOp], VoxelPlan, PrimitivePlan]
     error: Optional[str]
     last_error: Optional[str]
+    cache_key: Optional[str]
+    cache_checked: bool
+    from_cache: bool
+    hierarchical: bool
+    regions: List[RegionSchema]
+    violations: List[Tuple[int, str]]
 
 
 class Builder:
@@ -51,64 +151,841 @@ class Builder:
         max_blocks: int = 600,
         max_retries: int = 2,
         throttle_seconds: float = 0.05,
+        batch_size: int = 32,
+        merge_fills: bool = True,
+        pipeline_window: int = 4,
+        reach: float = DEFAULT_REACH,
+        adaptive_throttle: bool = True,
+        min_throttle_seconds: float = 0.001,
+        max_throttle_seconds: float = 1.0,
+        tps_sample_every: int = 10,
+        cache_plans: bool = True,
+        plan_cache: Optional[PlanCache] = None,
+        max_regions: int = 8,
+        region_max_blocks: int = 600,
+        region_concurrency: int = 4,
+        primitive_max_blocks: int = 32768,
+        repair_policy: str = "model",
+        max_repair_fraction: float = 0.25,
+        draft_candidates: int = 1,
+        ledger_scope: Optional[str] = "build",
+        snapshot_store: Optional[SnapshotStore] = None,
+        template_registry: Optional[TemplateRegistry] = None,
     ) -> None:
+        if repair_policy not in REPAIR_POLICIES:
+            raise ValueError(f"repair_policy must be one of {REPAIR_POLICIES}, got {repair_policy}")
         self.client = client
         self.model = model
         self.max_blocks = max_blocks
         self.max_retries = max_retries
         self.throttle_seconds = throttle_seconds  # Time to wait between placing blocks for lag
-        self._structured_model = ChatOpenAI(model=self.model).with_structured_output(PlanSchema)
-        self._graph = self._build_graph()
+        # Adjusts the wait from measured round trips and server TPS; None keeps it fixed
+        self.throttle: Optional[AdaptiveThrottle] = None
+        if adaptive_throttle:
+            self.throttle = AdaptiveThrottle(
+                initial_delay=throttle_seconds,
+                min_delay=min_throttle_seconds,
+                max_delay=max_throttle_seconds,
+            )
+        self.tps_sample_every = tps_sample_every  # Batches between tick_rate samples; 0 disables
+        # Validated plans keyed on prompt text and model, reused before calling the LLM
+        self.plan_cache: Optional[PlanCache] = None
+        if cache_plans:
+            self.plan_cache = plan_cache if plan_cache is not None else PlanCache()
+        self.batch_size = max(1, batch_size)  # Commands sent per listener round trip
+        self.merge_fills = merge_fills  # Merge same-block ops into /fill boxes
+        self.pipeline_window = max(1, pipeline_window)  # Batches in flight at once
+        self.reach = reach  # Only teleport when the next target is farther than this
+        self.last_compiled: Optional[CompiledPlan] = None
+        # Hierarchical planning: a coarse layout, then one model call per sub-region
+        self.max_regions = max_regions
+        self.region_max_blocks = region_max_blocks  # Block budget for each sub-region
+        self.region_concurrency = max(1, region_concurrency)  # Sub-regions planned at once
+        self.primitive_max_blocks = primitive_max_blocks  # Expanded block budget for primitive plans
+        self.repair_policy = repair_policy
+        # Redraft instead of repairing when more than this share of ops is invalid
+        self.max_repair_fraction = max_repair_fraction
+        self.draft_candidates = max(1, draft_candidates)  # Concurrent drafts; the first valid one wins
+        # Listener inventory ledger scope while executing a plan; None leaves it as is
+        self.ledger_scope = ledger_scope
+        self.last_job_id: Optional[str] = None  # Most recent async_submit build job
+        self.snapshot_store = snapshot_store  # Created on first use
+        self.last_build_id: Optional[str] = None  # Most recent build with a snapshot
+        self.template_registry = template_registry  # Created on first use
+        self.last_placed = None  # (plan, bounds_min, bounds_max) of the most recent placed or submitted build
+        self._job_slots: Dict[str, list] = {}  # Job id -> (plan command, command index) for errors
+        # Node spans, LLM latency and token usage; see stats()
+        self.metrics = Metrics()
+        # include_raw keeps the AIMessage so token usage can be recorded
+        self._layout_model = self._lazy_structured_model(LayoutSchema)
+        self._structured_model = self._lazy_structured_model(PlanSchema)
+        self._primitive_model = self._lazy_structured_model(PrimitivePlanSchema)
+        self._repair_model = self._lazy_structured_model(RepairSchema)
+        # Plain JSON mode so the response can be parsed while it streams
+        self._stream_model = _LazyModel(
+            lambda: _chat_model(self.model).bind(response_format={"type": "json_object"})
+        )
+        self.last_stream_stats: Optional[Dict[str, float]] = None
+        self._graph = None  # Compiled on first plan; see warm_up
+        self._graph_lock = threading.Lock()
 
-    def build(
+    def _lazy_structured_model(self, schema) -> _LazyModel:
+        return _LazyModel(lambda: _chat_model(self.model).with_structured_output(schema, include_raw=True))
+
+    def _compiled_graph(self):
+        with self._graph_lock:
+            if self._graph is None:
+                self._graph = self._build_graph()
+            return self._graph
+
+    def warm_up(self) -> float:
+        """
+        Imports langchain/langgraph, builds the chat models and compiles the
+        planning graph now rather than on the first build. Returns the seconds taken.
+        """
+        started = time.perf_counter()
+        for model in (
+            self._layout_model, self._structured_model, self._primitive_model, self._repair_model, self._stream_model
+        ):
+            if isinstance(model, _LazyModel):
+                model.get()
+        self._compiled_graph()
+        _chat_messages("", "")
+        return time.perf_counter() - started
+
+    def plan(
         self,
         prompt: str,
         bounds_min: Tuple[int, int, int],
         bounds_max: Tuple[int, int, int],
         palette: List[str],
-        move_agent: bool = True,
-        verify: bool = False,
-    ) -> List[BlockOp]:
+        use_plan_cache: bool = True,
+        purge_plan_cache: bool = False,
+        voxel: bool = False,
+        hierarchical: bool = False,
+        primitives: bool = False,
+    ) -> Union[List[BlockOp], VoxelPlan, PrimitivePlan]:
+        """
+        Runs the planning graph only and returns a validated plan without
+        touching the world; pass it back to build(plan=...) to place it, with
+        the same hierarchical flag so it is checked against the same budget.
+        """
+        if primitives and hierarchical:
+            raise ValueError("primitives and hierarchical planning cannot be combined")
         bounds_min, bounds_max = self._normalize_bounds(bounds_min, bounds_max)
         size = self._size_from_bounds(bounds_min, bounds_max)
         palette = self._normalize_palette(palette)
 
+        max_blocks = self.primitive_max_blocks if primitives else self.max_blocks
+        cache_key = None
+        if self.plan_cache is not None:
+            system_text, user_text = self._compose_prompt(prompt, size, palette, max_blocks, None, primitives)
+            model_key = self.model
+            if hierarchical:
+                model_key = f"{self.model}:hierarchical"
+            elif primitives:
+                model_key = f"{self.model}:primitives"
+            cache_key = PlanCache.make_key(model_key, system_text, user_text)
+            if purge_plan_cache:
+                self.plan_cache.delete(cache_key)
+
         state: BuilderState = {
             "prompt": prompt,
             "bounds_min": bounds_min,
             "bounds_max": bounds_max,
             "size": size,
             "palette": palette,
-            "max_blocks": self.max_blocks,
+            "max_blocks": max_blocks,
             "attempts": 0,
+            "voxel": voxel,
+            "primitives": primitives,
             "error": None,
             "last_error": None,
+            "cache_key": cache_key if use_plan_cache else None,
+            "cache_checked": False,
+            "from_cache": False,
+            "hierarchical": hierarchical,
         }
 
-        result = self._graph.invoke(state)
+        result = self._compiled_graph().invoke(state)
         if result.get("error"):
             raise ValueError(result["error"])
         plan = result.get("plan")
         if plan is None:
             raise RuntimeError("No plan returned from builder.")
+        return plan
 
-        self._execute_plan(plan, bounds_min, move_agent=move_agent, verify=verify)
+    def build(
+        self,
+        prompt: str,
+        bounds_min: Tuple[int, int, int],
+        bounds_max: Tuple[int, int, int],
+        palette: List[str],
+        move_agent: bool = True,
+        verify: bool = False,
+        repair: bool = False,
+        diff: bool = False,
+        use_plan_cache: bool = True,
+        purge_plan_cache: bool = False,
+        voxel: bool = False,
+        plan: Optional[Union[List[BlockOp], VoxelPlan, PrimitivePlan]] = None,
+        hierarchical: bool = False,
+        primitives: bool = False,
+        async_submit: bool = False,
+        snapshot: bool = False,
+    ) -> Union[List[BlockOp], VoxelPlan, PrimitivePlan]:
+        """
+        Plans (unless a ready plan is passed) and places a structure in the bounds.
+        With voxel=True the model response becomes a VoxelPlan and is validated,
+        diffed and executed without per-block objects; a VoxelPlan is returned.
+        With hierarchical=True the model first lays out sub-regions, which are
+        then planned concurrently with their own bounds and block budget.
+        With primitives=True the model describes the build as boxes, walls,
+        lines and copies of earlier groups; the PrimitivePlan is validated per
+        shape and compiled to fills without listing every block.
+        With async_submit=True the compiled plan is handed to the listener as a
+        build job and build returns once it is queued (see last_job_id and
+        wait_for_job), so the next structure can be planned meanwhile.
+        With snapshot=True the bounds are read before anything is placed and
+        stored on disk under last_build_id; rollback(build_id) restores them.
+        """
+        if primitives and hierarchical:
+            raise ValueError("primitives and hierarchical planning cannot be combined")
+        if async_submit and (verify or repair):
+            raise ValueError("verify and repair need the build to finish; call wait_for_job first")
+        bounds_min, bounds_max = self._normalize_bounds(bounds_min, bounds_max)
+        size = self._size_from_bounds(bounds_min, bounds_max)
+        palette = self._normalize_palette(palette)
+
+        if plan is not None:
+            if isinstance(plan, VoxelPlan) and plan.size != size:
+                raise ValueError(f"VoxelPlan size {plan.size} does not match bounds size {size}")
+            if isinstance(plan, PrimitivePlan):
+                max_blocks = self.primitive_max_blocks
+            elif hierarchical:
+                # A hierarchical plan may use every region's budget, as when it was planned
+                max_blocks = self.region_max_blocks * self.max_regions
+            else:
+                max_blocks = self.max_blocks
+            validation_error = self._validate_plan(plan, size, palette, max_blocks)
+            if validation_error:
+                raise ValueError(validation_error)
+            self._place(plan, bounds_min, bounds_max, palette, move_agent, verify, repair, diff, async_submit, snapshot)
+            return plan
+
+        plan = self.plan(
+            prompt, bounds_min, bounds_max, palette,
+            use_plan_cache=use_plan_cache,
+            purge_plan_cache=purge_plan_cache,
+            voxel=voxel,
+            hierarchical=hierarchical,
+            primitives=primitives,
+        )
+        self._place(plan, bounds_min, bounds_max, palette, move_agent, verify, repair, diff, async_submit, snapshot)
         return plan
 
+    def build_streaming(
+        self,
+        prompt: str,
+        bounds_min: Tuple[int, int, int],
+        bounds_max: Tuple[int, int, int],
+        palette: List[str],
+        move_agent: bool = True,
+        on_invalid: str = "stop",
+        queue_size: int = 128,
+    ) -> List[BlockOp]:
+        """
+        Places blocks while the model is still streaming the plan.
+        Ops are parsed and validated one by one and handed to the executor through
+        a bounded queue. If a later op is invalid, on_invalid="stop" keeps the
+        placed prefix and raises; "rollback" first restores what was there before
+        (read in bulk up front). There are no retries in this mode.
+        """
+        if on_invalid not in ("stop", "rollback"):
+            raise ValueError(f"on_invalid must be 'stop' or 'rollback', got {on_invalid}")
+        bounds_min, bounds_max = self._normalize_bounds(bounds_min, bounds_max)
+        size = self._size_from_bounds(bounds_min, bounds_max)
+        palette = self._normalize_palette(palette)
+        system_text, user_text = self._compose_prompt(prompt, size, palette, self.max_blocks, None)
+
+        cache_key = None
+        if self.plan_cache is not None:
+            cache_key = PlanCache.make_key(self.model, system_text, user_text)
+            cached = self.plan_cache.get(cache_key)
+            if cached is not None:
+                log.info("Using cached plan")
+                plan = [BlockOp(x=x, y=y, z=z, block=block) for x, y, z, block in cached]
+                return self.build(prompt, bounds_min, bounds_max, palette, move_agent=move_agent, plan=plan)
+
+        prior = self.client.read_region(bounds_min, bounds_max, full_state=True) if on_invalid == "rollback" else None
+        system_text += (
+            " Respond with a JSON object {\"ops\": [...]} and list ops bottom-up,"
+            " so supporting blocks come before the blocks resting on them."
+        )
+        ops_queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._stream_ops,
+            args=(system_text, user_text, size, palette, ops_queue, stop),
+            daemon=True,
+        )
+        started = time.perf_counter()
+        producer.start()
+
+        placed: List[BlockOp] = []
+        first_block: Optional[float] = None
+        position = None
+        batches = 0  # Streamed batches placed, for spacing tick_rate samples like _execute_plan
+        error: Optional[str] = None
+        finished = False
+        try:
+            while not finished and error is None:
+                items = [ops_queue.get()]  # Wait for at least one op
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(ops_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                ops = []
+                for item in items:
+                    if item is None:
+                        finished = True
+                    elif isinstance(item, Exception):
+                        error = str(item)
+                    else:
+                        ops.append(item)
+                if ops:
+                    position = self._place_streamed(ops, len(placed), bounds_min, move_agent, position)
+                    placed.extend(ops)
+                    if first_block is None:
+                        first_block = time.perf_counter() - started
+                    batches += 1
+                    time.sleep(self._next_delay(batches))
+        finally:
+            stop.set()
+
+        total = time.perf_counter() - started
+        self.last_stream_stats = {
+            "time_to_first_block": first_block,
+            "total_seconds": total,
+            "ops_placed": len(placed),
+        }
+        log.info("Streamed %d ops in %.2fs (first block after %.2fs)", len(placed), total, first_block or 0)
+
+        if error is not None:
+            if on_invalid == "rollback" and placed:
+                self._rollback_streamed(placed, prior, bounds_min, move_agent)
+            raise ValueError(error)
+        if cache_key is not None:
+            self.plan_cache.put(cache_key, [[op.x, op.y, op.z, op.block] for op in placed])
+        return placed
+
+    def _stream_ops(
+        self,
+        system_text: str,
+        user_text: str,
+        size: Tuple[int, int, int],
+        palette: List[str],
+        ops_queue: "queue.Queue",
+        stop: threading.Event,
+    ) -> None:
+        """Producer thread: streams the model response and queues validated ops."""
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    ops_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        parser = IncrementalOpParser()
+        palette_set = set(palette)
+        count = 0
+        messages = _chat_messages(system_text, user_text)
+        started = time.perf_counter()
+        try:
+            for chunk in self._stream_model.stream(messages):
+                self._record_usage(getattr(chunk, "usage_metadata", None), "stream")
+                content = chunk.content if isinstance(chunk.content, str) else ""
+                for raw in parser.feed(content):
+                    op = BlockOp(x=int(raw["x"]), y=int(raw["y"]), z=int(raw["z"]), block=str(raw["block"]))
+                    error = self._validate_op(count, op, size, palette_set)
+                    if error is None and count >= self.max_blocks:
+                        error = f"Plan has too many ops (> {self.max_blocks})."
+                    if error is not None:
+                        put(ValueError(error))
+                        return
+                    if not put(op):
+                        return
+                    count += 1
+                if stop.is_set():
+                    return
+            if not parser.finished:
+                put(ValueError("Stream ended before the ops list was complete."))
+                return
+        except Exception as exc:
+            put(ValueError(f"Streaming output failed: {exc}"))
+            return
+        finally:
+            self.metrics.observe("llm_seconds", time.perf_counter() - started, call="stream")
+        put(None)
+
+    def _place_streamed(
+        self,
+        ops: List[BlockOp],
+        first_index: int,
+        bounds_min: Tuple[int, int, int],
+        move_agent: bool,
+        position: Optional[Tuple[float, float, float]],
+    ) -> Optional[Tuple[float, float, float]]:
+        """Places one batch of streamed ops; returns where the agent now stands."""
+        base_x, base_y, base_z = bounds_min
+        plan_commands = [
+            PlanCommand((op.x, op.y, op.z), (op.x, op.y, op.z), op.block, [first_index + offset])
+            for offset, op in enumerate(ops)
+        ]
+        boxes = [((base_x + op.x, base_y + op.y, base_z + op.z),) * 2 for op in ops]
+        moves = plan_moves(boxes, reach=self.reach, start=position) if move_agent else [None] * len(ops)
+        commands, slots = self._encode_batch(plan_commands, boxes, moves)
+        self._check_batch(self.client.submit_batch(commands), slots)
+        for move in moves:
+            if move is not None:
+                position = move
+        return position
+
+    def _rollback_streamed(
+        self,
+        placed: List[BlockOp],
+        prior: Dict[Tuple[int, int, int], str],
+        bounds_min: Tuple[int, int, int],
+        move_agent: bool,
+    ) -> None:
+        """Puts back the blocks that were in place before the streamed prefix."""
+        base_x, base_y, base_z = bounds_min
+        restore = {}
+        for op in placed:
+            pos = (base_x + op.x, base_y + op.y, base_z + op.z)
+            restore[(op.x, op.y, op.z)] = prior.get(pos, "minecraft:air")
+        log.warning("Rolling back %d streamed blocks", len(restore))
+        ops = [BlockOp(x=x, y=y, z=z, block=block) for (x, y, z), block in restore.items()]
+        self._execute_plan(compile_plan(ops, merge=self.merge_fills), bounds_min, move_agent=move_agent)
+
+    def _place(
+        self,
+        plan: Union[List[BlockOp], VoxelPlan, PrimitivePlan],
+        bounds_min: Tuple[int, int, int],
+        bounds_max: Tuple[int, int, int],
+        palette: List[str],
+        move_agent: bool,
+        verify: bool,
+        repair: bool,
+        diff: bool,
+        async_submit: bool = False,
+        snapshot: bool = False,
+    ) -> None:
+        """Compiles and executes (or submits) a validated plan, then optionally verifies it."""
+        self.last_placed = None  # A failed build must not leave the previous one registrable
+        to_place = plan
+        existing = None
+        if snapshot:
+            self.last_build_id = None
+            with self.metrics.timer("phase_seconds", phase="snapshot"):
+                full = self.client.read_region(bounds_min, bounds_max, full_state=True)
+                self._save_snapshot(full, bounds_min, bounds_max)
+            # The diff steps compare plain names, as a default read returns them
+            existing = {pos: block.split("[", 1)[0].split(":")[-1] for pos, block in full.items()}
+        if diff:
+            with self.metrics.timer("phase_seconds", phase="diff"):
+                if existing is None:
+                    # The diff must see blocks changed in-game, not cached ones
+                    existing = self.client.read_region(bounds_min, bounds_max, use_cache=False)
+                if isinstance(plan, VoxelPlan):
+                    to_place = plan.diff(self._existing_grid(existing, bounds_min, plan.size), palette)
+                else:
+                    to_place = self._diff_plan(plan, existing, bounds_min, palette)
+            log.info("Diff: %d block changes needed for a %d-op plan", len(to_place), len(plan))
+        elif existing is not None and isinstance(plan, VoxelPlan) and "minecraft:air" in plan.palette:
+            # The snapshot already read the bounds, so air over air can be dropped for free.
+            # Without a read it stays: the region is never read just to prune commands.
+            with self.metrics.timer("phase_seconds", phase="diff"):
+                air = self._existing_grid(existing, bounds_min, plan.size) == "minecraft:air"
+                to_place = plan.without_redundant_air(air)
+            log.debug("Dropped %d redundant air placements", plan.block_count() - to_place.block_count())
+
+        with self.metrics.timer("phase_seconds", phase="compile"):
+            if isinstance(to_place, PrimitivePlan):
+                compiled = to_place.compile(merge=self.merge_fills)
+            else:
+                compiled = compile_plan(to_place, merge=self.merge_fills)
+        self.last_compiled = compiled
+        log.info(
+            "Compiled %d ops into %d commands (%.1fx)",
+            compiled.ops_in, compiled.commands_out, compiled.compression_ratio,
+        )
+        if async_submit:
+            self._submit_plan(compiled, bounds_min, move_agent=move_agent)
+            # Queued, not placed: stamp() checks the source before cloning it
+            self.last_placed = (plan, bounds_min, bounds_max)
+            return
+        with self.metrics.timer("phase_seconds", phase="execute"):
+            self._execute_plan(compiled, bounds_min, move_agent=move_agent)
+        if verify or repair:
+            with self.metrics.timer("phase_seconds", phase="verify"):
+                self._verify_plan(plan, bounds_min, repair=repair)
+        self.last_placed = (plan, bounds_min, bounds_max)
+
+    def _save_snapshot(
+        self,
+        existing: Dict[Tuple[int, int, int], str],
+        bounds_min: Tuple[int, int, int],
+        bounds_max: Tuple[int, int, int],
+    ) -> str:
+        if self.snapshot_store is None:
+            self.snapshot_store = SnapshotStore()
+        build_id = uuid.uuid4().hex[:12]
+        snapshot = RegionSnapshot.capture(build_id, existing, bounds_min, bounds_max)
+        self.snapshot_store.put(snapshot)
+        self.last_build_id = build_id
+        log.info("Saved snapshot %s (%d runs, %d block types)", build_id, len(snapshot.runs) // 2, len(snapshot.palette))
+        return build_id
+
+    def rollback(self, build_id: Optional[str] = None, move_agent: bool = False) -> CompiledPlan:
+        """
+        Restores the bounds of a snapshot build (default: the last one) to what
+        was there before it, using merged fills rather than per-block setblocks.
+        """
+        build_id = build_id or self.last_build_id
+        if build_id is None:
+            raise ValueError("No build has been snapshotted")
+        snapshot = self.snapshot_store.get(build_id) if self.snapshot_store is not None else None
+        if snapshot is None:
+            raise ValueError(f"No snapshot stored for build {build_id}")
+        compiled = compile_plan(snapshot, merge=self.merge_fills)
+        log.info("Rolling back build %s with %d commands", build_id, compiled.commands_out)
+        with self.metrics.timer("phase_seconds", phase="rollback"):
+            self._execute_plan(compiled, snapshot.bounds_min, move_agent=move_agent)
+        return compiled
+
+    def _templates(self) -> TemplateRegistry:
+        if self.template_registry is None:
+            self.template_registry = TemplateRegistry()
+        return self.template_registry
+
+    def register_template(
+        self,
+        name: str,
+        plan: Optional[Union[List[BlockOp], VoxelPlan, PrimitivePlan]] = None,
+        bounds_min: Optional[Tuple[int, int, int]] = None,
+        bounds_max: Optional[Tuple[int, int, int]] = None,
+    ) -> Template:
+        """
+        Records a placed plan (default: the last build, including one queued
+        with async_submit) and where it stands as a named template, so stamp()
+        can copy it instead of placing it again.
+        """
+        if plan is None:
+            if self.last_placed is None:
+                raise ValueError("No build has been placed yet")
+            plan, bounds_min, bounds_max = self.last_placed
+        elif bounds_min is None or bounds_max is None:
+            raise ValueError("bounds_min and bounds_max are required with a plan")
+        bounds_min, bounds_max = self._normalize_bounds(bounds_min, bounds_max)
+        cells = [[int(x), int(y), int(z), block] for x, y, z, block in iter_cells(plan)]
+        template = Template(name, bounds_min, bounds_max, cells)
+        self._templates().put(template)
+        log.info("Registered template %s (%d blocks at %s..%s)", name, len(cells), bounds_min, bounds_max)
+        return template
+
+    def stamp(
+        self,
+        name: str,
+        origin: Tuple[int, int, int],
+        rotation: int = 0,
+        mirror: Optional[str] = None,
+        move_agent: bool = False,
+        check_source: bool = True,
+    ) -> str:
+        """
+        Reproduces a template with its min corner at origin. Unrotated, unmirrored
+        copies are cloned from the original build in a few commands while it
+        still matches the template (check_source reads it back first); rotated
+        or mirrored copies, overlapping targets and changed sources fall back to
+        placing the compiled plan. Returns "clone" or "plan".
+        """
+        template = self._templates().get(name)
+        if template is None:
+            raise ValueError(f"No template named {name}")
+        cells = template.transformed_cells(rotation, mirror)  # Validates rotation and mirror
+        origin = tuple(int(v) for v in origin)
+        size = template.transformed_size(rotation)
+        dest_max = tuple(o + s - 1 for o, s in zip(origin, size))
+        overlaps = all(
+            origin[i] <= template.bounds_max[i] and template.bounds_min[i] <= dest_max[i] for i in range(3)
+        )
+        cloneable = rotation == 0 and mirror is None and not overlaps
+        with self.metrics.timer("phase_seconds", phase="stamp"):
+            if cloneable and (not check_source or self._template_intact(template)):
+                self._clone_template(template, origin, move_agent)
+                method = "clone"
+            else:
+                ops = [BlockOp(x=x, y=y, z=z, block=block) for x, y, z, block in cells]
+                self._execute_plan(compile_plan(ops, merge=self.merge_fills), origin, move_agent=move_agent)
+                method = "plan"
+        self.metrics.inc("stamps_total", method=method)
+        log.info("Stamped template %s at %s via %s", name, origin, method)
+        return method
+
+    def _template_intact(self, template: Template) -> bool:
+        """
+        True when the template's source still holds its blocks, compared without
+        block states. Only the template's own solid cells are checked: its air
+        cells are placed directly after the clone. Other cells in the source
+        bounds are not checked, since a masked clone skips the air around a
+        build; solid blocks there (terrain inside the bounds) are copied along,
+        as the mask cannot exclude them.
+        """
+        existing = self.client.read_region(template.bounds_min, template.bounds_max, use_cache=False)
+        base_x, base_y, base_z = template.bounds_min
+        for x, y, z, block in template.cells:
+            expected = block.split("[", 1)[0].split(":")[-1]
+            if expected == "air":
+                continue
+            found = existing.get((base_x + x, base_y + y, base_z + z), "air")
+            if found.split("[", 1)[0].split(":")[-1] != expected:
+                return False
+        return True
+
+    def _clone_template(self, template: Template, origin: Tuple[int, int, int], move_agent: bool) -> None:
+        """Masked clones of the source in fill-sized slabs, then any air cells of the plan."""
+        commands = []
+        for box in split_box(template.bounds_min, template.bounds_max, "", FILL_VOLUME_LIMIT):
+            dest = tuple(o + c - b for o, c, b in zip(origin, box.min_corner, template.bounds_min))
+            commands.append(("clone_region",) + box.min_corner + box.max_corner + dest + ("masked",))
+        results = self.client.submit_batch(commands).result()
+        failures = [
+            f"Clone of {command[1:4]}..{command[4:7]} failed: {item.get('error') or 'listener reported failure'}"
+            for command, item in zip(commands, results)
+            if item.get("status") != "success" or not item.get("result")
+        ]
+        if failures:
+            raise RuntimeError("\n".join(failures))
+        # Masked clones skip air, so cells the template clears are placed directly
+        air = [
+            BlockOp(x=x, y=y, z=z, block=block)
+            for x, y, z, block in template.cells
+            if block.split(":")[-1] == "air"
+        ]
+        if air:
+            self._execute_plan(compile_plan(air, merge=self.merge_fills), origin, move_agent=move_agent)
+
+    def _existing_grid(
+        self,
+        existing: Dict[Tuple[int, int, int], str],
+        bounds_min: Tuple[int, int, int],
+        size: Tuple[int, int, int],
+    ) -> np.ndarray:
+        """Turns a read_region snapshot into a [y, z, x] array of minecraft: ids."""
+        width, height, length = size
+        base_x, base_y, base_z = bounds_min
+        grid = np.full((height, length, width), "minecraft:air", dtype=object)
+        for (x, y, z), block in existing.items():
+            grid[y - base_y, z - base_z, x - base_x] = f"minecraft:{block}"
+        return grid
+
     def _build_graph(self):
+        from langgraph.graph import END, StateGraph
         graph = StateGraph(BuilderState)
-        graph.add_node("draft_plan", self._draft_plan)
-        graph.add_node("validate_plan", self._validate_plan_node)
-        graph.set_entry_point("draft_plan")
+        graph.add_node("draft_plan", self._timed_node("draft_plan", self._draft_plan))
+        graph.add_node("plan_layout", self._timed_node("plan_layout", self._plan_layout))
+        graph.add_node("plan_regions", self._timed_node("plan_regions", self._plan_regions))
+        graph.add_node("validate_plan", self._timed_node("validate_plan", self._validate_plan_node))
+        graph.add_node("repair_plan", self._timed_node("repair_plan", self._repair_plan))
+        graph.set_conditional_entry_point(
+            lambda state: "plan_layout" if state.get("hierarchical") else "draft_plan",
+            {"plan_layout": "plan_layout", "draft_plan": "draft_plan"},
+        )
         graph.add_edge("draft_plan", "validate_plan")
+        graph.add_conditional_edges(
+            "plan_layout",
+            lambda state: "regions" if state.get("regions") and not state.get("error") else "validate",
+            {"regions": "plan_regions", "validate": "validate_plan"},
+        )
+        graph.add_edge("plan_regions", "validate_plan")
+        graph.add_edge("repair_plan", "validate_plan")
         graph.add_conditional_edges(
             "validate_plan",
             self._route_after_validate,
-            {"retry": "draft_plan", "done": END},
+            {"retry": "draft_plan", "retry_layout": "plan_layout", "repair": "repair_plan", "done": END},
         )
         return graph.compile()
 
+    def _timed_node(self, name: str, node):
+        """Wraps a graph node so each run is recorded as a node_seconds span."""
+        def run(state: BuilderState) -> BuilderState:
+            with self.metrics.timer("node_seconds", node=name):
+                return node(state)
+        return run
+
+    def _cached_plan_state(self, state: BuilderState) -> Optional[BuilderState]:
+        """State update for a plan cache hit, or None on a miss."""
+        cache_key = state.get("cache_key")
+        if not cache_key or state.get("cache_checked"):
+            return None
+        cached = self.plan_cache.get(cache_key)
+        if cached is None:
+            return None
+        log.info("Using cached plan")
+        # A cache hit does not count as an attempt
+        if state.get("primitives"):
+            cached_plan = PrimitivePlan.from_dicts(cached)
+        elif state.get("voxel"):
+            cached_plan = VoxelPlan.from_lists(cached, state["size"])
+        else:
+            cached_plan = [BlockOp(x=x, y=y, z=z, block=block) for x, y, z, block in cached]
+        update: BuilderState = {
+            "plan": cached_plan,
+            "cache_checked": True,
+            "from_cache": True,
+            "error": None,
+            "last_error": None,
+        }
+        if state.get("hierarchical"):
+            update["max_blocks"] = self.region_max_blocks * self.max_regions
+        return update
+
+    def _plan_layout(self, state: BuilderState) -> BuilderState:
+        """Asks the model for a coarse split of the bounds into sub-regions."""
+        cached = self._cached_plan_state(state)
+        if cached is not None:
+            return cached
+
+        attempts = (state.get("attempts") or 0) + 1
+        width, height, length = state["size"]
+        error_hint = f"\nPrevious error: {state['last_error']}" if state.get("last_error") else ""
+        messages = _chat_messages(
+            (
+                "You are a Minecraft build planner. "
+                "Split the requested build into a few rectangular sub-regions (e.g. foundation, "
+                "walls, roof, interior) that can be planned independently. "
+                "Return regions: list of { name, purpose, min_x, min_y, min_z, max_x, max_y, max_z } "
+                "with inclusive relative coordinates inside the bounds."
+            ),
+            (
+                f"Build request: {state['prompt']}\n"
+                f"Bounds size (relative): width={width}, height={height}, length={length}\n"
+                f"Max regions: {self.max_regions}\n"
+                f"Max blocks per region: {self.region_max_blocks}\n"
+                f"{error_hint}"
+            ),
+        )
+        try:
+            layout: LayoutSchema = self._invoke_structured(self._layout_model, messages, "layout")
+        except Exception as exc:
+            error = f"Layout output failed: {exc}"
+            return {
+                "attempts": attempts,
+                "plan": [],
+                "regions": [],
+                "cache_checked": True,
+                "error": error,
+                "last_error": error,
+            }
+
+        regions = layout.regions
+        error = None
+        if not regions:
+            error = "Layout has no regions."
+        elif len(regions) > self.max_regions:
+            error = f"Layout has too many regions ({len(regions)} > {self.max_regions})."
+        for region in regions:
+            if error:
+                break
+            if not (
+                0 <= region.min_x <= region.max_x < width
+                and 0 <= region.min_y <= region.max_y < height
+                and 0 <= region.min_z <= region.max_z < length
+            ):
+                error = f"Region {region.name} is empty or outside the bounds."
+        if error:
+            return {
+                "attempts": attempts,
+                "plan": [],
+                "regions": [],
+                "cache_checked": True,
+                "error": error,
+                "last_error": error,
+            }
+
+        log.info("Layout: %s", ", ".join(region.name for region in regions))
+        return {
+            "attempts": attempts,
+            "regions": regions,
+            "cache_checked": True,
+            "from_cache": False,
+            "error": None,
+            "last_error": None,
+        }
+
+    def _plan_regions(self, state: BuilderState) -> BuilderState:
+        """Plans every sub-region concurrently and merges them in layout order."""
+        regions = state["regions"]
+        with ThreadPoolExecutor(max_workers=self.region_concurrency) as pool:
+            results = list(pool.map(lambda region: self._plan_region(state, region), regions))
+
+        errors = [error for _, error in results if error]
+        if errors:
+            error = "; ".join(errors)
+            return {"plan": [], "error": error, "last_error": error}
+
+        plan: List[BlockOp] = []
+        for region_ops, _ in results:
+            plan.extend(region_ops)
+        if state.get("voxel"):
+            plan = VoxelPlan.from_ops(plan, state["size"])
+        return {
+            "plan": plan,
+            # The merged plan may use every region's budget
+            "max_blocks": self.region_max_blocks * len(regions),
+            "error": None,
+            "last_error": None,
+        }
+
+    def _plan_region(self, state: BuilderState, region: RegionSchema) -> Tuple[List[BlockOp], Optional[str]]:
+        """Plans one sub-region, retrying only this region on failure."""
+        size = (
+            region.max_x - region.min_x + 1,
+            region.max_y - region.min_y + 1,
+            region.max_z - region.min_z + 1,
+        )
+        prompt = (
+            f"{state['prompt']}\n"
+            f"Only build the '{region.name}' part of the structure: {region.purpose}. "
+            "Coordinates are relative to this part's own corner."
+        )
+        last_error = None
+        for _ in range(max(1, self.max_retries)):
+            system_text, user_text = self._compose_prompt(
+                prompt, size, state["palette"], self.region_max_blocks, last_error
+            )
+            try:
+                ops = self._call_llm_for_plan(system_text, user_text)
+            except Exception as exc:
+                last_error = f"Structured output failed: {exc}"
+                continue
+            last_error = self._validate_plan(ops, size, state["palette"], self.region_max_blocks)
+            if last_error is None:
+                return [
+                    BlockOp(x=op.x + region.min_x, y=op.y + region.min_y, z=op.z + region.min_z, block=op.block)
+                    for op in ops
+                ], None
+        return [], f"Region {region.name}: {last_error}"
+
     def _draft_plan(self, state: BuilderState) -> BuilderState:
+        cached = self._cached_plan_state(state)
+        if cached is not None:
+            return cached
+
         attempts = (state.get("attempts") or 0) + 1
         system_text, user_text = self._compose_prompt(
             prompt=state["prompt"],
@@ -116,15 +993,20 @@ class Builder:
             palette=state["palette"],
             max_blocks=state["max_blocks"],
             last_error=state.get("last_error"),
+            primitives=bool(state.get("primitives")),
         )
 
         try:
-            plan = self._call_llm_for_plan(system_text, user_text)
+            if self.draft_candidates > 1:
+                plan = self._first_valid_draft(state, system_text, user_text)
+            else:
+                plan = self._draft_once(state, system_text, user_text)
         except Exception as exc:
             error = f"Structured output failed: {exc}"
             return {
                 "attempts": attempts,
                 "plan": [],
+                "cache_checked": True,
                 "error": error,
                 "last_error": error,
             }
@@ -132,16 +1014,76 @@ class Builder:
         return {
             "attempts": attempts,
             "plan": plan,
+            "cache_checked": True,
+            "from_cache": False,
             "error": None,
             "last_error": None,
         }
 
-    def _call_llm_for_plan(self, system_text: str, user_text: str) -> List[BlockOp]:
-        messages = [
-            SystemMessage(content=system_text),
-            HumanMessage(content=user_text),
+    def _draft_once(self, state: BuilderState, system_text: str, user_text: str):
+        if state.get("primitives"):
+            return PrimitivePlan.from_schema(self._call_llm_for_primitives(system_text, user_text))
+        if state.get("voxel"):
+            return VoxelPlan.from_schema(self._call_llm_for_schema(system_text, user_text), state["size"])
+        return self._call_llm_for_plan(system_text, user_text)
+
+    def _first_valid_draft(self, state: BuilderState, system_text: str, user_text: str):
+        """
+        Drafts draft_candidates plans concurrently and returns the first valid one
+        without waiting for the rest; if none is valid, the first that completed.
+        """
+        pool = ThreadPoolExecutor(max_workers=self.draft_candidates)
+        futures = [
+            pool.submit(self._draft_once, state, system_text, user_text)
+            for _ in range(self.draft_candidates)
         ]
-        response: PlanSchema = self._structured_model.invoke(messages)
+        fallback = None
+        last_exc: Optional[Exception] = None
+        try:
+            for future in as_completed(futures):
+                try:
+                    plan = future.result()
+                except Exception as exc:
+                    last_exc = exc
+                    continue
+                if self._validate_plan(plan, state["size"], state["palette"], state["max_blocks"]) is None:
+                    return plan
+                if fallback is None:
+                    fallback = plan
+        finally:
+            pool.shutdown(wait=False)  # Slower candidates finish in the background
+        if fallback is None:
+            raise last_exc
+        return fallback
+
+    def _call_llm_for_schema(self, system_text: str, user_text: str) -> PlanSchema:
+        messages = _chat_messages(system_text, user_text)
+        return self._invoke_structured(self._structured_model, messages, "plan")
+
+    def _call_llm_for_primitives(self, system_text: str, user_text: str) -> PrimitivePlanSchema:
+        messages = _chat_messages(system_text, user_text)
+        return self._invoke_structured(self._primitive_model, messages, "primitives")
+
+    def _invoke_structured(self, model, messages, call: str):
+        """Invokes an include_raw structured model, recording latency and token usage."""
+        with self.metrics.timer("llm_seconds", call=call):
+            response = model.invoke(messages)
+        self._record_usage(getattr(response["raw"], "usage_metadata", None), call)
+        if response["parsed"] is None:
+            raise ValueError(f"Could not parse {call} response: {response.get('parsing_error')}")
+        return response["parsed"]
+
+    def _record_usage(self, usage: Optional[dict], call: str) -> None:
+        if usage:
+            self.metrics.inc("llm_input_tokens_total", usage.get("input_tokens", 0), call=call)
+            self.metrics.inc("llm_output_tokens_total", usage.get("output_tokens", 0), call=call)
+
+    def stats(self) -> dict:
+        """Builder spans and LLM usage plus the client and listener snapshots."""
+        return dict(self.client.stats(), builder=self.metrics.snapshot())
+
+    def _call_llm_for_plan(self, system_text: str, user_text: str) -> List[BlockOp]:
+        response = self._call_llm_for_schema(system_text, user_text)
         return [
             BlockOp(x=op.x, y=op.y, z=op.z, block=op.block)
             for op in response.ops
@@ -157,12 +1099,37 @@ class Builder:
             state["palette"],
             state["max_blocks"],
         )
+        cache_key = state.get("cache_key")
         if validation_error:
+            if state.get("from_cache") and cache_key:
+                # Stale entry; drop it so the retry goes to the model
+                self.plan_cache.delete(cache_key)
+                return {
+                    "from_cache": False,
+                    "violations": [],
+                    "error": validation_error,
+                    "last_error": None,
+                }
+            violations = self._plan_violations(
+                state.get("plan", []), state["size"], state["palette"], state["max_blocks"]
+            )
+            if violations:
+                validation_error = self._describe_violations(violations)
             return {
+                "violations": violations,
                 "error": validation_error,
                 "last_error": validation_error,
             }
 
+        if cache_key and not state.get("from_cache"):
+            plan = state.get("plan", [])
+            if isinstance(plan, PrimitivePlan):
+                self.plan_cache.put(cache_key, plan.to_dicts())
+            elif isinstance(plan, VoxelPlan):
+                self.plan_cache.put(cache_key, plan.to_lists())
+            else:
+                self.plan_cache.put(cache_key, [[op.x, op.y, op.z, op.block] for op in plan])
+
         return {
             "plan": state.get("plan", []),
             "error": None,
@@ -170,10 +1137,148 @@ class Builder:
         }
 
     def _route_after_validate(self, state: BuilderState) -> str:
-        if state.get("error") and (state.get("attempts") or 0) < self.max_retries:
-            return "retry"
+        if not state.get("error"):
+            return "done"
+        can_retry = (state.get("attempts") or 0) < self.max_retries
+        if self._repairable(state) and (can_retry or self.repair_policy in ("clamp", "drop")):
+            return "repair"
+        if can_retry:
+            return "retry_layout" if state.get("hierarchical") else "retry"
         return "done"
 
+    def _repairable(self, state: BuilderState) -> bool:
+        """True when a few bad ops can be fixed in place instead of redrafting."""
+        violations = state.get("violations") or []
+        if not violations or self.repair_policy == "redraft":
+            return False
+        return len(violations) <= self.max_repair_fraction * len(state.get("plan", []))
+
+    def _plan_violations(
+        self,
+        plan: Union[List[BlockOp], VoxelPlan, PrimitivePlan],
+        size: Tuple[int, int, int],
+        palette: List[str],
+        max_blocks: int,
+    ) -> List[Tuple[int, str]]:
+        """
+        Every invalid op as (index, message). Empty when the plan is over budget
+        or is a primitive plan, since neither can be fixed op by op.
+        """
+        if isinstance(plan, PrimitivePlan) or len(plan) > max_blocks:
+            return []
+        if isinstance(plan, VoxelPlan):
+            return plan.violations(palette)
+        palette_set = set(palette)
+        violations = []
+        for idx, op in enumerate(plan):
+            error = self._validate_op(idx, op, size, palette_set)
+            if error:
+                violations.append((idx, error))
+        return violations
+
+    def _describe_violations(self, violations: List[Tuple[int, str]], limit: int = 5) -> str:
+        if len(violations) == 1:
+            return violations[0][1]
+        shown = " ".join(message for _, message in violations[:limit])
+        extra = f" (+{len(violations) - limit} more)" if len(violations) > limit else ""
+        return f"{len(violations)} invalid ops: {shown}{extra}"
+
+    def _repair_plan(self, state: BuilderState) -> BuilderState:
+        """
+        Fixes only the invalid ops and keeps the rest of the plan. The model
+        policy sends just the offending ops back to the model; clamp and drop
+        repair them locally without another model call.
+        """
+        plan = state["plan"]
+        voxel = isinstance(plan, VoxelPlan)
+        ops = [BlockOp(x=x, y=y, z=z, block=block) for x, y, z, block in plan.to_lists()] if voxel else plan
+        bad = dict(state["violations"])
+        update: BuilderState = {"violations": []}
+
+        if self.repair_policy == "model":
+            update["attempts"] = (state.get("attempts") or 0) + 1
+            try:
+                fixes = self._call_llm_for_repair(state, ops, bad)
+            except Exception as exc:
+                error = f"Repair output failed: {exc}"
+                update.update({"plan": [], "error": error, "last_error": error})
+                return update
+        else:
+            fixes = {
+                idx: self._repair_op(ops[idx], state["size"], state["palette"])
+                for idx in bad
+            }
+
+        repaired = []
+        for idx, op in enumerate(ops):
+            if idx in bad:
+                op = fixes.get(idx)
+                if op is None:
+                    continue
+            repaired.append(op)
+        dropped = len(ops) - len(repaired)
+        log.info("Repaired %d invalid ops (%d dropped) with the %s policy", len(bad), dropped, self.repair_policy)
+        update.update({
+            "plan": VoxelPlan.from_ops(repaired, state["size"]) if voxel else repaired,
+            "error": None,
+            "last_error": None,
+        })
+        return update
+
+    def _call_llm_for_repair(
+        self,
+        state: BuilderState,
+        ops: List[BlockOp],
+        bad: Dict[int, str],
+    ) -> Dict[int, BlockOp]:
+        """Asks the model to fix or drop just the invalid ops; missing fixes are dropped."""
+        width, height, length = state["size"]
+        listing = "\n".join(
+            f"{idx}: x={ops[idx].x}, y={ops[idx].y}, z={ops[idx].z}, block={ops[idx].block} -> {message}"
+            for idx, message in bad.items()
+        )
+        messages = _chat_messages(
+            (
+                "You are a Minecraft build planner repairing a plan. "
+                "The rest of the plan is kept; return fixes: list of "
+                "{ index, drop, x, y, z, block } only for the ops listed, moving them inside "
+                "the bounds and using palette blocks, or drop=true to remove an op."
+            ),
+            (
+                f"Build request: {state['prompt']}\n"
+                f"Bounds size (relative): width={width}, height={height}, length={length}\n"
+                "Coordinates must satisfy: 0 <= x < width, 0 <= y < height, 0 <= z < length\n"
+                f"Palette: {', '.join(state['palette'])}\n"
+                f"Invalid ops:\n{listing}"
+            ),
+        )
+        response: RepairSchema = self._invoke_structured(self._repair_model, messages, "repair")
+        return {
+            fix.index: BlockOp(x=fix.x, y=fix.y, z=fix.z, block=fix.block)
+            for fix in response.fixes
+            if fix.index in bad and not fix.drop
+        }
+
+    def _repair_op(self, op: BlockOp, size: Tuple[int, int, int], palette: List[str]) -> Optional[BlockOp]:
+        """Clamps op into the bounds and maps its block onto the palette; None drops it."""
+        if self.repair_policy == "drop":
+            return None
+        width, height, length = size
+        block = op.block.strip().lower()
+        if not block.startswith("minecraft:"):
+            block = f"minecraft:{block}"
+        if block not in palette:
+            matches = difflib.get_close_matches(block, palette, n=1, cutoff=0.6)
+            if not matches:
+                return None
+            block = matches[0]
+        return BlockOp(
+            x=min(max(op.x, 0), width - 1),
+            y=min(max(op.y, 0), height - 1),
+            z=min(max(op.z, 0), length - 1),
+            block=block,
+        )
+
     def _compose_prompt(
         self,
         prompt: str,
@@ -181,15 +1286,26 @@ class Builder:
         palette: List[str],
         max_blocks: int,
         last_error: Optional[str],
+        primitives: bool = False,
     ) -> Tuple[str, str]:
         width, height, length = size
         palette_text = ", ".join(palette)
-        system_text = (
-            "You are a Minecraft build planner. "
-            "Return only a structured plan that matches the schema: "
-            "ops: list of { x:int, y:int, z:int, block:string }. "
-            "Respect bounds, palette, and max block constraints."
-        )
+        if primitives:
+            system_text = (
+                "You are a Minecraft build planner. "
+                "Return only a structured plan that matches the schema: primitives: list of shapes "
+                "(box, hollow_box, walls, plane, line with block and inclusive corners x1,y1,z1 to x2,y2,z2) "
+                "or transforms of an earlier named group (copy/repeat by dx,dy,dz and count, "
+                "mirror on axis around pivot). Later primitives overwrite earlier ones, so carve "
+                "doors and windows afterwards. Respect bounds, palette, and max block constraints."
+            )
+        else:
+            system_text = (
+                "You are a Minecraft build planner. "
+                "Return only a structured plan that matches the schema: "
+                "ops: list of { x:int, y:int, z:int, block:string }. "
+                "Respect bounds, palette, and max block constraints."
+            )
         error_hint = f"\nPrevious error: {last_error}" if last_error else ""
         user_text = (
             f"Build request: {prompt}\n"
@@ -203,49 +1319,243 @@ class Builder:
 
     def _validate_plan(
         self,
-        plan: List[BlockOp],
+        plan: Union[List[BlockOp], VoxelPlan, PrimitivePlan],
         size: Tuple[int, int, int],
         palette: List[str],
         max_blocks: int,
     ) -> Optional[str]:
+        if isinstance(plan, PrimitivePlan):
+            return plan.validate(size, palette, max_blocks)
+        if isinstance(plan, VoxelPlan):
+            return plan.validate(palette, max_blocks)
+
         if len(plan) > max_blocks:
             return f"Plan has too many ops ({len(plan)} > {max_blocks})."
 
-        width, height, length = size
         palette_set = set(palette)
         for idx, op in enumerate(plan):
-            if op.x < 0 or op.x >= width or op.y < 0 or op.y >= height or op.z < 0 or op.z >= length:
-                return f"Op {idx} out of bounds ({op.x},{op.y},{op.z})."
-            if op.block not in palette_set:
-                return f"Op {idx} uses disallowed block: {op.block}."
+            error = self._validate_op(idx, op, size, palette_set)
+            if error:
+                return error
+
+        return None
 
+    def _validate_op(
+        self,
+        idx: int,
+        op: BlockOp,
+        size: Tuple[int, int, int],
+        palette_set: set,
+    ) -> Optional[str]:
+        width, height, length = size
+        if op.x < 0 or op.x >= width or op.y < 0 or op.y >= height or op.z < 0 or op.z >= length:
+            return f"Op {idx} out of bounds ({op.x},{op.y},{op.z})."
+        if op.block not in palette_set:
+            return f"Op {idx} uses disallowed block: {op.block}."
         return None
 
+    def _prepare_commands(
+        self,
+        compiled: CompiledPlan,
+        bounds_min: Tuple[int, int, int],
+        move_agent: bool,
+    ):
+        """Orders commands for locality and plans moves; returns (commands, absolute boxes, moves)."""
+        base_x, base_y, base_z = bounds_min
+        plan_commands = order_for_locality(compiled.commands)
+        boxes = [
+            (
+                (base_x + cmd.min_corner[0], base_y + cmd.min_corner[1], base_z + cmd.min_corner[2]),
+                (base_x + cmd.max_corner[0], base_y + cmd.max_corner[1], base_z + cmd.max_corner[2]),
+            )
+            for cmd in plan_commands
+        ]
+        moves = plan_moves(boxes, reach=self.reach) if move_agent else [None] * len(boxes)
+        if move_agent:
+            teleports = sum(1 for move in moves if move is not None)
+            # Without reach planning every command was preceded by a move_to
+            log.info(
+                "Movement: %d teleports for %d commands covering %d ops",
+                teleports, len(boxes), compiled.ops_in,
+            )
+        return plan_commands, boxes, moves
+
     def _execute_plan(
         self,
-        plan: List[BlockOp],
+        compiled: CompiledPlan,
         bounds_min: Tuple[int, int, int],
         move_agent: bool,
-        verify: bool,
     ) -> None:
+        plan_commands, boxes, moves = self._prepare_commands(compiled, bounds_min, move_agent)
+        # Settle inventory once per block type for the whole plan, not per batch
+        previous_scope = self.client.set_inventory_ledger(self.ledger_scope) if self.ledger_scope else None
+        in_flight = deque()  # (future, slots) for batches awaiting a response
+        checked = 0
+        try:
+            for start in range(0, len(plan_commands), self.batch_size):
+                end = start + self.batch_size
+                commands, slots = self._encode_batch(plan_commands[start:end], boxes[start:end], moves[start:end])
+                in_flight.append((self.client.submit_batch(commands), slots))
+                if len(in_flight) >= self.pipeline_window:
+                    self._check_batch(*in_flight.popleft())
+                    checked += 1
+                    time.sleep(self._next_delay(checked))
+            while in_flight:
+                self._check_batch(*in_flight.popleft())
+        finally:
+            if previous_scope is not None:
+                self.client.set_inventory_ledger(previous_scope)  # Also settles the ledger
+
+    def _submit_plan(
+        self,
+        compiled: CompiledPlan,
+        bounds_min: Tuple[int, int, int],
+        move_agent: bool,
+    ) -> str:
+        """Sends the whole compiled plan to the listener as one build job; returns its id."""
+        plan_commands, boxes, moves = self._prepare_commands(compiled, bounds_min, move_agent)
+        commands, slots = self._encode_batch(plan_commands, boxes, moves)
+        job_id = self.client.submit_build(commands)
+        self._job_slots[job_id] = slots
+        self.last_job_id = job_id
+        log.info("Submitted build job %s (%d commands)", job_id, len(commands))
+        return job_id
+
+    def wait_for_job(self, job_id: Optional[str] = None, poll_seconds: float = 0.25) -> dict:
+        """
+        Waits for a build job submitted with async_submit (default: the last one)
+        and raises with op indices if any of its commands failed.
+        """
+        job_id = job_id or self.last_job_id
+        if job_id is None:
+            raise ValueError("No build job has been submitted")
+        status = self.client.wait_for_job(job_id, poll_seconds=poll_seconds)
+        slots = self._job_slots.pop(job_id, [])
+        by_slot = {place_slot: plan_cmd for plan_cmd, place_slot in slots}
+        failures = []
+        for index, reason in status["errors"]:
+            plan_cmd = by_slot.get(index)
+            if plan_cmd is None:
+                failures.append(f"Command {index}: {reason}")
+            else:
+                failures.append(
+                    f"{_describe_ops(plan_cmd.op_indices)}: failed to place {plan_cmd.block} "
+                    f"at {plan_cmd.min_corner}..{plan_cmd.max_corner}: {reason}"
+                )
+        if status["status"] != "done":
+            failures.append(f"Build job {job_id} {status['status']} at {status['done']}/{status['total']}")
+        if failures:
+            raise RuntimeError("\n".join(failures))
+        return status
+
+    def _next_delay(self, batches_checked: int) -> float:
+        """Wait before the next batch, adapted to listener latency and server TPS."""
+        if self.throttle is None:
+            return self.throttle_seconds
+        tps = None
+        if self.tps_sample_every and batches_checked % self.tps_sample_every == 0:
+            tps = self.client.get_tick_rate()
+        return self.throttle.record(self.client.last_round_trip("batch"), tps)
+
+    def throttle_stats(self) -> dict:
+        """Current send rate and its history, for dashboards."""
+        if self.throttle is None:
+            return {"rate": 1.0 / self.throttle_seconds if self.throttle_seconds else None,
+                    "delay": self.throttle_seconds, "history": []}
+        return self.throttle.snapshot()
+
+    def _encode_batch(self, chunk: List[PlanCommand], boxes, moves):
+        """Builds the listener sub-commands for a chunk and remembers which slot answers what."""
+        commands = []
+        slots = []  # (plan command, place slot) per command
+        for plan_cmd, ((x1, y1, z1), (x2, y2, z2)), move in zip(chunk, boxes, moves):
+            if move is not None:
+                commands.append(("move_to",) + move)
+            slots.append((plan_cmd, len(commands)))
+            if plan_cmd.volume == 1:
+                commands.append(("place_block", x1, y1, z1, plan_cmd.block))
+            else:
+                commands.append(("fill_region", x1, y1, z1, x2, y2, z2, plan_cmd.block))
+        return commands, slots
+
+    def _check_batch(self, future: Future, slots) -> None:
+        """Waits for a batch response and raises with op indices if anything failed."""
+        results = future.result()
+        failures = []
+        for plan_cmd, place_slot in slots:
+            placed = results[place_slot]
+            if placed.get("status") != "success" or not placed.get("result"):
+                reason = placed.get("error") or "listener reported failure"
+                failures.append(
+                    f"{_describe_ops(plan_cmd.op_indices)}: failed to place {plan_cmd.block} "
+                    f"at {plan_cmd.min_corner}..{plan_cmd.max_corner}: {reason}"
+                )
+        if failures:
+            raise RuntimeError("\n".join(failures))
+
+    def _diff_plan(
+        self,
+        plan: Union[List[BlockOp], PrimitivePlan],
+        existing: Dict[Tuple[int, int, int], str],
+        bounds_min: Tuple[int, int, int],
+        palette: List[str],
+    ) -> List[BlockOp]:
+        """
+        Returns only the ops needed to turn the existing region into the plan.
+        Cells the plan leaves empty are cleared to air only when they hold a
+        palette block, so terrain inside the bounds is not wiped.
+        """
         base_x, base_y, base_z = bounds_min
-        for op in plan:
-            x = base_x + op.x
-            y = base_y + op.y
-            z = base_z + op.z
-            if move_agent:
-                self.client.move_to(x, y + 2, z)
-                time.sleep(self.throttle_seconds)
-            success = self.client.place_block(x, y, z, op.block)
-            if not success:
-                raise RuntimeError(f"Failed to place {op.block} at ({x},{y},{z}).")
-            if verify:
-                found = self.client.get_block_at(x, y, z)
-                if found not in (op.block, f"minecraft:{op.block}"):
-                    raise RuntimeError(
-                        f"Verification failed at ({x},{y},{z}). Expected {op.block}, found {found}."
-                    )
-            time.sleep(self.throttle_seconds)
+        target: Dict[Tuple[int, int, int], str] = {}
+        for x, y, z, block in iter_cells(plan):
+            target[(x, y, z)] = block
+
+        palette_names = {block.split(":")[-1] for block in palette} - {"air"}
+        delta = []
+        for (x, y, z), found in existing.items():
+            rel = (x - base_x, y - base_y, z - base_z)
+            if rel not in target and found in palette_names:
+                delta.append(BlockOp(x=rel[0], y=rel[1], z=rel[2], block="minecraft:air"))
+        for (x, y, z), block in target.items():
+            found = existing.get((base_x + x, base_y + y, base_z + z), "air")
+            if found != block.split(":")[-1]:
+                delta.append(BlockOp(x=x, y=y, z=z, block=block))
+        return delta
+
+    def _verify_plan(
+        self,
+        plan: Union[List[BlockOp], VoxelPlan, PrimitivePlan],
+        bounds_min: Tuple[int, int, int],
+        repair: bool,
+    ) -> None:
+        """
+        Checks the whole plan with bulk reads. With repair, re-places only the
+        mismatched blocks and checks them once more before giving up.
+        """
+        base_x, base_y, base_z = bounds_min
+        expected = {}  # Absolute position -> (block, op index); last write wins
+        for idx, (x, y, z, block) in enumerate(iter_cells(plan)):
+            expected[(base_x + x, base_y + y, base_z + z)] = (block, idx)
+
+        cells = [pos + (block,) for pos, (block, _) in expected.items()]
+        mismatches = self.client.verify_region(bounds_min, cells)
+        if mismatches and repair:
+            log.info("Repairing %d mismatched blocks", len(mismatches))
+            results = self.client.execute_batch(
+                [("place_block", x, y, z, block) for x, y, z, block, _ in mismatches]
+            )
+            failed = [item.get("error") for item in results if item.get("status") != "success"]
+            if failed:
+                log.warning("%d repair placements failed: %s", len(failed), failed[0])
+            mismatches = self.client.verify_region(
+                bounds_min, [(x, y, z, block) for x, y, z, block, _ in mismatches]
+            )
+        if mismatches:
+            raise RuntimeError("\n".join(
+                f"Op {expected[(x, y, z)][1]}: verification failed at ({x},{y},{z}). "
+                f"Expected {block}, found {found}."
+                for x, y, z, block, found in mismatches
+            ))
 
     def _normalize_bounds(
         self,
@@ -0,0 +1,307 @@
+"""
+Resident builder: keeps a warmed Builder (compiled planning graph, chat models
+and an open listener connection) alive and serves build requests from local
+clients, so each build skips interpreter start, heavy imports and connecting.
+
+Requests are newline-delimited JSON over TCP, {"id", "method", "params": {...}},
+answered with {"id", "status": "success", "result"} or {"status": "error", "error"}.
+
+Usage:
+  python builder_daemon.py serve [--port 25562] [--listener-port 25560] [--model gpt-5.1]
+  python builder_daemon.py build "a small oak hut" --min 0 64 0 --max 6 68 6 --palette minecraft:oak_planks
+  python builder_daemon.py build ... --one-shot   (no daemon: plan and place in this process)
+  python builder_daemon.py stamp hut --origin 20 64 0 | rollback [build_id] | stats | ping | stop
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from metrics import get_logger
+
+log = get_logger("daemon")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 25562
+# Builder.build keywords a request may pass through
+BUILD_OPTIONS = (
+    "move_agent", "verify", "repair", "diff", "use_plan_cache", "purge_plan_cache",
+    "voxel", "hierarchical", "primitives", "async_submit", "snapshot",
+)
+
+
+class BuilderDaemon:
+    """
+    Serves requests against one long-lived Builder. Connections are read on
+    their own threads, but builds run one at a time since they share the
+    Builder's listener connection and throttle.
+    """
+    def __init__(
+        self,
+        builder=None,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        listener_host: str = "127.0.0.1",
+        listener_port: int = 25560,
+        **builder_kwargs: Any,
+    ):
+        if builder is None:
+            from builder import Builder
+            from minecraft_client import MinecraftClient
+            builder = Builder(MinecraftClient(host=listener_host, port=listener_port), **builder_kwargs)
+        self.builder = builder
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._server: Optional[socket.socket] = None
+        self._stopped = threading.Event()
+        self.started = time.time()
+
+    def serve_forever(self, warm_up: bool = True) -> None:
+        if warm_up:
+            log.info("Warmed up in %.2fs", self.builder.warm_up())
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen(8)
+        log.info("Builder daemon listening on %s:%s", self.host, self.port)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    conn, addr = self._server.accept()
+                except OSError:
+                    break  # Closed by stop()
+                threading.Thread(target=self._serve_connection, args=(conn, addr), daemon=True).start()
+        finally:
+            self._server.close()
+            self.builder.client.close()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._server is not None:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+
+    def _serve_connection(self, conn: socket.socket, addr) -> None:
+        with conn, conn.makefile("rwb") as stream:
+            for line in stream:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    request = {}
+                    response = {"status": "error", "error": f"Invalid JSON: {e}"}
+                else:
+                    if isinstance(request, dict):
+                        response = self.execute(request)
+                    else:
+                        request = {}
+                        response = {"status": "error", "error": "Invalid request: expected a JSON object"}
+                stream.write(json.dumps(response).encode('utf-8') + b"\n")
+                stream.flush()
+                if request.get("method") == "shutdown":
+                    self.stop()
+                    return
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs one request and builds its response."""
+        try:
+            response = {"status": "success", "result": self.handle(request.get("method"), request.get("params") or {})}
+        except Exception as e:
+            log.warning("Request %s failed: %s", request.get("method"), e)
+            response = {"status": "error", "error": str(e)}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def handle(self, method: str, params: Dict[str, Any]) -> Any:
+        builder = self.builder
+        if method == "ping":
+            return {"pong": True, "uptime": time.time() - self.started}
+
+        elif method == "build":
+            options = params.get("options") or {}
+            unknown = set(options) - set(BUILD_OPTIONS)
+            if unknown:
+                raise ValueError(f"Unsupported build options: {', '.join(sorted(unknown))}")
+            with self._lock:
+                started = time.perf_counter()
+                plan = builder.build(
+                    params["prompt"], tuple(params["bounds_min"]), tuple(params["bounds_max"]), params["palette"],
+                    **options
+                )
+                compiled = builder.last_compiled
+                return {
+                    "blocks": len(plan),
+                    "commands": compiled.commands_out if compiled is not None else None,
+                    "build_id": builder.last_build_id if options.get("snapshot") else None,
+                    "job_id": builder.last_job_id if options.get("async_submit") else None,
+                    "seconds": time.perf_counter() - started,
+                }
+
+        elif method == "register_template":
+            with self._lock:
+                template = builder.register_template(params["name"])
+            return {"name": template.name, "blocks": len(template.cells)}
+
+        elif method == "stamp":
+            with self._lock:
+                return builder.stamp(
+                    params["name"],
+                    tuple(params["origin"]),
+                    rotation=params.get("rotation", 0),
+                    mirror=params.get("mirror"),
+                    check_source=params.get("check_source", True),
+                )
+
+        elif method == "rollback":
+            with self._lock:
+                compiled = builder.rollback(params.get("build_id"))
+            return {"commands": compiled.commands_out}
+
+        elif method == "stats":
+            return builder.stats()
+
+        elif method == "shutdown":
+            return True
+
+        else:
+            raise ValueError(f"Unknown method: {method}")
+
+
+class DaemonClient:
+    """Blocking client for a running BuilderDaemon."""
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, timeout: Optional[float] = None):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._stream = self._sock.makefile("rwb")
+        self._next_id = 0
+
+    def request(self, method: str, **params: Any) -> Any:
+        self._next_id += 1
+        message = {"id": self._next_id, "method": method, "params": params}
+        self._stream.write(json.dumps(message).encode('utf-8') + b"\n")
+        self._stream.flush()
+        line = self._stream.readline()
+        if not line:
+            raise ConnectionError("Builder daemon closed the connection")
+        response = json.loads(line)
+        if response.get("status") != "success":
+            raise RuntimeError(response.get("error") or "Builder daemon reported failure")
+        return response.get("result")
+
+    def close(self) -> None:
+        self._stream.close()
+        self._sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _build_options(args) -> Dict[str, Any]:
+    options = {"move_agent": not args.no_move}
+    for name in ("verify", "repair", "diff", "voxel", "hierarchical", "primitives", "snapshot"):
+        if getattr(args, name):
+            options[name] = True
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived builder daemon and its command-line client")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the daemon")
+    serve.add_argument("--listener-host", default="127.0.0.1")
+    serve.add_argument("--listener-port", type=int, default=25560)
+    serve.add_argument("--model", default="gpt-5.1")
+    serve.add_argument("--max-blocks", type=int, default=600)
+
+    build = commands.add_parser("build", help="Plan and place a structure")
+    build.add_argument("prompt")
+    build.add_argument("--min", type=int, nargs=3, required=True, metavar=("X", "Y", "Z"))
+    build.add_argument("--max", type=int, nargs=3, required=True, metavar=("X", "Y", "Z"))
+    build.add_argument("--palette", required=True, help="Comma-separated block ids")
+    build.add_argument("--no-move", action="store_true", help="Do not teleport the agent while placing")
+    for flag in ("verify", "repair", "diff", "voxel", "hierarchical", "primitives", "snapshot"):
+        build.add_argument(f"--{flag}", action="store_true")
+    build.add_argument("--one-shot", action="store_true", help="Build in this process instead of the daemon")
+    build.add_argument("--listener-port", type=int, default=25560, help="Listener port for --one-shot")
+
+    stamp = commands.add_parser("stamp", help="Copy a registered template")
+    stamp.add_argument("name")
+    stamp.add_argument("--origin", type=int, nargs=3, required=True, metavar=("X", "Y", "Z"))
+    stamp.add_argument("--rotation", type=int, default=0, choices=(0, 90, 180, 270))
+    stamp.add_argument("--mirror", choices=("x", "z"))
+
+    register = commands.add_parser("register", help="Save the daemon's last build as a template")
+    register.add_argument("name")
+
+    rollback = commands.add_parser("rollback", help="Restore the region of a snapshot build")
+    rollback.add_argument("build_id", nargs="?")
+
+    for name in ("stats", "ping", "stop"):
+        commands.add_parser(name)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        daemon = BuilderDaemon(
+            host=args.host,
+            port=args.port,
+            listener_host=args.listener_host,
+            listener_port=args.listener_port,
+            model=args.model,
+            max_blocks=args.max_blocks,
+        )
+        daemon.serve_forever()
+        return
+
+    started = time.perf_counter()
+    if args.command == "build" and args.one_shot:
+        from builder import Builder
+        from minecraft_client import MinecraftClient
+        client = MinecraftClient(port=args.listener_port)
+        try:
+            plan = Builder(client).build(
+                args.prompt, tuple(args.min), tuple(args.max), args.palette.split(","), **_build_options(args)
+            )
+        finally:
+            client.close()
+        print(json.dumps({"blocks": len(plan), "seconds": time.perf_counter() - started}))
+        return
+
+    with DaemonClient(args.host, args.port) as client:
+        if args.command == "build":
+            result = client.request(
+                "build",
+                prompt=args.prompt,
+                bounds_min=args.min,
+                bounds_max=args.max,
+                palette=args.palette.split(","),
+                options=_build_options(args),
+            )
+        elif args.command == "stamp":
+            result = client.request("stamp", name=args.name, origin=args.origin,
+                                    rotation=args.rotation, mirror=args.mirror)
+        elif args.command == "register":
+            result = client.request("register_template", name=args.name)
+        elif args.command == "rollback":
+            result = client.request("rollback", build_id=args.build_id)
+        elif args.command == "stop":
+            result = client.request("shutdown")
+        else:
+            result = client.request(args.command)
+    print(json.dumps(result, indent=2 if args.command == "stats" else None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+from plan_compiler import PlanCommand
+
+Position = Tuple[float, float, float]
+
+# Blocks that pop off or fail to place unless a neighbouring block already exists.
+# Within a layer they are placed after everything else.
+NEEDS_SUPPORT = (
+    "_door",
+    "torch",
+    "_button",
+    "lever",
+    "ladder",
+    "_sign",
+    "_carpet",
+    "_pressure_plate",
+    "rail",
+    "_banner",
+    "flower_pot",
+    "lantern",
+    "vine",
+)
+
+DEFAULT_REACH = 4.5  # Survival-mode block interaction range
+
+
+def needs_support(block: str) -> bool:
+    name = block.split(":")[-1]
+    return any(marker in name for marker in NEEDS_SUPPORT)
+
+
+def hilbert_index(x: int, z: int, order: int) -> int:
+    """Position of (x, z) along a Hilbert curve covering an order x order grid (order is a power of two)."""
+    index = 0
+    s = order // 2
+    while s > 0:
+        rx = 1 if x & s else 0
+        rz = 1 if z & s else 0
+        index += s * s * ((3 * rx) ^ rz)
+        # Rotate the quadrant so the curve stays continuous
+        if rz == 0:
+            if rx == 1:
+                x = order - 1 - x
+                z = order - 1 - z
+            x, z = z, x
+        s //= 2
+    return index
+
+
+def order_for_locality(commands: Sequence[PlanCommand]) -> List[PlanCommand]:
+    """
+    Orders commands bottom-up, layer by layer, following a Hilbert curve within
+    each layer; blocks that need support go last in their layer.
+    """
+    if not commands:
+        return []
+    extent = max(max(cmd.min_corner[0], cmd.min_corner[2]) for cmd in commands) + 1
+    order = 1
+    while order < extent:
+        order *= 2
+    return sorted(
+        commands,
+        key=lambda cmd: (
+            cmd.min_corner[1],
+            needs_support(cmd.block),
+            hilbert_index(max(0, cmd.min_corner[0]), max(0, cmd.min_corner[2]), order),
+        ),
+    )
+
+
+def _distance_to_box(pos: Position, box_min: Tuple[int, int, int], box_max: Tuple[int, int, int]) -> float:
+    # Block at (x, y, z) spans [x, x + 1) on each axis
+    total = 0.0
+    for axis in range(3):
+        low, high = box_min[axis], box_max[axis] + 1
+        if pos[axis] < low:
+            total += (low - pos[axis]) ** 2
+        elif pos[axis] > high:
+            total += (pos[axis] - high) ** 2
+    return math.sqrt(total)
+
+
+def plan_moves(
+    boxes: Sequence[Tuple[Tuple[int, int, int], Tuple[int, int, int]]],
+    reach: float = DEFAULT_REACH,
+    start: Optional[Position] = None,
+) -> List[Optional[Position]]:
+    """
+    Decides where the agent teleports before each (min, max) absolute box.
+    Returns one entry per box: a target position, or None when the box is
+    still within reach of where the agent already stands.
+    """
+    moves: List[Optional[Position]] = []
+    current = start
+    for box_min, box_max in boxes:
+        if current is not None and _distance_to_box(current, box_min, box_max) <= reach:
+            moves.append(None)
+            continue
+        # Stand two blocks above the top of the box, like a single placement
+        current = (box_min[0], box_max[1] + 2, box_min[2])
+        moves.append(current)
+    return moves
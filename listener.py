@@ -1,24 +1,83 @@
+import os
+import re
 import sys
 import socket
 import json
+import time
+import logging
+import threading
 import traceback
+from collections import deque
+import wire_protocol
+from metrics import Metrics, get_logger
 
 # This script is meant to be run inside Minecraft via MineScript.
 # Usage in-game: \listener 
 # (or setup automated running in config.txt with autorun[*]=listener)
 
+log = get_logger("listener")
+
 try:
     import minescript
-    print("MineScript imported successfully.")
+    log.info("MineScript imported successfully.")
 except ImportError:
-    print("Error: MineScript module not found. This script must be run within Minecraft using MineScript.")
+    log.error("Error: MineScript module not found. This script must be run within Minecraft using MineScript.")
     sys.exit(1)
 
 HOST = '127.0.0.1'
 PORT = 25560  # Custom port for our listener
+MAX_PENDING_CONNECTIONS = 16
+FILL_VOLUME_LIMIT = 32768  # Default commandModificationBlockLimit for /fill
+READ_VOLUME_LIMIT = 262144  # Max blocks returned by one read_region call
+GIVE_LIMIT = 6400  # Most items one /give may hand out
+TICK_SECONDS = 0.05  # One server tick at 20 TPS
+JOB_COMMANDS_PER_TICK = 64  # Default build job commands run per tick
+JOB_CHECKPOINT_EVERY = 256  # Job commands between checkpoints written to disk
+JOB_DIR = ".build_jobs"  # Checkpoints of unfinished build jobs
+JOB_METHODS = ("move_to", "place_block", "fill_region")  # Commands a build job may contain
+JOB_HISTORY = 256  # Finished jobs whose status is kept after their commands are dropped
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")  # Job ids become file names in JOB_DIR
+
+TICK_RATE_WINDOW = 1.0  # Minimum seconds between tick rate readings
+metrics = Metrics()  # Served by the stats method
+
+_inventory_cache = None  # Normalized inventory, valid until the next give/clear
+
+def game_execute(command):
+    """Runs a game command through minescript.execute and records how long it took."""
+    global _inventory_cache
+    if command.startswith(("give ", "clear ")):
+        _inventory_cache = None
+    started = time.perf_counter()
+    minescript.execute(command)
+    metrics.observe("minescript_execute_seconds", time.perf_counter() - started, command=command.split(" ", 1)[0])
+
+class TickRateSampler:
+    """
+    Ticks per second over windows of at least TICK_RATE_WINDOW seconds. Calls
+    inside a window return the last full reading, since a rate taken over a
+    few ticks swings far from the real TPS. None until a window has passed.
+    """
+    def __init__(self, window=TICK_RATE_WINDOW):
+        self.window = window
+        self.rate = None
+        self._start = None  # (monotonic seconds, game ticks) where the current window began
+
+    def sample(self):
+        now = time.monotonic()
+        ticks = minescript.world_info().game_ticks
+        if self._start is None:
+            self._start = (now, ticks)
+        elif now - self._start[0] >= self.window:
+            self.rate = (ticks - self._start[1]) / (now - self._start[0])
+            self._start = (now, ticks)
+        return self.rate
 
 def get_inventory_dict():
-    """Helper to get inventory as a dictionary."""
+    """Helper to get inventory as a dictionary; cached until a command changes it."""
+    global _inventory_cache
+    if _inventory_cache is not None:
+        return dict(_inventory_cache)
     inv_dict = {}
     try:
         for stack in minescript.player_inventory():
@@ -28,13 +87,60 @@ def get_inventory_dict():
             count = getattr(stack, 'count', 1)
             inv_dict[item_name] = inv_dict.get(item_name, 0) + count
     except Exception as e:
-        print(f"Error reading inventory: {e}")
-    return inv_dict
+        log.warning("Error reading inventory: %s", e)
+        return inv_dict
+    _inventory_cache = inv_dict
+    return dict(inv_dict)
+
+class InventoryLedger:
+    """
+    Tracks blocks placed without the per-block give/clear pair and settles them
+    with one give/clear per block type. scope decides when: "command" after
+    every placement (the old behaviour), "batch" at the end of each batch (a
+    lone place_block still settles at once), "build" only on reconcile_inventory.
+    Every client session has its own ledger, so one client's scope never
+    changes another's; build jobs use default_ledger.
+    """
+    SCOPES = ("command", "batch", "build")
+
+    def __init__(self, scope="batch"):
+        self.scope = scope
+        self.pending = {}  # Full block id -> placements not yet settled
+        self.in_batch = False
+
+    def record(self, block_id, count=1):
+        self.pending[block_id] = self.pending.get(block_id, 0) + count
+        if self.scope == "command" or (self.scope == "batch" and not self.in_batch):
+            self.settle()
+
+    def settle(self):
+        """Runs the deferred give/clear pairs; returns {block: count} settled."""
+        settled, self.pending = self.pending, {}
+        for block_id, count in settled.items():
+            for start in range(0, count, GIVE_LIMIT):
+                amount = min(GIVE_LIMIT, count - start)
+                game_execute(f"give @p {block_id} {amount}")
+                game_execute(f"clear @p {block_id} {amount}")
+        return settled
+
+default_ledger = InventoryLedger()
+default_tick_rate = TickRateSampler()  # For commands run without a client session
+
+def settle_all_ledgers():
+    """Settles every session's deferred placements, e.g. before reading the inventory."""
+    default_ledger.settle()
+    for session_ledger in executor.ledgers():
+        session_ledger.settle()
+
+def simple_block_name(block_id):
+    """Strips the minecraft: namespace and any [state] suffix from a block id."""
+    return block_id.split("[", 1)[0].split(":")[-1]
 
-def handle_command(cmd_data):
-    """Executes the command and returns the result."""
+def handle_command(cmd_data, session=None):
+    """Executes the command and returns the result; placements go on the session's ledger."""
     method = cmd_data.get("method")
     params = cmd_data.get("params", [])
+    ledger = session.ledger if session is not None else default_ledger
     
     if method == "get_position":
         pos = minescript.player_position()
@@ -44,7 +150,7 @@ def handle_command(cmd_data):
 
     elif method == "move_to":
         x, y, z = params
-        minescript.execute(f"tp {x} {y} {z}")
+        game_execute(f"tp {x} {y} {z}")
         return None
 
     elif method == "get_block_at":
@@ -54,9 +160,69 @@ def handle_command(cmd_data):
             return block_id.split(":")[1]
         return block_id
 
+    elif method == "verify_region":
+        # params: origin [x, y, z], block palette, flat [dx, dy, dz, palette_index, ...]
+        origin, palette, cells = params
+        if len(cells) > 4 * READ_VOLUME_LIMIT:
+            raise ValueError(f"Verify of {len(cells) // 4} blocks exceeds limit {READ_VOLUME_LIMIT}")
+        ox, oy, oz = origin
+        positions = []
+        expected = []
+        for i in range(0, len(cells), 4):
+            dx, dy, dz, palette_index = cells[i:i + 4]
+            positions.append([ox + dx, oy + dy, oz + dz])
+            expected.append(palette[palette_index])
+        mismatches = []
+        for pos, want, found in zip(positions, expected, minescript.getblocklist(positions)):
+            found_name = simple_block_name(found)
+            if found_name != simple_block_name(want):
+                mismatches.append(pos + [want, found_name])
+        return mismatches
+
+    elif method == "read_region":
+        # Returns every block in the box as a palette plus one index per cell,
+        # ordered by y, then z, then x (x varies fastest). An optional seventh
+        # param keeps full ids with their [state] suffix, e.g. for snapshots.
+        x1, y1, z1, x2, y2, z2 = params[:6]
+        full_state = len(params) > 6 and bool(params[6])
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        z1, z2 = sorted((z1, z2))
+        volume = (x2 - x1 + 1) * (y2 - y1 + 1) * (z2 - z1 + 1)
+        if volume > READ_VOLUME_LIMIT:
+            raise ValueError(f"Read volume {volume} exceeds limit {READ_VOLUME_LIMIT}")
+        positions = [
+            [x, y, z]
+            for y in range(y1, y2 + 1)
+            for z in range(z1, z2 + 1)
+            for x in range(x1, x2 + 1)
+        ]
+        palette = {}
+        indices = []
+        for found in minescript.getblocklist(positions):
+            if full_state:
+                name = found if ":" in found.split("[", 1)[0] else f"minecraft:{found}"
+            else:
+                name = simple_block_name(found)
+            indices.append(palette.setdefault(name, len(palette)))
+        return {"palette": list(palette), "blocks": indices}
+
     elif method == "get_inventory":
+        settle_all_ledgers()
         return get_inventory_dict()
 
+    elif method == "inventory_ledger":
+        # Switches when deferred placements are settled; returns the previous scope
+        scope = params[0]
+        if scope not in InventoryLedger.SCOPES:
+            raise ValueError(f"Unknown ledger scope: {scope}")
+        ledger.settle()
+        previous, ledger.scope = ledger.scope, scope
+        return previous
+
+    elif method == "reconcile_inventory":
+        return ledger.settle()
+
     elif method == "place_block":
         x, y, z, block_type = params
         # Normalize block_type
@@ -66,76 +232,573 @@ def handle_command(cmd_data):
             simple_type = block_type
 
         full_block_name = f"minecraft:{simple_type}"
-        # Ensure the player has the block for this placement.
-        minescript.execute(f"give @p {full_block_name} 1")
-        minescript.execute(f"setblock {x} {y} {z} {full_block_name}")
-        minescript.execute(f"clear @p {full_block_name} 1")
+        game_execute(f"setblock {x} {y} {z} {full_block_name}")
+        if simple_type != "air":
+            # Clearing a block consumes nothing; anything else goes on the ledger
+            # as its item id, without any [state] suffix.
+            ledger.record(f"minecraft:{simple_block_name(block_type)}")
+        return True
+
+    elif method == "fill_region":
+        x1, y1, z1, x2, y2, z2, block_type = params
+        volume = (abs(x2 - x1) + 1) * (abs(y2 - y1) + 1) * (abs(z2 - z1) + 1)
+        if volume > FILL_VOLUME_LIMIT:
+            raise ValueError(f"Fill volume {volume} exceeds limit {FILL_VOLUME_LIMIT}")
+        if block_type.startswith("minecraft:"):
+            simple_type = block_type.split(":")[1]
+        else:
+            simple_type = block_type
+        game_execute(f"fill {x1} {y1} {z1} {x2} {y2} {z2} minecraft:{simple_type}")
+        if simple_type != "air":
+            # Every filled block counts as one placement, as if placed one by one
+            ledger.record(f"minecraft:{simple_block_name(block_type)}", volume)
+        return True
+
+    elif method == "clone_region":
+        # Copies a box so its min corner lands on the destination; "masked" skips air
+        x1, y1, z1, x2, y2, z2, dx, dy, dz = params[:9]
+        mode = params[9] if len(params) > 9 else "replace"
+        if mode not in ("replace", "masked"):
+            raise ValueError(f"Unknown clone mode: {mode}")
+        volume = (abs(x2 - x1) + 1) * (abs(y2 - y1) + 1) * (abs(z2 - z1) + 1)
+        if volume > FILL_VOLUME_LIMIT:
+            raise ValueError(f"Clone volume {volume} exceeds limit {FILL_VOLUME_LIMIT}")
+        game_execute(f"clone {x1} {y1} {z1} {x2} {y2} {z2} {dx} {dy} {dz} {mode}")
         return True
 
     elif method == "set_inventory":
         block_type, count = params
-        minescript.execute(f"clear @p {block_type}")
+        settle_all_ledgers()
+        game_execute(f"clear @p {block_type}")
         if count > 0:
-            minescript.execute(f"give @p {block_type} {count}")
+            game_execute(f"give @p {block_type} {count}")
         return None
     
+    elif method == "batch":
+        # Runs each sub-command in order and reports per-item results so one
+        # failure does not abort the rest of the batch.
+        commands = params[0] if params else []
+        results = []
+        ledger.in_batch = True
+        try:
+            for sub_cmd in commands:
+                try:
+                    if sub_cmd.get("method") == "batch":
+                        raise ValueError("Nested batch commands are not allowed")
+                    results.append({"status": "success", "result": timed_command(sub_cmd, session)})
+                except Exception as e:
+                    results.append({"status": "error", "error": str(e)})
+        finally:
+            ledger.in_batch = False
+        if ledger.scope == "batch":
+            ledger.settle()
+        return results
+
+    elif method == "stats":
+        return metrics.snapshot()
+
+    elif method == "submit_build":
+        # params: job id chosen by the client, [{method, params}, ...], optional {"commands_per_tick": n}
+        job_id, commands = params[0], params[1]
+        options = params[2] if len(params) > 2 and params[2] else {}
+        return jobs.submit(job_id, commands, options.get("commands_per_tick"))
+
+    elif method == "job_status":
+        return jobs.status(params[0] if params else None)
+
+    elif method == "cancel_job":
+        return jobs.cancel(params[0])
+
+    elif method == "resume_job":
+        return jobs.resume(params[0])
+
+    elif method == "tick_rate":
+        return (session.tick_rate if session is not None else default_tick_rate).sample()
+
+    elif method == "queue_depths":
+        return executor.queue_depths()
+
     elif method == "ping":
         return "pong"
 
     else:
         raise ValueError(f"Unknown method: {method}")
 
+def timed_command(cmd_data, session=None):
+    """handle_command plus per-method latency and success/error counters."""
+    method = cmd_data.get("method")
+    started = time.perf_counter()
+    status = "error"
+    try:
+        result = handle_command(cmd_data, session)
+        status = "success"
+        return result
+    finally:
+        metrics.observe("command_seconds", time.perf_counter() - started, method=method)
+        metrics.inc("commands_total", method=method, status=status)
+
+class BuildJob:
+    """A whole compiled plan executed by the listener, with a resumable checkpoint."""
+    FINISHED = ("done", "cancelled")
+
+    def __init__(self, job_id, commands, commands_per_tick, next_index=0, status="queued", errors=None):
+        self.id = job_id
+        self.commands = commands  # None once done or cancelled
+        self.total = len(commands)
+        self.commands_per_tick = commands_per_tick
+        self.next_index = next_index  # Checkpoint: first command not yet run
+        self.status = status  # queued, running, paused, done or cancelled
+        self.errors = errors or []  # [command index, message] for failed commands
+        self.started = None
+        self.finished = None
+
+    def summary(self):
+        elapsed = None
+        if self.started is not None:
+            elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "id": self.id,
+            "status": self.status,
+            "done": self.next_index,
+            "total": self.total,
+            "errors": self.errors[:100],
+            "error_count": len(self.errors),
+            "elapsed": elapsed,
+        }
+
+
+class JobRunner:
+    """
+    Runs build jobs one at a time on the executor thread, at most
+    commands_per_tick job commands per server tick so connected clients still
+    get served in between. Unfinished jobs are checkpointed to JOB_DIR and come
+    back paused after a listener restart, to be continued with resume_job.
+    Done and cancelled jobs lose their checkpoint and keep only a status record.
+    """
+    def __init__(self, directory=JOB_DIR, history=JOB_HISTORY):
+        self.directory = directory
+        self.history = history
+        self.jobs = {}
+        self.finished = deque()  # Ids of done or cancelled jobs, oldest first, evicted beyond history
+        self.order = deque()  # Ids of queued or running jobs, oldest first
+        self._window_start = 0.0
+        self._window_used = 0
+
+    def _path(self, job_id, suffix):
+        if not isinstance(job_id, str) or not JOB_ID_PATTERN.match(job_id):
+            raise ValueError(f"Invalid build job id: {job_id!r}")
+        return os.path.join(self.directory, f"{job_id}.{suffix}.json")
+
+    def _remove(self, job_id):
+        for suffix in ("commands", "state"):
+            try:
+                os.remove(self._path(job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _finish(self, job):
+        """Frees a done or cancelled job's commands; only a bounded number of their records stay."""
+        job.commands = None
+        self.finished.append(job.id)
+        while len(self.finished) > self.history:
+            self.jobs.pop(self.finished.popleft(), None)
+
+    def _write(self, path, data):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path + ".tmp", "w", encoding='utf-8') as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    def _checkpoint(self, job):
+        if job.status in BuildJob.FINISHED:
+            self._remove(job.id)
+            return
+        self._write(self._path(job.id, "state"), {
+            "status": job.status,
+            "next_index": job.next_index,
+            "commands_per_tick": job.commands_per_tick,
+            "errors": job.errors[:100],
+        })
+
+    def load(self):
+        """Restores checkpointed jobs; anything that was still running comes back paused."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith(".state.json"):
+                continue
+            job_id = name[:-len(".state.json")]
+            try:
+                with open(self._path(job_id, "state"), encoding='utf-8') as f:
+                    state = json.load(f)
+                if state["status"] == "cancelled":
+                    self._remove(job_id)  # Left behind by older listeners, which kept cancelled jobs
+                    continue
+                with open(self._path(job_id, "commands"), encoding='utf-8') as f:
+                    commands = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning("Skipping build job %s: %s", job_id, e)
+                continue
+            self.jobs[job_id] = BuildJob(
+                job_id, commands, state["commands_per_tick"], state["next_index"], "paused", state["errors"]
+            )
+            log.info("Restored build job %s (%s/%s) as paused", job_id, state["next_index"], len(commands))
+
+    def submit(self, job_id, commands, commands_per_tick=None):
+        """Queues a job. Idempotent: resubmitting a known id only reports its status."""
+        self._path(job_id, "state")  # Rejects ids that are not safe file names
+        if job_id in self.jobs:
+            return self.jobs[job_id].summary()
+        for idx, command in enumerate(commands):
+            if command.get("method") not in JOB_METHODS:
+                raise ValueError(f"Command {idx}: {command.get('method')} is not allowed in a build job")
+        job = BuildJob(job_id, commands, commands_per_tick or JOB_COMMANDS_PER_TICK)
+        self.jobs[job_id] = job
+        self._write(self._path(job_id, "commands"), commands)
+        self._checkpoint(job)
+        self.order.append(job_id)
+        metrics.inc("jobs_total", status="submitted")
+        return job.summary()
+
+    def status(self, job_id=None):
+        if job_id is None:
+            return [job.summary() for job in self.jobs.values()]
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown build job: {job_id}")
+        return job.summary()
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown build job: {job_id}")
+        if job.status not in BuildJob.FINISHED:
+            job.status = "cancelled"
+            job.finished = time.monotonic()
+            if job_id in self.order:
+                self.order.remove(job_id)
+            self._checkpoint(job)
+            self._finish(job)
+            metrics.inc("jobs_total", status="cancelled")
+        return job.summary()
+
+    def resume(self, job_id):
+        """Continues a paused job from its checkpoint."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown build job: {job_id}")
+        if job.status == "cancelled":
+            raise ValueError(f"Build job {job_id} was cancelled and cannot be resumed")
+        if job.status == "paused":
+            job.status = "queued"
+            job.finished = None
+            self.order.append(job_id)
+            self._checkpoint(job)
+        return job.summary()
+
+    def _budget_left(self, job):
+        now = time.monotonic()
+        if now - self._window_start >= TICK_SECONDS:
+            self._window_start, self._window_used = now, 0
+        return job.commands_per_tick - self._window_used
+
+    def wait_seconds(self):
+        """0 if a job can run now, seconds until the next tick if over budget, None if idle."""
+        if not self.order:
+            return None
+        if self._budget_left(self.jobs[self.order[0]]) > 0:
+            return 0
+        return max(0.0, self._window_start + TICK_SECONDS - time.monotonic())
+
+    def run_slice(self):
+        """Runs the current job until this tick's budget is used up or the job ends."""
+        if not self.order:
+            return
+        job = self.jobs[self.order[0]]
+        if job.started is None:
+            job.started = time.monotonic()
+        job.status = "running"
+        budget = self._budget_left(job)
+        ran = 0
+        default_ledger.in_batch = True
+        try:
+            while ran < budget and job.next_index < job.total:
+                command = job.commands[job.next_index]
+                try:
+                    timed_command(command)
+                except Exception as e:
+                    job.errors.append([job.next_index, str(e)])
+                job.next_index += 1
+                self._window_used += 1
+                ran += 1
+                if job.next_index % JOB_CHECKPOINT_EVERY == 0:
+                    self._checkpoint(job)
+        finally:
+            default_ledger.in_batch = False
+        if default_ledger.scope == "batch":
+            default_ledger.settle()
+        metrics.inc("job_commands_total", ran)
+        if job.next_index >= job.total:
+            job.status = "done"
+            job.finished = time.monotonic()
+            self.order.popleft()
+            self._checkpoint(job)
+            self._finish(job)
+            metrics.inc("jobs_total", status="done")
+            log.info("Build job %s done in %.2fs", job.id, job.finished - job.started)
+
+    def pause_current(self, reason):
+        """Takes the current job out of the queue after an unexpected error."""
+        if not self.order:
+            return
+        job = self.jobs[self.order.popleft()]
+        job.status = "paused"
+        job.errors.append([job.next_index, reason])
+        log.error("Build job %s paused: %s", job.id, reason)
+
+jobs = JobRunner()
+
+
+class ClientSession:
+    """One connected client and the commands it has queued for the executor."""
+    def __init__(self, conn, addr):
+        self.conn = conn
+        self.addr = addr
+        self.name = f"{addr[0]}:{addr[1]}"
+        self.pending = deque()
+        self.closed = False
+        self.protocol = wire_protocol.PROTOCOL_JSON
+        self.decoder = wire_protocol.BinaryDecoder()
+        self.ledger = InventoryLedger()
+        self.tick_rate = TickRateSampler()
+        self._send_lock = threading.Lock()
+
+    def send(self, response, method=None):
+        if self.protocol == wire_protocol.PROTOCOL_BINARY:
+            data = wire_protocol.encode_response(response, method)
+        else:
+            data = (json.dumps(response) + "\n").encode('utf-8')
+        with self._send_lock:
+            self.conn.sendall(data)
+        metrics.inc("bytes_sent_total", len(data))
+
+
+class CommandExecutor:
+    """
+    Runs every game command on a single thread, in arrival order per client and
+    round-robin across clients and the build job runner, so connected agents
+    never race on game state.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._sessions = []
+        self._next_index = 0
+        self._closing = deque()  # Disconnected sessions whose ledgers still need settling
+
+    def add_session(self, session):
+        with self._cond:
+            self._sessions.append(session)
+
+    def remove_session(self, session):
+        with self._cond:
+            session.closed = True
+            # Responses can no longer be delivered, so drop anything still queued.
+            session.pending.clear()
+            if session in self._sessions:
+                idx = self._sessions.index(session)
+                self._sessions.pop(idx)
+                if idx < self._next_index:
+                    self._next_index -= 1
+            self._closing.append(session)
+            self._cond.notify()
+
+    def submit(self, session, cmd_data):
+        with self._cond:
+            if session.closed:
+                return
+            session.pending.append((time.perf_counter(), cmd_data))
+            self._cond.notify()
+
+    def queue_depths(self):
+        """Returns {client: queued command count} for every connected client."""
+        with self._cond:
+            return {session.name: len(session.pending) for session in self._sessions}
+
+    def ledgers(self):
+        with self._cond:
+            return [session.ledger for session in self._sessions]
+
+    def _next_command(self):
+        """
+        Next (session, command), (session, None) for a disconnected session to
+        settle, or None when a build job slice should run instead.
+        """
+        with self._cond:
+            while True:
+                if self._closing:
+                    return self._closing.popleft(), None
+                # The slot after the last session belongs to the build job runner, so
+                # jobs get a slice every cycle even while clients keep sending commands.
+                count = len(self._sessions)
+                slots = count + 1
+                for step in range(slots):
+                    idx = (self._next_index + step) % slots
+                    if idx == count:
+                        if jobs.wait_seconds() == 0:
+                            self._next_index = 0
+                            return None
+                        continue
+                    session = self._sessions[idx]
+                    if session.pending:
+                        self._next_index = (idx + 1) % slots
+                        queued_at, cmd_data = session.pending.popleft()
+                        metrics.observe("queue_wait_seconds", time.perf_counter() - queued_at)
+                        return session, cmd_data
+                wait = jobs.wait_seconds()
+                if wait != 0:
+                    self._cond.wait(wait)
+
+    def run_forever(self):
+        while True:
+            item = self._next_command()
+            if item is None:
+                try:
+                    jobs.run_slice()
+                except Exception as e:
+                    jobs.pause_current(str(e))
+                continue
+            session, cmd_data = item
+            if cmd_data is None:
+                session.ledger.settle()
+                continue
+            response = execute_message(cmd_data, session)
+            try:
+                session.send(response, cmd_data.get("method"))
+            except OSError as e:
+                log.warning("Could not reply to %s: %s", session.name, e)
+
+
+executor = CommandExecutor()
+
+
+def execute_message(cmd_data, session=None):
+    """Runs one decoded message and builds its response."""
+    try:
+        log.debug("Executing: %s", cmd_data.get("method"))
+        result = timed_command(cmd_data, session)
+        response = {"status": "success", "result": result}
+    except Exception as e:
+        log.warning("Command %s failed: %s", cmd_data.get("method"), e)
+        if log.isEnabledFor(logging.DEBUG):
+            traceback.print_exc()
+        response = {"status": "error", "error": str(e)}
+    # Echo the request id so pipelining clients can match responses
+    if "id" in cmd_data:
+        response["id"] = cmd_data["id"]
+    return response
+
+
+def negotiate_protocol(session, cmd_data):
+    """
+    Answers a handshake ping that offers wire protocols and switches the session.
+    Handled on the reader thread (no game state involved) so the switch happens
+    exactly after this message.
+    """
+    params = cmd_data.get("params") or []
+    offer = params[0] if params and isinstance(params[0], dict) else {}
+    protocol = wire_protocol.choose_protocol(offer.get("protocols", []))
+    response = {"status": "success", "result": {"pong": True, "protocol": protocol}}
+    if "id" in cmd_data:
+        response["id"] = cmd_data["id"]
+    session.send(response)
+    session.protocol = protocol
+    log.info("%s using %s protocol", session.name, protocol)
+
+def drain_buffer(session, buffer):
+    """Queues every complete message in buffer and removes it from the buffer."""
+    start = 0
+    # Newline-delimited JSON until the client negotiates something else
+    while session.protocol == wire_protocol.PROTOCOL_JSON:
+        end = buffer.find(b"\n", start)
+        if end < 0:
+            break
+        message = bytes(buffer[start:end]).strip()
+        start = end + 1
+        if not message:
+            continue
+        try:
+            cmd_data = json.loads(message)
+        except ValueError as e:
+            # No id to answer with, so the client could never match an error reply;
+            # dropping the connection fails its pending requests instead.
+            raise ValueError(f"Invalid JSON: {e}") from None
+        if not isinstance(cmd_data, dict):
+            raise ValueError("Invalid JSON: expected an object")
+        if cmd_data.get("method") == "ping" and cmd_data.get("params"):
+            negotiate_protocol(session, cmd_data)
+        else:
+            executor.submit(session, cmd_data)
+    del buffer[:start]
+
+    if session.protocol == wire_protocol.PROTOCOL_BINARY:
+        for payload in wire_protocol.split_frames(buffer):
+            try:
+                cmd_data = session.decoder.decode_request(payload)
+            except Exception as e:
+                header = wire_protocol.read_header(payload)
+                if header is None or header[0] == wire_protocol.OP_DEFINE_BLOCK:
+                    # Nothing to answer, or the block table is out of step with the client
+                    raise ValueError(f"Invalid frame: {e}") from None
+                session.send({"status": "error", "error": f"Invalid frame: {e}", "id": header[1]})
+                continue
+            if cmd_data is not None:
+                executor.submit(session, cmd_data)
+
 def client_handler(conn, addr):
-    print(f"Connected by {addr}")
-    buffer = ""
+    """Reads messages from one client and queues them on the shared executor."""
+    log.info("Connected by %s", addr)
+    metrics.inc("connections_total")
+    session = ClientSession(conn, addr)
+    executor.add_session(session)
+    buffer = bytearray()
     try:
         while True:
-            data = conn.recv(1024)
+            data = conn.recv(65536)
             if not data:
                 break
-            
-            buffer += data.decode('utf-8')
-            
-            # Process complete messages (newline delimited)
-            while "\n" in buffer:
-                message, buffer = buffer.split("\n", 1)
-                if not message.strip():
-                    continue
-                    
-                try:
-                    cmd_data = json.loads(message)
-                    print(f"Executing: {cmd_data.get('method')}")
-                    result = handle_command(cmd_data)
-                    response = {"status": "success", "result": result}
-                except Exception as e:
-                    traceback.print_exc()
-                    response = {"status": "error", "error": str(e)}
-                
-                conn.sendall((json.dumps(response) + "\n").encode('utf-8'))
+            metrics.inc("bytes_received_total", len(data))
+            buffer += data
+            drain_buffer(session, buffer)
                 
     except Exception as e:
-        print(f"Connection error: {e}")
+        log.warning("Connection error: %s", e)
     finally:
+        executor.remove_session(session)
         conn.close()
-        print(f"Disconnected {addr}")
+        log.info("Disconnected %s", addr)
+
+def accept_loop(server):
+    while True:
+        conn, addr = server.accept()
+        threading.Thread(target=client_handler, args=(conn, addr), daemon=True).start()
 
 def start_server():
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     try:
         server.bind((HOST, PORT))
-        server.listen(1)
-        print(f"Listening on {HOST}:{PORT}...")
+        server.listen(MAX_PENDING_CONNECTIONS)
+        log.info("Listening on %s:%s...", HOST, PORT)
         minescript.echo(f"Listener started on port {PORT}")
         
-        while True:
-            # Check for stop signal? For now just run forever until script killed
-            conn, addr = server.accept()
-            # Only handle one client at a time for simplicity (prevents race conditions in game state)
-            client_handler(conn, addr)
+        jobs.load()
+        # Socket I/O runs on background threads; game commands stay on this thread
+        # through the executor (prevents race conditions in game state).
+        threading.Thread(target=accept_loop, args=(server,), daemon=True).start()
+        executor.run_forever()
             
     except Exception as e:
-        print(f"Server error: {e}")
+        log.error("Server error: %s", e)
     finally:
         server.close()
 
@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is +Inf
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+LOG_LEVEL_ENV = "CRAFTSMEN_LOG_LEVEL"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger writing to stdout (which Minescript shows in game). The level comes
+    from CRAFTSMEN_LOG_LEVEL (default INFO); use %-style arguments so disabled
+    messages cost almost nothing.
+    """
+    logger = logging.getLogger(f"craftsmen.{name}")
+    root = logging.getLogger("craftsmen")
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(handler)
+        root.setLevel(os.environ.get(LOG_LEVEL_ENV, "INFO").upper())
+        root.propagate = False
+    return logger
+
+
+class Histogram:
+    """Fixed-bucket histogram; cheap to update and to merge into exports."""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        idx = 0
+        while idx < len(self.buckets) and value > self.buckets[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile, interpolated inside the bucket that holds it."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = self.buckets[idx - 1] if idx > 0 else 0.0
+                high = self.buckets[idx] if idx < len(self.buckets) else low
+                return low + (high - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+        }
+
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms keyed on a name plus labels,
+    e.g. observe("command_seconds", 0.004, method="fill_region").
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """JSON-friendly copy of every counter and histogram."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                dict(histogram.snapshot(), name=name, labels=dict(labels))
+                for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _label_text(labels: Dict[str, Any], extra: str = "") -> str:
+    parts = [f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in sorted(labels.items())]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def prometheus_text(snapshot: Dict[str, List[Dict[str, Any]]], prefix: str = "craftsmen_") -> str:
+    """Renders a Metrics snapshot in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+    for counter in snapshot.get("counters", []):
+        name = prefix + counter["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_label_text(counter['labels'])} {counter['value']}")
+    for histogram in snapshot.get("histograms", []):
+        name = prefix + histogram["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        bounds = [str(bound) for bound in histogram["buckets"]] + ["+Inf"]
+        for bound, bucket_count in zip(bounds, histogram["counts"]):
+            cumulative += bucket_count
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{_label_text(histogram['labels'], le)} {cumulative}")
+        lines.append(f"{name}_sum{_label_text(histogram['labels'])} {histogram['sum']}")
+        lines.append(f"{name}_count{_label_text(histogram['labels'])} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_json_line(path: str, snapshots: Dict[str, Any]) -> None:
+    """Appends one timestamped line of snapshots (e.g. {"client": ..., "listener": ...})."""
+    with open(path, "a", encoding='utf-8') as f:
+        f.write(json.dumps(dict(snapshots, time=time.time()), separators=(",", ":")) + "\n")
+
+
+if __name__ == "__main__":
+    import argparse
+    from minecraft_client import MinecraftClient
+
+    parser = argparse.ArgumentParser(description="Export listener and client stats.")
+    parser.add_argument("--format", choices=("prometheus", "jsonl"), default="prometheus")
+    parser.add_argument("--output", help="JSON lines file to append to (jsonl format)")
+    parser.add_argument("--interval", type=float, default=0, help="Seconds between scrapes; 0 scrapes once")
+    args = parser.parse_args()
+
+    client = MinecraftClient()
+    while True:
+        stats = client.stats()
+        if args.format == "prometheus":
+            print(prometheus_text(stats["listener"], prefix="craftsmen_listener_"), end="")
+            print(prometheus_text(stats["client"], prefix="craftsmen_client_"), end="")
+        elif args.output:
+            write_json_line(args.output, stats)
+        else:
+            print(json.dumps(stats))
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
+    client.close()
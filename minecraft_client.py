@@ -1,62 +1,324 @@
 import sys
-import socket
 import json
-from typing import Tuple, Dict, Any
+import struct
+import asyncio
+import time
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from typing import Tuple, Dict, Any, List, Optional, Sequence
+import wire_protocol
+from block_cache import BlockCache
+from metrics import Metrics, get_logger
+
+log = get_logger("client")
+
+# Batched responses can be much larger than asyncio's 64 KiB default line limit.
+STREAM_LIMIT = 16 * 1024 * 1024
+READ_VOLUME_LIMIT = 262144  # Must not exceed the listener's read_region limit
+# Commands that are safe to send again after a lost connection. The rest may
+# already have run, and a replay would place twice or record a placement on
+# the inventory ledger twice. submit_build is deduplicated by its job id.
+RETRY_METHODS = frozenset({
+    "ping", "get_position", "move_to", "get_block_at", "verify_region", "read_region",
+    "get_inventory", "set_inventory", "fill_region", "submit_build", "job_status",
+    "cancel_job", "resume_job", "tick_rate", "queue_depths", "stats",
+})
+
+
+def _batch_payload(commands: Sequence[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+    return [
+        {"method": command[0], "params": list(command[1:])}
+        for command in commands
+    ]
+
+
+class AsyncMinecraftClient:
+    """
+    An asyncio client for listener.py that pipelines requests.
+    Every message carries an "id" which the listener echoes back, so many
+    requests can be in flight over the one connection at the same time.
+    """
+    def __init__(
+        self,
+        host='127.0.0.1',
+        port=25560,
+        protocols: Sequence[str] = wire_protocol.SUPPORTED_PROTOCOLS,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.metrics = metrics if metrics is not None else Metrics()  # Byte counters
+        self.protocols = list(protocols)  # Offered during the handshake, in preference order
+        self.protocol = wire_protocol.PROTOCOL_JSON
+        self._encoder: Optional[wire_protocol.BinaryEncoder] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> None:
+        await self.close()
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port, limit=STREAM_LIMIT
+        )
+        # Handshake: a ping offering protocols, answered in JSON before any switch.
+        # Older listeners ignore the offer and reply "pong", which keeps JSON.
+        handshake = {"id": 0, "method": "ping", "params": [{"protocols": self.protocols}]}
+        self._writer.write((json.dumps(handshake) + "\n").encode('utf-8'))
+        await self._writer.drain()
+        response_line = await self._reader.readline()
+        if not response_line:
+            raise ConnectionError("Server closed connection")
+        result = json.loads(response_line).get("result")
+        if result == "pong":
+            self.protocol = wire_protocol.PROTOCOL_JSON
+        elif isinstance(result, dict) and result.get("protocol") in self.protocols:
+            self.protocol = result["protocol"]
+        else:
+            raise ConnectionError("Handshake failed")
+        self._encoder = wire_protocol.BinaryEncoder()
+        self._read_task = asyncio.ensure_future(self._read_loop())
+
+    async def _read_response(self) -> Optional[Dict[str, Any]]:
+        """Reads one response in the negotiated protocol; None at end of stream."""
+        if self.protocol == wire_protocol.PROTOCOL_BINARY:
+            try:
+                header = await self._reader.readexactly(4)
+                (length,) = struct.unpack(">I", header)
+                payload = await self._reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                return None
+            self.metrics.inc("bytes_received_total", len(payload) + 4)
+            return wire_protocol.decode_response(payload)
+        response_line = await self._reader.readline()
+        if not response_line:
+            return None
+        self.metrics.inc("bytes_received_total", len(response_line))
+        return json.loads(response_line)
+
+    async def _read_loop(self) -> None:
+        error: Exception = ConnectionError("Server closed connection")
+        writer = self._writer  # This loop's connection; a reconnect replaces self._writer
+        try:
+            while True:
+                response = await self._read_response()
+                if response is None:
+                    break
+                future = self._pending.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if response.get("status") == "success":
+                    future.set_result(response.get("result"))
+                else:
+                    future.set_exception(RuntimeError(f"Remote Error: {response.get('error')}"))
+        except (ConnectionError, OSError) as exc:
+            error = ConnectionError(str(exc))
+        except Exception as exc:
+            # An undecodable response leaves the stream out of step, so this connection is done
+            error = ConnectionError(f"Invalid response from listener: {exc!r}")
+        finally:
+            # Closing makes connected False, so callers reconnect instead of waiting on a dead reader
+            writer.close()
+            self._fail_pending(error)
+
+    def _fail_pending(self, error: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def send_command(self, method: str, *params) -> Any:
+        """Sends a JSON command and waits for its response without blocking other requests."""
+        if not self.connected:
+            raise ConnectionError("Not connected")
+        self._next_id += 1
+        request_id = self._next_id
+        # Encode first, so a request that cannot be encoded leaves no pending future behind
+        if self.protocol == wire_protocol.PROTOCOL_BINARY:
+            data = self._encoder.encode_request(request_id, method, params)
+        else:
+            payload = {
+                "id": request_id,
+                "method": method,
+                "params": params
+            }
+            data = (json.dumps(payload) + "\n").encode('utf-8')
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(data)
+            await self._writer.drain()
+        except (ConnectionError, OSError) as exc:
+            self._pending.pop(request_id, None)
+            raise ConnectionError(str(exc))
+        self.metrics.inc("bytes_sent_total", len(data))
+        return await future
+
+    async def get_position(self) -> Tuple[float, float, float]:
+        return tuple(await self.send_command("get_position"))
+
+    async def move_to(self, x: float, y: float, z: float) -> None:
+        await self.send_command("move_to", x, y, z)
+
+    async def place_block(self, x: int, y: int, z: int, block_type: str) -> bool:
+        return await self.send_command("place_block", x, y, z, block_type)
+
+    async def fill_region(
+        self,
+        x1: int, y1: int, z1: int,
+        x2: int, y2: int, z2: int,
+        block_type: str,
+    ) -> bool:
+        return await self.send_command("fill_region", x1, y1, z1, x2, y2, z2, block_type)
+
+    async def clone_region(
+        self,
+        x1: int, y1: int, z1: int,
+        x2: int, y2: int, z2: int,
+        dest_x: int, dest_y: int, dest_z: int,
+        mode: str = "replace",
+    ) -> bool:
+        return await self.send_command("clone_region", x1, y1, z1, x2, y2, z2, dest_x, dest_y, dest_z, mode)
+
+    async def get_block_at(self, x: int, y: int, z: int) -> str:
+        return await self.send_command("get_block_at", x, y, z)
+
+    async def get_inventory(self) -> Dict[str, int]:
+        return await self.send_command("get_inventory")
+
+    async def set_inventory(self, block_type: str, count: int) -> None:
+        await self.send_command("set_inventory", block_type, count)
+
+    async def execute_batch(self, commands: Sequence[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        if not commands:
+            return []
+        return await self.send_command("batch", _batch_payload(commands))
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        if self._read_task is not None:
+            self._read_task.cancel()
+        self._fail_pending(ConnectionError("Connection closed"))
+        self._reader = self._writer = self._read_task = None
+
 
 class MinecraftClient:
     """
     A client class to interact with the Minecraft world via a running listener.py script.
+    Blocking wrapper around AsyncMinecraftClient, which runs on a private event loop thread.
     """
-    def __init__(self, host='127.0.0.1', port=25560):
+    def __init__(
+        self,
+        host='127.0.0.1',
+        port=25560,
+        protocols: Sequence[str] = wire_protocol.SUPPORTED_PROTOCOLS,
+        cache_chunks: int = 0,
+    ):
         self.host = host
         self.port = port
-        self.socket = None
+        # Opt-in block cache; cache_chunks=0 always asks the listener
+        self.cache: Optional[BlockCache] = BlockCache(cache_chunks) if cache_chunks > 0 else None
+        self.round_trips = deque(maxlen=1024)  # Recent (method, seconds) round-trip samples
+        self.metrics = Metrics()  # Round-trip histograms and request/byte/reconnect counters
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        self._client = AsyncMinecraftClient(host, port, protocols, metrics=self.metrics)
         self.connect()
 
+    def _run(self, coro) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
     def connect(self):
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.connect((self.host, self.port))
-            # Test connection
-            if self._send_command("ping") != "pong":
-                raise ConnectionError("Handshake failed")
-            print(f"Connected to Minecraft Listener at {self.host}:{self.port}")
+            self._run(self._client.connect())
+            log.info("Connected to Minecraft Listener at %s:%s", self.host, self.port)
         except ConnectionRefusedError:
-            print(f"[ERROR] Could not connect to {self.host}:{self.port}")
-            print("Make sure 'listener.py' is running inside Minecraft via MineScript.")
+            log.error("[ERROR] Could not connect to %s:%s", self.host, self.port)
+            log.error("Make sure 'listener.py' is running inside Minecraft via MineScript.")
             sys.exit(1)
 
+    def submit(self, method: str, *params) -> Future:
+        """
+        Sends a command without waiting for the response.
+        Returns a concurrent.futures.Future resolved when the listener replies, so
+        callers can keep a window of requests in flight.
+        """
+        started = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(
+            self._client.send_command(method, *params), self._loop
+        )
+        future.add_done_callback(lambda done: self._record_round_trip(method, started, done))
+        return future
+
+    def _record_round_trip(self, method: str, started: float, future: Future) -> None:
+        seconds = time.perf_counter() - started
+        self.round_trips.append((method, seconds))
+        self.metrics.observe("round_trip_seconds", seconds, method=method)
+        status = "success" if future.exception() is None else "error"
+        self.metrics.inc("requests_total", method=method, status=status)
+
+    def last_round_trip(self, method: Optional[str] = None) -> Optional[float]:
+        """Seconds taken by the most recent completed request (optionally of one method)."""
+        for sample_method, seconds in reversed(list(self.round_trips)):
+            if method is None or sample_method == method:
+                return seconds
+        return None
+
+    def submit_batch(self, commands: Sequence[Tuple[Any, ...]]) -> Future:
+        """Pipelined version of execute_batch; see submit."""
+        future = self.submit("batch", _batch_payload(commands))
+        if self.cache is not None:
+            future.add_done_callback(
+                lambda done: done.exception() is None and self._observe_batch(commands, done.result())
+            )
+        return future
+
+    def _observe(self, method: str, params: Sequence[Any], result: Any) -> None:
+        """Keeps the block cache in step with a successful command."""
+        if method == "get_block_at" and isinstance(result, str):
+            self.cache.put(*params, result)
+        elif method == "place_block" and result:
+            self.cache.put(*params)
+        elif method == "fill_region" and result:
+            self.cache.put_region(tuple(params[0:3]), tuple(params[3:6]), params[6])
+        elif method == "clone_region" and result:
+            dest_min = tuple(params[6:9])
+            dest_max = tuple(d + abs(b - a) for d, a, b in zip(dest_min, params[0:3], params[3:6]))
+            self.cache.invalidate_region(dest_min, dest_max)
+
+    def _observe_batch(self, commands: Sequence[Tuple[Any, ...]], results: List[Dict[str, Any]]) -> None:
+        for command, item in zip(commands, results):
+            if item.get("status") == "success":
+                self._observe(command[0], command[1:], item.get("result"))
+
     def _send_command(self, method: str, *params) -> Any:
-        """Sends a JSON command to the listener and returns the result."""
-        payload = {
-            "method": method,
-            "params": params
-        }
-        
+        """
+        Sends a command and returns the result. After a lost connection it
+        reconnects, then retries once if the method is in RETRY_METHODS and
+        re-raises the ConnectionError otherwise.
+        """
         try:
-            msg = json.dumps(payload) + "\n"
-            self.socket.sendall(msg.encode('utf-8'))
-            
-            # Read response (simple blocking read for newline)
-            # (uses the assumption that responses fit in one packet or come quickly)
-
-            f = self.socket.makefile('r')
-            response_line = f.readline()
-            
-            if not response_line:
-                raise ConnectionError("Server closed connection")
-                
-            response = json.loads(response_line)
-            
-            if response.get("status") == "success":
-                return response.get("result")
-            else:
-                raise RuntimeError(f"Remote Error: {response.get('error')}")
-                
-        except (BrokenPipeError, ConnectionResetError):
-            print("Connection lost. Reconnecting...")
+            return self.submit(method, *params).result()
+        except ConnectionError:
+            log.warning("Connection lost. Reconnecting...")
+            self.metrics.inc("reconnects_total")
             self.connect()
-            return self._send_command(method, *params)
+            if method not in RETRY_METHODS:
+                raise
+            return self.submit(method, *params).result()
 
     def get_position(self) -> Tuple[float, float, float]:
         """Returns the current (x, y, z) position of the agent."""
@@ -72,11 +334,165 @@ class MinecraftClient:
         Places a block at the specified coordinates if available in inventory.
         Returns True if successful, False otherwise.
         """
-        return self._send_command("place_block", x, y, z, block_type)
+        result = self._send_command("place_block", x, y, z, block_type)
+        if self.cache is not None:
+            self._observe("place_block", (x, y, z, block_type), result)
+        return result
+
+    def fill_region(
+        self,
+        x1: int, y1: int, z1: int,
+        x2: int, y2: int, z2: int,
+        block_type: str,
+    ) -> bool:
+        """Fills the box between two corners (inclusive) with a single block type."""
+        result = self._send_command("fill_region", x1, y1, z1, x2, y2, z2, block_type)
+        if self.cache is not None:
+            self._observe("fill_region", (x1, y1, z1, x2, y2, z2, block_type), result)
+        return result
+
+    def clone_region(
+        self,
+        x1: int, y1: int, z1: int,
+        x2: int, y2: int, z2: int,
+        dest_x: int, dest_y: int, dest_z: int,
+        mode: str = "replace",
+    ) -> bool:
+        """Copies the box between two corners so its min corner lands on dest; mode "masked" skips air."""
+        params = (x1, y1, z1, x2, y2, z2, dest_x, dest_y, dest_z, mode)
+        result = self._send_command("clone_region", *params)
+        if self.cache is not None:
+            self._observe("clone_region", params, result)
+        return result
+
+    def get_block_at(self, x: int, y: int, z: int, use_cache: bool = True) -> str:
+        """
+        Queries the world state for the block at the specified coordinates.
+        Served from the block cache when enabled, unless use_cache is False.
+        """
+        if self.cache is not None and use_cache:
+            cached = self.cache.get(x, y, z)
+            if cached is not None:
+                return cached
+        result = self._send_command("get_block_at", x, y, z)
+        if self.cache is not None:
+            self._observe("get_block_at", (x, y, z), result)
+        return result
 
-    def get_block_at(self, x: int, y: int, z: int) -> str:
-        """Queries the world state for the block at the specified coordinates."""
-        return self._send_command("get_block_at", x, y, z)
+    def verify_region(
+        self,
+        origin: Tuple[int, int, int],
+        cells: Sequence[Tuple[int, int, int, str]],
+    ) -> List[Tuple[int, int, int, str, str]]:
+        """
+        Checks many (x, y, z, expected_block) cells in bulk, up to
+        READ_VOLUME_LIMIT cells per round trip.
+        Returns only the mismatches as (x, y, z, expected_block, found_block).
+        """
+        if not cells:
+            return []
+        ox, oy, oz = origin
+        mismatches = []
+        for start in range(0, len(cells), READ_VOLUME_LIMIT):
+            palette: Dict[str, int] = {}
+            flat: List[int] = []
+            for x, y, z, block in cells[start:start + READ_VOLUME_LIMIT]:
+                flat.extend((x - ox, y - oy, z - oz, palette.setdefault(block, len(palette))))
+            mismatches.extend(self._send_command("verify_region", [ox, oy, oz], list(palette), flat))
+        if self.cache is not None:
+            # Always checked against the world, but what it saw is known now
+            seen = {(x, y, z): block for x, y, z, block in cells}
+            seen.update({(x, y, z): found for x, y, z, _, found in mismatches})
+            self.cache.put_blocks(seen)
+        return [tuple(mismatch) for mismatch in mismatches]
+
+    def read_region(
+        self,
+        corner_a: Tuple[int, int, int],
+        corner_b: Tuple[int, int, int],
+        full_state: bool = False,
+        use_cache: bool = True,
+    ) -> Dict[Tuple[int, int, int], str]:
+        """
+        Reads every block in a box (inclusive corners) in bulk.
+        Returns {(x, y, z): block_name}; large boxes are read in y-slabs.
+        With full_state the names are full ids such as
+        minecraft:oak_stairs[facing=east,half=top], so they can be placed back as they were.
+        Results fill the block cache when enabled. Unless use_cache is False,
+        chunk columns whose blocks are all cached are served from it and only
+        the rest of the box is read; full_state reads always go to the world,
+        since the cache may not hold block states.
+        """
+        x1, x2 = sorted((corner_a[0], corner_b[0]))
+        y1, y2 = sorted((corner_a[1], corner_b[1]))
+        z1, z2 = sorted((corner_a[2], corner_b[2]))
+        if self.cache is None or not use_cache or full_state:
+            blocks = self._read_region((x1, y1, z1), (x2, y2, z2), full_state)
+            if self.cache is not None:
+                self.cache.put_blocks(blocks)
+            return blocks
+        blocks = {}
+        missing = []  # Chunk-column boxes with at least one uncached block
+        for cx in range(x1 >> 4, (x2 >> 4) + 1):
+            for cz in range(z1 >> 4, (z2 >> 4) + 1):
+                box_min = (max(x1, cx << 4), y1, max(z1, cz << 4))
+                box_max = (min(x2, (cx << 4) + 15), y2, min(z2, (cz << 4) + 15))
+                cached = self.cache.get_region(box_min, box_max)
+                if cached is None:
+                    missing.append((box_min, box_max))
+                else:
+                    # Cached place_block ids may carry a [state]; a default read has none
+                    blocks.update((pos, block.split("[", 1)[0]) for pos, block in cached.items())
+        if missing:
+            # One read over the uncached columns, never larger than the requested box
+            read_min = tuple(min(box[0][i] for box in missing) for i in range(3))
+            read_max = tuple(max(box[1][i] for box in missing) for i in range(3))
+            read = self._read_region(read_min, read_max, False)
+            self.cache.put_blocks(read)
+            blocks.update(read)
+        return blocks
+
+    def _read_region(
+        self,
+        corner_min: Tuple[int, int, int],
+        corner_max: Tuple[int, int, int],
+        full_state: bool,
+    ) -> Dict[Tuple[int, int, int], str]:
+        """Reads a box with sorted corners from the world, in y-slabs."""
+        x1, y1, z1 = corner_min
+        x2, y2, z2 = corner_max
+        layer = (x2 - x1 + 1) * (z2 - z1 + 1)
+        if layer > READ_VOLUME_LIMIT:
+            raise ValueError(f"Region layer of {layer} blocks exceeds read limit {READ_VOLUME_LIMIT}")
+        slab_height = READ_VOLUME_LIMIT // layer
+        blocks: Dict[Tuple[int, int, int], str] = {}
+        for slab_y in range(y1, y2 + 1, slab_height):
+            slab_top = min(y2, slab_y + slab_height - 1)
+            params = (x1, slab_y, z1, x2, slab_top, z2) + ((True,) if full_state else ())
+            snapshot = self._send_command("read_region", *params)
+            palette = snapshot["palette"]
+            cells = (
+                (x, y, z)
+                for y in range(slab_y, slab_top + 1)
+                for z in range(z1, z2 + 1)
+                for x in range(x1, x2 + 1)
+            )
+            for pos, index in zip(cells, snapshot["blocks"]):
+                blocks[pos] = palette[index]
+        return blocks
+
+    def invalidate_region(
+        self,
+        corner_a: Tuple[int, int, int],
+        corner_b: Tuple[int, int, int],
+    ) -> None:
+        """Drops cached blocks in a box, e.g. after players or redstone changed it."""
+        if self.cache is not None:
+            self.cache.invalidate_region(corner_a, corner_b)
+
+    def cache_stats(self) -> Optional[Dict[str, float]]:
+        """Returns block cache hit/miss counters, or None when the cache is disabled."""
+        return self.cache.stats() if self.cache is not None else None
 
     def get_inventory(self) -> Dict[str, int]:
         """Returns the current inventory as a dict of item_name -> count."""
@@ -86,6 +502,110 @@ class MinecraftClient:
         """Sets the inventory count for a specific block type (Helper for testing)."""
         self._send_command("set_inventory", block_type, count)
 
+    def set_inventory_ledger(self, scope: str) -> str:
+        """
+        Sets when the listener settles deferred inventory use from place_block:
+        "command", "batch" or "build" (only on reconcile_inventory). Applies to
+        this connection only. Returns the previous scope.
+        """
+        return self._send_command("inventory_ledger", scope)
+
+    def reconcile_inventory(self) -> Dict[str, int]:
+        """Settles deferred inventory use now; returns {block: count} settled."""
+        return self._send_command("reconcile_inventory")
+
+    def submit_build(
+        self,
+        commands: Sequence[Tuple[Any, ...]],
+        job_id: Optional[str] = None,
+        commands_per_tick: Optional[int] = None,
+    ) -> str:
+        """
+        Hands a whole list of (method, *params) commands (move_to, place_block,
+        fill_region) to the listener, which runs them as a build job under a
+        per-tick command budget. Resubmitting a job_id only reports its status,
+        so a retry after a reconnect never queues it twice. Returns the job id.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        options = {"commands_per_tick": commands_per_tick} if commands_per_tick else {}
+        self._send_command("submit_build", job_id, _batch_payload(commands), options)
+        if self.cache is not None:
+            # The job changes the world after this returns, so cached blocks in its box go stale
+            corners = [c[1:4] for c in commands if c[0] in ("place_block", "fill_region")]
+            corners += [c[4:7] for c in commands if c[0] == "fill_region"]
+            if corners:
+                self.cache.invalidate_region(
+                    tuple(min(c[i] for c in corners) for i in range(3)),
+                    tuple(max(c[i] for c in corners) for i in range(3)),
+                )
+        return job_id
+
+    def job_status(self, job_id: Optional[str] = None) -> Any:
+        """
+        Progress of one build job ({id, status, done, total, errors, ...}), or
+        a list of every job when job_id is None.
+        """
+        return self._send_command("job_status", *([job_id] if job_id else []))
+
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Stops a build job for good; its checkpoint is deleted, so it cannot be resumed."""
+        return self._send_command("cancel_job", job_id)
+
+    def resume_job(self, job_id: str) -> Dict[str, Any]:
+        """Continues a paused build job from its checkpoint."""
+        return self._send_command("resume_job", job_id)
+
+    def wait_for_job(
+        self,
+        job_id: str,
+        poll_seconds: float = 0.25,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Polls job_status until the job is done, cancelled or paused."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            status = self.job_status(job_id)
+            if status["status"] in ("done", "cancelled", "paused"):
+                return status
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Build job {job_id} still {status['status']} after {timeout}s")
+            time.sleep(poll_seconds)
+
+    def get_tick_rate(self) -> Optional[float]:
+        """
+        Server ticks per second for this connection, measured over windows of
+        at least a second; repeats the last reading inside a window and is
+        None until the first window has passed.
+        """
+        return self._send_command("tick_rate")
+
+    def get_queue_depths(self) -> Dict[str, int]:
+        """Returns how many commands each connected client has waiting on the listener."""
+        return self._send_command("queue_depths")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Metrics snapshots from both sides: client round trips and byte counters,
+        and the listener's execution times (see metrics.prometheus_text to export).
+        """
+        return {"client": self.metrics.snapshot(), "listener": self._send_command("stats")}
+
+    def execute_batch(self, commands: Sequence[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        """
+        Sends several commands in one round trip.
+        Each command is a tuple of (method, *params). Returns one dict per command,
+        in order, shaped like {"status": "success", "result": ...} or
+        {"status": "error", "error": ...}.
+        """
+        if not commands:
+            return []
+        results = self._send_command("batch", _batch_payload(commands))
+        if self.cache is not None:
+            self._observe_batch(commands, results)
+        return results
+
     def close(self):
-        if self.socket:
-            self.socket.close()
+        if self._loop.is_running():
+            self._run(self._client.close())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=1)
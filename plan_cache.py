@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_DIR = ".plan_cache"
+
+
+class PlanCache:
+    """
+    Disk-backed cache of validated plans, one JSON file per key.
+    Plans use relative coordinates, so a plan drafted for one location can be
+    reused anywhere with the same prompt, size and palette. Entries expire after
+    ttl_seconds; beyond max_entries or max_bytes the least recently used entries
+    (by file modification time, refreshed on every hit) are evicted.
+    """
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, system_text: str, user_text: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_text, user_text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[List]]:
+        """Returns the cached ops as [x, y, z, block] lists, or None."""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl_seconds:
+            self.delete(key)
+            self.misses += 1
+            return None
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        return entry["ops"]
+
+    def put(self, key: str, ops: List[List]) -> None:
+        entry = {"created": time.time(), "ops": ops}
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, self._path(key))
+        self.stores += 1
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def purge(self) -> None:
+        """Removes every cached plan."""
+        for path in self._entries():
+            os.remove(path)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": len(self._entries()),
+        }
+
+    def _entries(self) -> List[str]:
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        ]
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self._entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            self.evictions += 1
@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, List, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from builder import BlockOp
+    from primitives import PrimitivePlan
+    from voxel_plan import VoxelPlan
+
+# Default value of the game's commandModificationBlockLimit gamerule.
+FILL_VOLUME_LIMIT = 32768
+
+
+@dataclass
+class PlanCommand:
+    """One listener command covering an axis-aligned box of identical blocks."""
+    min_corner: Tuple[int, int, int]
+    max_corner: Tuple[int, int, int]
+    block: str
+    op_indices: List[int] = field(default_factory=list)  # Plan ops covered by this command
+
+    @property
+    def volume(self) -> int:
+        return (
+            (self.max_corner[0] - self.min_corner[0] + 1)
+            * (self.max_corner[1] - self.min_corner[1] + 1)
+            * (self.max_corner[2] - self.min_corner[2] + 1)
+        )
+
+    def cells(self):
+        """Yields every relative coordinate covered by the box."""
+        (x1, y1, z1), (x2, y2, z2) = self.min_corner, self.max_corner
+        for y in range(y1, y2 + 1):
+            for z in range(z1, z2 + 1):
+                for x in range(x1, x2 + 1):
+                    yield x, y, z
+
+
+@dataclass
+class CompiledPlan:
+    commands: List[PlanCommand]
+    ops_in: int
+
+    @property
+    def commands_out(self) -> int:
+        return len(self.commands)
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.ops_in / max(1, self.commands_out)
+
+
+def iter_cells(plan: Union[Sequence["BlockOp"], "VoxelPlan", "PrimitivePlan"]) -> Iterator[Tuple[int, int, int, str]]:
+    """Yields (x, y, z, block) from a BlockOp list or any plan with cells()."""
+    if hasattr(plan, "cells"):
+        return plan.cells()
+    return ((op.x, op.y, op.z, op.block) for op in plan)
+
+
+def compile_plan(
+    plan: Union[Sequence["BlockOp"], "VoxelPlan"],
+    merge: bool = True,
+    volume_limit: int = FILL_VOLUME_LIMIT,
+) -> CompiledPlan:
+    """
+    Turns a validated plan into listener commands.
+    Duplicate coordinates resolve to the last op written (a VoxelPlan is
+    already resolved, and its op indices follow execution order). With merge enabled,
+    same-block ops are greedily grown into maximal boxes (x, then z, then y),
+    never exceeding volume_limit, and commands are ordered bottom-up.
+    """
+    final: Dict[Tuple[int, int, int], Tuple[str, int]] = {}
+    for idx, (x, y, z, block) in enumerate(iter_cells(plan)):
+        final[(x, y, z)] = (block, idx)
+
+    if not merge:
+        commands = [
+            PlanCommand(coord, coord, block, [idx])
+            for coord, (block, idx) in sorted(final.items(), key=lambda item: item[1][1])
+        ]
+        return CompiledPlan(commands=commands, ops_in=len(plan))
+
+    by_block: Dict[str, Dict[Tuple[int, int, int], int]] = {}
+    for coord, (block, idx) in final.items():
+        by_block.setdefault(block, {})[coord] = idx
+
+    commands = []
+    for block, cells in by_block.items():
+        for seed in sorted(cells, key=lambda c: (c[1], c[2], c[0])):
+            if seed not in cells:
+                continue  # Already absorbed into an earlier box
+            commands.append(_grow_box(seed, block, cells, volume_limit))
+
+    commands.sort(key=lambda cmd: (cmd.min_corner[1], cmd.min_corner[2], cmd.min_corner[0]))
+    return CompiledPlan(commands=commands, ops_in=len(plan))
+
+
+def _grow_box(
+    seed: Tuple[int, int, int],
+    block: str,
+    cells: Dict[Tuple[int, int, int], int],
+    volume_limit: int,
+) -> PlanCommand:
+    """Grows a box from seed over unclaimed cells and removes them from cells."""
+    x1, y1, z1 = seed
+    x2, y2, z2 = seed
+
+    while (x2 + 1, y1, z1) in cells and (x2 - x1 + 2) <= volume_limit:
+        x2 += 1
+    width = x2 - x1 + 1
+
+    while (
+        width * (z2 - z1 + 2) <= volume_limit
+        and all((x, y1, z2 + 1) in cells for x in range(x1, x2 + 1))
+    ):
+        z2 += 1
+    depth = z2 - z1 + 1
+
+    while (
+        width * depth * (y2 - y1 + 2) <= volume_limit
+        and all(
+            (x, y2 + 1, z) in cells
+            for z in range(z1, z2 + 1)
+            for x in range(x1, x2 + 1)
+        )
+    ):
+        y2 += 1
+
+    command = PlanCommand((x1, y1, z1), (x2, y2, z2), block)
+    for coord in list(command.cells()):
+        command.op_indices.append(cells.pop(coord))
+    command.op_indices.sort()
+    return command
+
+
+def split_box(
+    box_min: Tuple[int, int, int],
+    box_max: Tuple[int, int, int],
+    block: str,
+    volume_limit: int = FILL_VOLUME_LIMIT,
+) -> List[PlanCommand]:
+    """Splits a box into y-slabs (then z-rows) that each fit under volume_limit."""
+    (x1, y1, z1), (x2, y2, z2) = box_min, box_max
+    width, length = x2 - x1 + 1, z2 - z1 + 1
+    layer = width * length
+    commands = []
+    if layer <= volume_limit:
+        slab = max(1, volume_limit // layer)
+        for y in range(y1, y2 + 1, slab):
+            commands.append(PlanCommand((x1, y, z1), (x2, min(y2, y + slab - 1), z2), block))
+        return commands
+    rows = max(1, volume_limit // width)
+    for y in range(y1, y2 + 1):
+        for z in range(z1, z2 + 1, rows):
+            commands.append(PlanCommand((x1, y, z), (x2, y, min(z2, z + rows - 1)), block))
+    return commands
@@ -0,0 +1,73 @@
+import json
+from typing import Any, Dict, List
+
+
+class IncrementalOpParser:
+    """
+    Pulls complete op objects out of a streamed {"ops": [{...}, ...]} JSON
+    document as soon as each one closes, without waiting for the whole response.
+    """
+    def __init__(self):
+        self._text = ""
+        self._pos = 0  # Next character to scan
+        self._in_ops = False  # Inside the "ops" array
+        self._done = False
+        self._depth = 0  # Brace depth inside the array
+        self._obj_start = -1
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Adds streamed text and returns every op completed by it."""
+        self._text += chunk
+        ops = []
+        if not self._in_ops and not self._done:
+            start = self._find_ops_array()
+            if start < 0:
+                return ops
+            self._in_ops = True
+            self._pos = start
+        text = self._text
+        while self._in_ops and self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._obj_start = self._pos
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    ops.append(json.loads(text[self._obj_start:self._pos + 1]))
+                    self._obj_start = -1
+            elif ch == "]" and self._depth == 0:
+                self._in_ops = False
+                self._done = True
+            self._pos += 1
+        # Drop text that can no longer be part of a pending op
+        keep_from = self._obj_start if self._obj_start >= 0 else self._pos
+        self._text = self._text[keep_from:]
+        self._pos -= keep_from
+        if self._obj_start >= 0:
+            self._obj_start = 0
+        return ops
+
+    def _find_ops_array(self) -> int:
+        key = self._text.find('"ops"')
+        if key < 0:
+            return -1
+        bracket = self._text.find("[", key)
+        return bracket + 1 if bracket >= 0 else -1
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing bracket of the ops array has been seen."""
+        return self._done
@@ -0,0 +1,222 @@
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from plan_compiler import FILL_VOLUME_LIMIT, CompiledPlan, compile_plan, split_box
+
+SHAPE_KINDS = ("box", "hollow_box", "walls", "plane", "line")
+TRANSFORM_KINDS = ("copy", "mirror", "repeat")
+
+
+class PrimitiveSchema(BaseModel):  # Structured response for LLM via langchain
+    kind: str = Field(description="One of box, hollow_box, walls, plane, line, copy, mirror, repeat.")
+    block: Optional[str] = Field(default=None, description="Block id for shapes, e.g. minecraft:oak_planks.")
+    x1: int = Field(default=0, description="First corner / line start x (shapes only).")
+    y1: int = Field(default=0, description="First corner / line start y (shapes only).")
+    z1: int = Field(default=0, description="First corner / line start z (shapes only).")
+    x2: int = Field(default=0, description="Opposite corner / line end x, inclusive (shapes only).")
+    y2: int = Field(default=0, description="Opposite corner / line end y, inclusive (shapes only).")
+    z2: int = Field(default=0, description="Opposite corner / line end z, inclusive (shapes only).")
+    group: Optional[str] = Field(default=None, description="Optional name to refer to this primitive later.")
+    source: Optional[str] = Field(default=None, description="Group copied, mirrored or repeated.")
+    dx: int = Field(default=0, description="Offset x for copy/repeat.")
+    dy: int = Field(default=0, description="Offset y for copy/repeat.")
+    dz: int = Field(default=0, description="Offset z for copy/repeat.")
+    count: int = Field(default=1, description="Number of extra copies for repeat.")
+    axis: Optional[str] = Field(default=None, description="Mirror axis: x, y or z.")
+    pivot: int = Field(default=0, description="Mirror: new coordinate = pivot - old (width-1 mirrors the full width).")
+
+
+class PrimitivePlanSchema(BaseModel):  # Structured response for LLM via langchain
+    primitives: List[PrimitiveSchema]
+
+
+Corner = Tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class Shape:
+    """A resolved primitive: one block type over a box, shell, wall ring or line."""
+    kind: str
+    block: str
+    start: Corner
+    end: Corner
+
+    @property
+    def min_corner(self) -> Corner:
+        return tuple(min(a, b) for a, b in zip(self.start, self.end))
+
+    @property
+    def max_corner(self) -> Corner:
+        return tuple(max(a, b) for a, b in zip(self.start, self.end))
+
+    def boxes(self) -> List[Tuple[Corner, Corner]]:
+        """Disjoint boxes covering the shape (lines that are not axis-aligned return [])."""
+        (x1, y1, z1), (x2, y2, z2) = self.min_corner, self.max_corner
+        if self.kind in ("box", "plane"):
+            return [((x1, y1, z1), (x2, y2, z2))]
+        if self.kind == "line":
+            differing = sum(1 for a, b in zip(self.start, self.end) if a != b)
+            return [((x1, y1, z1), (x2, y2, z2))] if differing <= 1 else []
+        boxes = []
+        if self.kind == "hollow_box":
+            boxes.append(((x1, y1, z1), (x2, y1, z2)))
+            if y2 > y1:
+                boxes.append(((x1, y2, z1), (x2, y2, z2)))
+            y1, y2 = y1 + 1, y2 - 1
+            if y1 > y2:
+                return boxes
+        # Four walls: full-length x walls, then z walls between them
+        boxes.append(((x1, y1, z1), (x2, y2, z1)))
+        if z2 > z1:
+            boxes.append(((x1, y1, z2), (x2, y2, z2)))
+        if z2 - z1 > 1:
+            boxes.append(((x1, y1, z1 + 1), (x1, y2, z2 - 1)))
+            if x2 > x1:
+                boxes.append(((x2, y1, z1 + 1), (x2, y2, z2 - 1)))
+        return boxes
+
+    def volume(self) -> int:
+        if self.kind == "line" and not self.boxes():
+            return max(abs(b - a) for a, b in zip(self.start, self.end)) + 1
+        return sum(
+            (b[0] - a[0] + 1) * (b[1] - a[1] + 1) * (b[2] - a[2] + 1)
+            for a, b in self.boxes()
+        )
+
+    def cells(self) -> Iterator[Corner]:
+        boxes = self.boxes()
+        if self.kind == "line" and not boxes:
+            steps = max(abs(b - a) for a, b in zip(self.start, self.end))
+            for i in range(steps + 1):
+                yield tuple(a + round((b - a) * i / steps) for a, b in zip(self.start, self.end))
+            return
+        for (x1, y1, z1), (x2, y2, z2) in boxes:
+            for y in range(y1, y2 + 1):
+                for z in range(z1, z2 + 1):
+                    for x in range(x1, x2 + 1):
+                        yield x, y, z
+
+    def moved(self, dx: int, dy: int, dz: int) -> "Shape":
+        offset = (dx, dy, dz)
+        return replace(
+            self,
+            start=tuple(a + d for a, d in zip(self.start, offset)),
+            end=tuple(a + d for a, d in zip(self.end, offset)),
+        )
+
+    def mirrored(self, axis: int, pivot: int) -> "Shape":
+        def flip(corner: Corner) -> Corner:
+            values = list(corner)
+            values[axis] = pivot - values[axis]
+            return tuple(values)
+        return replace(self, start=flip(self.start), end=flip(self.end))
+
+
+class PrimitivePlan:
+    """
+    A plan made of parametric shapes. Group references (copy/mirror/repeat) are
+    resolved into shapes up front, which is cheap; blocks are only produced
+    lazily by cells() or compile().
+    """
+    def __init__(self, shapes: Sequence[Shape], primitives: Sequence[Dict] = ()):
+        self.shapes = list(shapes)
+        self.primitives = list(primitives)  # Source description, kept for caching
+
+    @classmethod
+    def from_schema(cls, schema: PrimitivePlanSchema) -> "PrimitivePlan":
+        return cls.from_dicts([primitive.model_dump() for primitive in schema.primitives])
+
+    @classmethod
+    def from_dicts(cls, primitives: Sequence[Dict]) -> "PrimitivePlan":
+        """Resolves primitives in order; raises ValueError on malformed ones."""
+        shapes: List[Shape] = []
+        groups: Dict[str, List[Shape]] = {}
+        for idx, raw in enumerate(primitives):
+            primitive = PrimitiveSchema(**raw)
+            kind = primitive.kind
+            if kind in SHAPE_KINDS:
+                if not primitive.block:
+                    raise ValueError(f"Primitive {idx} ({kind}) has no block.")
+                start = (primitive.x1, primitive.y1, primitive.z1)
+                end = (primitive.x2, primitive.y2, primitive.z2)
+                if kind == "plane" and all(a != b for a, b in zip(start, end)):
+                    raise ValueError(f"Primitive {idx} plane must be flat along one axis.")
+                new_shapes = [Shape(kind, primitive.block, start, end)]
+            elif kind in TRANSFORM_KINDS:
+                source = groups.get(primitive.source or "")
+                if source is None:
+                    raise ValueError(f"Primitive {idx} ({kind}) references unknown group {primitive.source}.")
+                if kind == "copy":
+                    new_shapes = [shape.moved(primitive.dx, primitive.dy, primitive.dz) for shape in source]
+                elif kind == "repeat":
+                    if primitive.count < 1:
+                        raise ValueError(f"Primitive {idx} repeat count must be at least 1.")
+                    new_shapes = [
+                        shape.moved(primitive.dx * n, primitive.dy * n, primitive.dz * n)
+                        for n in range(1, primitive.count + 1)
+                        for shape in source
+                    ]
+                else:
+                    if primitive.axis not in ("x", "y", "z"):
+                        raise ValueError(f"Primitive {idx} mirror axis must be x, y or z.")
+                    axis = "xyz".index(primitive.axis)
+                    new_shapes = [shape.mirrored(axis, primitive.pivot) for shape in source]
+            else:
+                raise ValueError(f"Primitive {idx} has unknown kind: {kind}.")
+            shapes.extend(new_shapes)
+            if primitive.group:
+                groups.setdefault(primitive.group, []).extend(new_shapes)
+        return cls(shapes, primitives)
+
+    def __len__(self) -> int:
+        """Blocks written, counting overlaps between shapes more than once."""
+        return sum(shape.volume() for shape in self.shapes)
+
+    def validate(self, size: Tuple[int, int, int], palette: Sequence[str], max_blocks: int) -> Optional[str]:
+        """Checks bounds, palette and block budget per shape without expanding them."""
+        total = len(self)
+        if total > max_blocks:
+            return f"Plan has too many blocks ({total} > {max_blocks})."
+        palette_set = set(palette)
+        for idx, shape in enumerate(self.shapes):
+            low, high = shape.min_corner, shape.max_corner
+            if any(v < 0 for v in low) or any(v >= limit for v, limit in zip(high, size)):
+                return f"Shape {idx} ({shape.kind}) out of bounds {low}..{high}."
+            if shape.block not in palette_set:
+                return f"Shape {idx} ({shape.kind}) uses disallowed block: {shape.block}."
+        return None
+
+    def cells(self) -> Iterator[Tuple[int, int, int, str]]:
+        """Lazily yields (x, y, z, block) in shape order; later shapes overwrite earlier ones."""
+        for shape in self.shapes:
+            for x, y, z in shape.cells():
+                yield x, y, z, shape.block
+
+    def _overlapping(self) -> bool:
+        for i, a in enumerate(self.shapes):
+            a_min, a_max = a.min_corner, a.max_corner
+            for b in self.shapes[i + 1:]:
+                b_min, b_max = b.min_corner, b.max_corner
+                if all(a_min[k] <= b_max[k] and b_min[k] <= a_max[k] for k in range(3)):
+                    return True
+        return False
+
+    def compile(self, merge: bool = True, volume_limit: int = FILL_VOLUME_LIMIT) -> CompiledPlan:
+        """
+        Turns shapes straight into fill commands when no two shapes overlap (so
+        order does not matter); otherwise expands and merges via compile_plan.
+        """
+        if not merge or self._overlapping() or any(
+            shape.kind == "line" and not shape.boxes() for shape in self.shapes
+        ):
+            return compile_plan(self, merge=merge, volume_limit=volume_limit)
+        commands = []
+        for shape in self.shapes:
+            for box_min, box_max in shape.boxes():
+                commands.extend(split_box(box_min, box_max, shape.block, volume_limit))
+        return CompiledPlan(commands=commands, ops_in=len(self))
+
+    def to_dicts(self) -> List[Dict]:
+        return list(self.primitives)
@@ -0,0 +1,63 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class AdaptiveThrottle:
+    """
+    AIMD controller for how fast Builder sends command batches.
+    The rate (batches per second) grows additively while round trips stay under
+    target_rtt and the server keeps up (tps >= min_tps), and is cut
+    multiplicatively as soon as either signal shows lag.
+    """
+    def __init__(
+        self,
+        initial_delay: float = 0.05,
+        min_delay: float = 0.001,
+        max_delay: float = 1.0,
+        target_rtt: float = 0.25,
+        min_tps: float = 18.0,
+        increase: float = 2.0,
+        decrease: float = 0.5,
+        history_size: int = 512,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.target_rtt = target_rtt
+        self.min_tps = min_tps
+        self.increase = increase  # Batches/sec added per healthy sample
+        self.decrease = decrease  # Rate multiplier when lag is detected
+        self.rate = self._clamp(1.0 / max(initial_delay, min_delay))
+        self.history: Deque[Dict[str, Optional[float]]] = deque(maxlen=history_size)
+
+    @property
+    def delay(self) -> float:
+        """Seconds to wait between batches at the current rate."""
+        return 1.0 / self.rate
+
+    def record(self, rtt: Optional[float], tps: Optional[float] = None) -> float:
+        """Feeds one measurement and returns the new delay."""
+        lagging = (rtt is not None and rtt > self.target_rtt) or (tps is not None and tps < self.min_tps)
+        if lagging:
+            self.rate = self._clamp(self.rate * self.decrease)
+        else:
+            self.rate = self._clamp(self.rate + self.increase)
+        self.history.append({
+            "time": time.time(),
+            "rate": self.rate,
+            "delay": self.delay,
+            "rtt": rtt,
+            "tps": tps,
+        })
+        return self.delay
+
+    def snapshot(self) -> Dict[str, object]:
+        """Current state plus recorded samples, for dashboards."""
+        return {
+            "rate": self.rate,
+            "delay": self.delay,
+            "history": list(self.history),
+        }
+
+    def _clamp(self, rate: float) -> float:
+        return max(1.0 / self.max_delay, min(1.0 / self.min_delay, rate))
@@ -0,0 +1,172 @@
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SNAPSHOT_DIR = ".build_snapshots"
+
+
+class RegionSnapshot:
+    """
+    The blocks in a box before a build, as full block-state ids (so stairs,
+    doors and logs keep their facing), palette-indexed and run-length encoded
+    over the [y, z, x] cell order. runs is a flat [palette_index, length, ...]
+    list, so a mostly-air region stores a handful of numbers.
+    """
+    def __init__(
+        self,
+        build_id: str,
+        bounds_min: Tuple[int, int, int],
+        size: Tuple[int, int, int],
+        palette: List[str],
+        runs: List[int],
+        created: Optional[float] = None,
+    ):
+        self.build_id = build_id
+        self.bounds_min = tuple(bounds_min)
+        self.size = tuple(size)
+        self.palette = list(palette)
+        self.runs = list(runs)
+        self.created = time.time() if created is None else created
+
+    @classmethod
+    def capture(
+        cls,
+        build_id: str,
+        blocks: Dict[Tuple[int, int, int], str],
+        bounds_min: Tuple[int, int, int],
+        bounds_max: Tuple[int, int, int],
+    ) -> "RegionSnapshot":
+        """Encodes a read_region(full_state=True) result; cells missing from it count as air."""
+        size = tuple(hi - lo + 1 for lo, hi in zip(bounds_min, bounds_max))
+        width, height, length = size
+        base_x, base_y, base_z = bounds_min
+        palette = ["minecraft:air"]
+        index = {"minecraft:air": 0}
+        grid = np.zeros((height, length, width), dtype=np.uint16)
+        for (x, y, z), block in blocks.items():
+            name = block if ":" in block else f"minecraft:{block}"
+            block_id = index.get(name)
+            if block_id is None:
+                block_id = index[name] = len(palette)
+                palette.append(name)
+            grid[y - base_y, z - base_z, x - base_x] = block_id
+        return cls(build_id, bounds_min, size, palette, _encode_runs(grid.ravel()))
+
+    def grid(self) -> np.ndarray:
+        """Decoded [y, z, x] array of palette indices."""
+        values = np.asarray(self.runs[0::2], dtype=np.uint16)
+        lengths = np.asarray(self.runs[1::2], dtype=np.int64)
+        width, height, length = self.size
+        return np.repeat(values, lengths).reshape(height, length, width)
+
+    def __len__(self) -> int:
+        width, height, length = self.size
+        return width * height * length
+
+    def cells(self) -> Iterator[Tuple[int, int, int, str]]:
+        """Yields (x, y, z, block) relative to bounds_min, including air."""
+        grid = self.grid()
+        ys, zs, xs = np.indices(grid.shape)
+        for x, y, z, block_id in zip(xs.ravel(), ys.ravel(), zs.ravel(), grid.ravel()):
+            yield int(x), int(y), int(z), self.palette[block_id]
+
+    def to_dict(self) -> Dict:
+        return {
+            "build_id": self.build_id,
+            "created": self.created,
+            "bounds_min": list(self.bounds_min),
+            "size": list(self.size),
+            "palette": self.palette,
+            "runs": self.runs,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RegionSnapshot":
+        return cls(
+            data["build_id"], data["bounds_min"], data["size"], data["palette"], data["runs"], data.get("created")
+        )
+
+
+def _encode_runs(values: np.ndarray) -> List[int]:
+    if values.size == 0:
+        return []
+    starts = np.flatnonzero(np.diff(values)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.concatenate((starts, [values.size])))
+    runs = np.empty(starts.size * 2, dtype=np.int64)
+    runs[0::2] = values[starts]
+    runs[1::2] = lengths
+    return runs.tolist()
+
+
+class SnapshotStore:
+    """
+    Pre-build snapshots on disk, one JSON file per build id. Beyond
+    max_snapshots or max_bytes the oldest snapshots are deleted, though the
+    newest one is always kept.
+    """
+    def __init__(
+        self,
+        directory: str = DEFAULT_SNAPSHOT_DIR,
+        max_snapshots: int = 16,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.max_snapshots = max_snapshots
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, build_id: str) -> str:
+        return os.path.join(self.directory, f"{build_id}.json")
+
+    def put(self, snapshot: RegionSnapshot) -> None:
+        tmp_path = self._path(snapshot.build_id) + ".tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(snapshot.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, self._path(snapshot.build_id))
+        self._evict()
+
+    def get(self, build_id: str) -> Optional[RegionSnapshot]:
+        try:
+            with open(self._path(build_id), encoding='utf-8') as f:
+                return RegionSnapshot.from_dict(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, build_id: str) -> None:
+        try:
+            os.remove(self._path(build_id))
+        except FileNotFoundError:
+            pass
+
+    def build_ids(self) -> List[str]:
+        """Stored build ids, oldest first."""
+        return [os.path.basename(path)[:-len(".json")] for _, _, path in self._entries()]
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        while len(entries) > 1 and (len(entries) > self.max_snapshots or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TEMPLATE_DIR = ".templates"
+ROTATIONS = (0, 90, 180, 270)  # Clockwise, seen from above
+MIRRORS = (None, "x", "z")  # Axis whose coordinates are flipped
+
+_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass
+class Template:
+    """A finished build: where it stands in the world and its plan relative to bounds_min."""
+    name: str
+    bounds_min: Tuple[int, int, int]
+    bounds_max: Tuple[int, int, int]
+    cells: List[List]  # [x, y, z, block] rows, like the plan cache
+    created: float = field(default_factory=time.time)
+
+    @property
+    def size(self) -> Tuple[int, int, int]:
+        return tuple(hi - lo + 1 for lo, hi in zip(self.bounds_min, self.bounds_max))
+
+    def transformed_size(self, rotation: int = 0) -> Tuple[int, int, int]:
+        width, height, length = self.size
+        return (length, height, width) if rotation in (90, 270) else (width, height, length)
+
+    def transformed_cells(self, rotation: int = 0, mirror: Optional[str] = None) -> List[Tuple[int, int, int, str]]:
+        """Cells mirrored, then rotated about the y axis, relative to the new min corner."""
+        if rotation not in ROTATIONS:
+            raise ValueError(f"rotation must be one of {ROTATIONS}, got {rotation}")
+        if mirror not in MIRRORS:
+            raise ValueError(f"mirror must be one of {MIRRORS}, got {mirror}")
+        width, _, length = self.size
+        cells = []
+        for x, y, z, block in self.cells:
+            if mirror == "x":
+                x = width - 1 - x
+            elif mirror == "z":
+                z = length - 1 - z
+            if rotation == 90:
+                x, z = length - 1 - z, x
+            elif rotation == 180:
+                x, z = width - 1 - x, length - 1 - z
+            elif rotation == 270:
+                x, z = z, width - 1 - x
+            cells.append((x, y, z, block))
+        return cells
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "created": self.created,
+            "bounds_min": list(self.bounds_min),
+            "bounds_max": list(self.bounds_max),
+            "cells": self.cells,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Template":
+        return cls(
+            data["name"], tuple(data["bounds_min"]), tuple(data["bounds_max"]), data["cells"], data.get("created", 0.0)
+        )
+
+
+class TemplateRegistry:
+    """Named templates on disk, one JSON file each."""
+    def __init__(self, directory: str = DEFAULT_TEMPLATE_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        if not _NAME.match(name):
+            raise ValueError(f"Template names may only use letters, digits, '.', '_' and '-': {name!r}")
+        return os.path.join(self.directory, f"{name}.json")
+
+    def put(self, template: Template) -> None:
+        path = self._path(template.name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(template.to_dict(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def get(self, name: str) -> Optional[Template]:
+        path = self._path(name)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return Template.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def delete(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def names(self) -> List[str]:
+        return sorted(name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json"))
@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from block_cache import BlockCache  # noqa: E402
+from minecraft_client import MinecraftClient  # noqa: E402
+
+
+def box(corner_min, corner_max, block):
+    return {
+        (x, y, z): block
+        for x in range(corner_min[0], corner_max[0] + 1)
+        for y in range(corner_min[1], corner_max[1] + 1)
+        for z in range(corner_min[2], corner_max[2] + 1)
+    }
+
+
+def cached_client(world):
+    """A MinecraftClient with a cache whose world reads come from a dict, recording each read."""
+    client = MinecraftClient.__new__(MinecraftClient)
+    client.cache = BlockCache(16)
+    client.reads = []
+
+    def read(corner_min, corner_max, full_state):
+        client.reads.append((corner_min, corner_max))
+        return {pos: world.get(pos, "air") for pos in box(corner_min, corner_max, None)}
+
+    client._read_region = read
+    return client
+
+
+def test_get_region_needs_every_block():
+    cache = BlockCache()
+    cache.put_blocks(box((0, 64, 0), (3, 65, 3), "minecraft:stone"))
+    assert cache.get_region((0, 64, 0), (3, 65, 3)) == box((0, 64, 0), (3, 65, 3), "stone")
+    assert cache.get_region((0, 64, 0), (3, 66, 3)) is None
+    assert cache.stats()["hits"] == 32
+
+
+def test_read_region_fills_the_cache_and_reads_only_uncached_chunks():
+    world = {(1, 64, 1): "stone", (20, 64, 1): "dirt"}
+    client = cached_client(world)
+    client.cache.put_region((0, 64, 0), (15, 64, 15), "minecraft:air")
+    client.cache.put(1, 64, 1, "minecraft:oak_stairs[facing=east]")
+
+    blocks = client.read_region((0, 64, 0), (20, 64, 2))
+    # Chunk column (0, 0) was fully cached, so only chunk column (1, 0) is read
+    assert client.reads == [((16, 64, 0), (20, 64, 2))]
+    assert blocks[(1, 64, 1)] == "oak_stairs"
+    assert blocks[(20, 64, 1)] == "dirt"
+    assert len(blocks) == 21 * 3
+
+    client.read_region((0, 64, 0), (20, 64, 2))
+    assert len(client.reads) == 1  # Served from the cache entirely
+
+
+def test_full_state_reads_always_go_to_the_world():
+    client = cached_client({})
+    client.cache.put_region((0, 64, 0), (2, 64, 2), "minecraft:stone")
+    client.read_region((0, 64, 0), (2, 64, 2), full_state=True)
+    assert len(client.reads) == 1
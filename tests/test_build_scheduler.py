@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "sim"))  # Simulated minescript wins over any real one
+os.environ.setdefault("OPENAI_API_KEY", "offline-test")  # Never used; planning is stubbed
+
+import minescript  # noqa: E402
+import listener  # noqa: E402
+from build_scheduler import BuildScheduler  # noqa: E402
+from builder import BlockOp, Builder  # noqa: E402
+from minecraft_client import MinecraftClient  # noqa: E402
+
+PORT = 25581
+PLANNING_SECONDS = {"slow stone": 0.5, "fast dirt": 0.0}
+SHARED_CELL = (1, 64, 1)  # Inside both builds' bounds
+
+
+class StubPlanner(Builder):
+    """Plans one block at SHARED_CELL, taking PLANNING_SECONDS[prompt] to do it."""
+    def plan(self, prompt, bounds_min, bounds_max, palette, **options):
+        time.sleep(PLANNING_SECONDS[prompt])
+        x, y, z = (c - lo for c, lo in zip(SHARED_CELL, bounds_min))
+        return [BlockOp(x=x, y=y, z=z, block=palette[0])]
+
+
+def start_listener(tmp_path):
+    listener.PORT = PORT
+    listener.jobs = listener.JobRunner(str(tmp_path / "jobs"))
+    threading.Thread(target=listener.start_server, daemon=True).start()
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        try:
+            MinecraftClient(port=PORT).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Listener did not start")
+
+
+def test_overlapping_builds_place_in_submission_order(tmp_path):
+    start_listener(tmp_path)
+    minescript.reset()
+    with BuildScheduler(
+        client_factory=lambda: MinecraftClient(port=PORT),
+        pool_size=2,
+        builder_factory=StubPlanner,
+        cache_plans=False,
+    ) as scheduler:
+        first = scheduler.submit("slow stone", (0, 64, 0), (2, 66, 2), ["minecraft:stone"])
+        second = scheduler.submit("fast dirt", (1, 64, 1), (3, 66, 3), ["minecraft:dirt"])
+        scheduler.wait(timeout=30)
+    assert first.status == second.status == "done"
+    # The later build planned first but still waited for the earlier one's region
+    assert second.placement_started >= first.finished
+    assert minescript.getblock(*SHARED_CELL) == "minecraft:dirt"
+
+
+class HierarchicalStub(Builder):
+    """Plans two full 512-op regions and records what would be placed."""
+    placed = []
+
+    def plan(self, prompt, bounds_min, bounds_max, palette, **options):
+        assert options["hierarchical"]
+        return [BlockOp(x=x, y=y, z=z, block=palette[0]) for y in range(2) for z in range(16) for x in range(32)]
+
+    def _place(self, plan, *args):
+        HierarchicalStub.placed.append(len(plan))
+
+
+def test_hierarchical_plan_larger_than_max_blocks_is_placed():
+    with BuildScheduler(
+        client_factory=lambda: SimpleNamespace(close=lambda: None),  # Nothing is sent
+        pool_size=1,
+        builder_factory=HierarchicalStub,
+        cache_plans=False,
+        max_blocks=600,
+        region_max_blocks=512,
+        max_regions=2,
+    ) as scheduler:
+        build = scheduler.submit("town", (0, 64, 0), (31, 65, 15), ["minecraft:stone"], hierarchical=True)
+        scheduler.wait(timeout=30)
+    assert build.status == "done"
+    assert HierarchicalStub.placed == [1024]
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from builder import BlockOp, Builder  # noqa: E402
+from templates import TemplateRegistry  # noqa: E402
+
+BOUNDS_MIN, BOUNDS_MAX = (0, 64, 0), (31, 65, 15)
+PALETTE = ["minecraft:stone"]
+
+
+def offline_builder(**options):
+    """A Builder with no listener whose placements are recorded instead of executed."""
+    builder = Builder(None, cache_plans=False, **options)
+    builder.placed = []
+    builder._place = lambda plan, *args: builder.placed.append(plan)
+    return builder
+
+
+def two_region_plan():
+    return [BlockOp(x=x, y=y, z=z, block="minecraft:stone") for y in range(2) for z in range(16) for x in range(32)]
+
+
+def test_hierarchical_plan_is_checked_against_the_region_budget():
+    builder = offline_builder(max_blocks=600, region_max_blocks=512, max_regions=2)
+    plan = two_region_plan()
+    with pytest.raises(ValueError, match="too many ops"):
+        builder.build("hut", BOUNDS_MIN, BOUNDS_MAX, PALETTE, plan=plan)
+    builder.build("hut", BOUNDS_MIN, BOUNDS_MAX, PALETTE, plan=plan, hierarchical=True)
+    assert builder.placed == [plan]
+
+
+def test_register_template_follows_an_async_build(tmp_path):
+    builder = Builder(None, cache_plans=False, template_registry=TemplateRegistry(str(tmp_path)))
+    builder._submit_plan = lambda compiled, bounds_min, move_agent: "job"
+    first = [BlockOp(x=0, y=0, z=0, block="minecraft:stone")]
+    second = [BlockOp(x=1, y=0, z=0, block="minecraft:dirt")]
+    builder.build("a", (0, 64, 0), (1, 64, 0), ["minecraft:stone"], plan=first, async_submit=True)
+    builder.build("b", (10, 64, 0), (11, 64, 0), ["minecraft:dirt"], plan=second, async_submit=True)
+    template = builder.register_template("shed")
+    assert template.bounds_min == (10, 64, 0)
+    assert template.cells == [[1, 0, 0, "minecraft:dirt"]]
+
+
+REPAIR_SIZE = (4, 4, 4)
+REPAIR_PALETTE = ["minecraft:stone", "minecraft:oak_planks"]
+
+
+def plan_with_two_bad_ops():
+    plan = [BlockOp(x=x, y=0, z=z, block="minecraft:stone") for x in range(4) for z in range(2)]
+    plan.insert(2, BlockOp(x=7, y=1, z=-1, block="minecraft:oak_planks"))  # Out of bounds
+    plan.append(BlockOp(x=1, y=1, z=1, block="oak_plank"))  # Not in the palette
+    return plan
+
+
+def validated(builder, plan):
+    state = {
+        "prompt": "hut", "plan": plan, "size": REPAIR_SIZE, "palette": REPAIR_PALETTE,
+        "max_blocks": 100, "attempts": 0,
+    }
+    state.update(builder._validate_plan_node(state))
+    return state
+
+
+def valid_ops(plan):
+    return [op for op in plan if 0 <= op.x < 4 and 0 <= op.z < 4 and op.block == "minecraft:stone"]
+
+
+@pytest.mark.parametrize("policy, fixed", [
+    ("clamp", [
+        BlockOp(x=3, y=1, z=0, block="minecraft:oak_planks"),
+        BlockOp(x=1, y=1, z=1, block="minecraft:oak_planks"),
+    ]),
+    ("drop", []),
+])
+def test_local_repair_policies_fix_only_the_invalid_ops(policy, fixed):
+    builder = Builder(None, cache_plans=False, repair_policy=policy)
+    plan = plan_with_two_bad_ops()
+    state = validated(builder, plan)
+    assert [idx for idx, _ in state["violations"]] == [2, 9]
+    assert builder._route_after_validate(state) == "repair"
+    repaired = builder._repair_plan(state)["plan"]
+    assert valid_ops(repaired) == valid_ops(plan)
+    assert [op for op in repaired if op not in valid_ops(plan)] == fixed
+
+
+def test_model_repair_sends_only_the_invalid_ops():
+    builder = Builder(None, cache_plans=False, repair_policy="model")
+    plan = plan_with_two_bad_ops()
+    state = validated(builder, plan)
+    asked = {}
+
+    def fix(state, ops, bad):
+        asked.update(bad)
+        return {2: BlockOp(x=0, y=1, z=0, block="minecraft:oak_planks")}  # Op 9 gets no fix, so it is dropped
+
+    builder._call_llm_for_repair = fix
+    assert builder._route_after_validate(state) == "repair"
+    update = builder._repair_plan(state)
+    assert sorted(asked) == [2, 9]
+    assert update["attempts"] == 1
+    assert update["plan"] == plan[:2] + [BlockOp(x=0, y=1, z=0, block="minecraft:oak_planks")] + plan[3:9]
+
+
+def test_redraft_and_widespread_errors_skip_repair():
+    plan = plan_with_two_bad_ops()
+    builder = Builder(None, cache_plans=False, repair_policy="redraft")
+    assert builder._route_after_validate(validated(builder, plan)) == "retry"
+    builder = Builder(None, cache_plans=False, repair_policy="clamp", max_repair_fraction=0.1)
+    assert builder._route_after_validate(validated(builder, plan)) == "retry"
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from execution_planner import hilbert_index, order_for_locality, plan_moves  # noqa: E402
+from plan_compiler import PlanCommand  # noqa: E402
+
+
+def cell(x, y, z, block="minecraft:stone"):
+    return PlanCommand((x, y, z), (x, y, z), block)
+
+
+def test_hilbert_order_visits_every_cell_once_stepping_to_neighbours():
+    order = 8
+    path = sorted(((x, z) for x in range(order) for z in range(order)), key=lambda c: hilbert_index(*c, order))
+    assert sorted(hilbert_index(x, z, order) for x, z in path) == list(range(order * order))
+    # Consecutive cells along the curve are always adjacent
+    assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+
+
+def test_layers_go_bottom_up_with_supported_blocks_last():
+    commands = [
+        cell(0, 1, 0),
+        cell(3, 0, 3, "minecraft:torch"),
+        cell(3, 0, 0),
+        cell(0, 0, 0, "minecraft:oak_door"),
+        cell(0, 0, 3),
+    ]
+    ordered = order_for_locality(commands)
+    assert [(cmd.min_corner, cmd.block.split(":")[-1]) for cmd in ordered] == [
+        ((0, 0, 3), "stone"),
+        ((3, 0, 0), "stone"),
+        ((0, 0, 0), "oak_door"),
+        ((3, 0, 3), "torch"),
+        ((0, 1, 0), "stone"),
+    ]
+
+
+def test_teleports_only_when_the_next_box_is_out_of_reach():
+    boxes = [
+        ((0, 64, 0), (0, 64, 0)),
+        ((2, 64, 0), (2, 64, 0)),  # Within reach of the first stand point
+        ((20, 64, 0), (22, 64, 0)),  # Far away
+        ((20, 64, 2), (20, 64, 2)),
+    ]
+    moves = plan_moves(boxes, reach=4.5)
+    assert moves == [(0, 66, 0), None, (20, 66, 0), None]
+    # Starting next to the first box skips its teleport too
+    assert plan_moves(boxes[:1], reach=4.5, start=(0.5, 65.0, 0.5)) == [None]
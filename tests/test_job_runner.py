@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "sim"))  # Simulated minescript wins over any real one
+
+import listener  # noqa: E402
+
+COMMANDS = [{"method": "place_block", "params": [x, 64, 0, "minecraft:stone"]} for x in range(10)]
+
+
+def test_cancel_deletes_checkpoint(tmp_path):
+    runner = listener.JobRunner(str(tmp_path))
+    runner.submit("hut", COMMANDS)
+    assert sorted(os.listdir(tmp_path)) == ["hut.commands.json", "hut.state.json"]
+    assert runner.cancel("hut")["status"] == "cancelled"
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError):
+        runner.resume("hut")
+
+
+def test_load_drops_stale_cancelled_checkpoints(tmp_path):
+    state = {"status": "cancelled", "next_index": 3, "commands_per_tick": 8, "errors": []}
+    (tmp_path / "old.state.json").write_text(json.dumps(state))
+    (tmp_path / "old.commands.json").write_text(json.dumps(COMMANDS))
+    runner = listener.JobRunner(str(tmp_path))
+    runner.load()
+    assert runner.jobs == {}
+    assert os.listdir(tmp_path) == []
+
+
+def test_busy_session_cannot_starve_a_job(tmp_path, monkeypatch):
+    runner = listener.JobRunner(str(tmp_path))
+    monkeypatch.setattr(listener, "jobs", runner)
+    executor = listener.CommandExecutor()
+    session = listener.ClientSession(None, ("127.0.0.1", 1))
+    executor.add_session(session)
+    for x in range(50):
+        executor.submit(session, {"method": "ping", "id": x})
+    runner.submit("hut", COMMANDS)
+    picked = [executor._next_command() for _ in range(4)]
+    # The job gets its slot once per cycle over the sessions, between their commands
+    assert [item and item[1]["id"] for item in picked] == [0, None, 1, None]
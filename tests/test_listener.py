@@ -0,0 +1,47 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "sim"))  # Simulated minescript wins over any real one
+
+import listener  # noqa: E402
+
+
+def run(method, *params, session=None):
+    return listener.handle_command({"method": method, "params": list(params)}, session)
+
+
+def test_fills_are_recorded_on_the_ledger(monkeypatch):
+    executed = []
+    monkeypatch.setattr(listener, "game_execute", executed.append)
+    session = SimpleNamespace(ledger=listener.InventoryLedger("build"))
+    run("fill_region", 0, 64, 0, 1, 65, 1, "minecraft:stone", session=session)
+    run("fill_region", 0, 66, 0, 1, 66, 1, "minecraft:air", session=session)  # Clearing uses nothing
+    run("place_block", 0, 67, 0, "stone", session=session)
+    assert session.ledger.pending == {"minecraft:stone": 9}
+    executed.clear()
+    assert session.ledger.settle() == {"minecraft:stone": 9}
+    assert executed == ["give @p minecraft:stone 9", "clear @p minecraft:stone 9"]
+
+
+def test_large_settlements_are_split_into_give_sized_commands(monkeypatch):
+    executed = []
+    monkeypatch.setattr(listener, "game_execute", executed.append)
+    ledger = listener.InventoryLedger("build")
+    ledger.record("minecraft:stone", listener.GIVE_LIMIT + 5)
+    ledger.settle()
+    assert executed == [
+        f"give @p minecraft:stone {listener.GIVE_LIMIT}", f"clear @p minecraft:stone {listener.GIVE_LIMIT}",
+        "give @p minecraft:stone 5", "clear @p minecraft:stone 5",
+    ]
+
+
+def test_verify_region_rejects_oversized_requests(monkeypatch):
+    monkeypatch.setattr(listener, "READ_VOLUME_LIMIT", 2)
+    with pytest.raises(ValueError, match="exceeds limit"):
+        run("verify_region", [0, 64, 0], ["minecraft:stone"], [0, 0, 0, 0] * 3)
+    assert run("verify_region", [0, 64, 0], ["minecraft:air"], [0, 0, 0, 0] * 2) == []
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics  # noqa: E402
+import minecraft_client  # noqa: E402
+from minecraft_client import AsyncMinecraftClient, MinecraftClient  # noqa: E402
+
+
+def flaky_client():
+    """A MinecraftClient whose first request loses the connection and later ones succeed."""
+    client = MinecraftClient.__new__(MinecraftClient)
+    client.metrics = Metrics()
+    client.cache = None
+    client.sent = []
+    client.connect = lambda: None
+
+    def submit(method, *params):
+        client.sent.append(method)
+        future = Future()
+        if len(client.sent) == 1:
+            future.set_exception(ConnectionError("Server closed connection"))
+        else:
+            future.set_result(True)
+        return future
+
+    client.submit = submit
+    return client
+
+
+def test_idempotent_commands_are_retried_after_a_reconnect():
+    client = flaky_client()
+    assert client.fill_region(0, 64, 0, 1, 64, 1, "minecraft:stone") is True
+    assert client.sent == ["fill_region", "fill_region"]
+
+
+@pytest.mark.parametrize("method, params", [
+    ("place_block", (0, 64, 0, "minecraft:stone")),
+    ("batch", ([{"method": "place_block", "params": [0, 64, 0, "minecraft:stone"]}],)),
+])
+def test_placements_are_not_replayed_after_a_reconnect(method, params):
+    client = flaky_client()
+    with pytest.raises(ConnectionError):
+        client._send_command(method, *params)
+    assert client.sent == [method]
+    assert client.metrics.snapshot()["counters"] == [{"name": "reconnects_total", "labels": {}, "value": 1}]
+
+
+def test_bad_response_fails_pending_requests_and_disconnects():
+    async def scenario():
+        async def serve(reader, writer):
+            await reader.readline()  # Handshake
+            writer.write(b'{"id": 0, "status": "success", "result": "pong"}\n')
+            await reader.readline()
+            writer.write(b"not json\n")
+            await writer.drain()
+            await reader.read()
+
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = AsyncMinecraftClient(port=port, protocols=["json"])
+        await client.connect()
+        with pytest.raises(ConnectionError, match="Invalid response"):
+            await asyncio.wait_for(client.send_command("get_position"), timeout=5)
+        await asyncio.sleep(0)
+        assert not client.connected
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(client.send_command("get_position"), timeout=5)
+        await client.close()
+        server.close()
+
+    asyncio.run(scenario())
+
+
+def test_verify_region_is_sent_in_read_sized_chunks(monkeypatch):
+    monkeypatch.setattr(minecraft_client, "READ_VOLUME_LIMIT", 4)
+    client = MinecraftClient.__new__(MinecraftClient)
+    client.cache = None
+    requests = []
+
+    def send(method, origin, palette, flat):
+        requests.append(len(flat) // 4)
+        # Report the first cell of every request as dirt
+        dx, dy, dz, index = flat[:4]
+        return [[origin[0] + dx, origin[1] + dy, origin[2] + dz, palette[index], "dirt"]]
+
+    client._send_command = send
+    cells = [(x, 64, 0, "minecraft:stone") for x in range(10)]
+    mismatches = client.verify_region((0, 64, 0), cells)
+    assert requests == [4, 4, 2]
+    assert [m[0] for m in mismatches] == [0, 4, 8]
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_cache import PlanCache  # noqa: E402
+
+OPS = [[0, 0, 0, "minecraft:stone"], [1, 0, 0, "minecraft:oak_planks"]]
+
+
+def test_key_depends_on_every_part():
+    key = PlanCache.make_key("gpt", "system", "hut 5x5x5 [stone]")
+    assert key == PlanCache.make_key("gpt", "system", "hut 5x5x5 [stone]")
+    assert len({
+        key,
+        PlanCache.make_key("other", "system", "hut 5x5x5 [stone]"),
+        PlanCache.make_key("gpt", "system", "hut 6x5x5 [stone]"),
+        PlanCache.make_key("gpt", "system", "hut 5x5x5 [dirt]"),
+        # Parts are separated, so moving text between them changes the key
+        PlanCache.make_key("gpts", "ystem", "hut 5x5x5 [stone]"),
+    }) == 5
+
+
+def test_put_get_delete(tmp_path):
+    cache = PlanCache(str(tmp_path))
+    key = PlanCache.make_key("gpt", "system", "hut")
+    assert cache.get(key) is None
+    cache.put(key, OPS)
+    assert cache.get(key) == OPS
+    cache.delete(key)
+    assert cache.get(key) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_stale_entries_are_purged_on_lookup(tmp_path):
+    cache = PlanCache(str(tmp_path), ttl_seconds=60)
+    key = PlanCache.make_key("gpt", "system", "hut")
+    cache.put(key, OPS)
+    path = tmp_path / f"{key}.json"
+    entry = json.loads(path.read_text())
+    entry["created"] -= 120
+    path.write_text(json.dumps(entry))
+    assert cache.get(key) is None
+    assert not path.exists()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PlanCache(str(tmp_path), max_entries=2)
+    keys = [PlanCache.make_key("gpt", "system", f"hut {i}") for i in range(3)]
+    cache.put(keys[0], OPS)
+    cache.put(keys[1], OPS)
+    os.utime(tmp_path / f"{keys[1]}.json", (1, 1))  # Oldest use
+    cache.put(keys[2], OPS)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == cache.get(keys[2]) == OPS
+    assert cache.stats()["evictions"] == 1
+    cache.purge()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,63 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from builder import BlockOp  # noqa: E402
+from plan_compiler import compile_plan, split_box  # noqa: E402
+
+
+def placed(compiled):
+    """{cell: block} the compiled commands would leave behind, run in order."""
+    world = {}
+    for command in compiled.commands:
+        for cell in command.cells():
+            world[cell] = command.block
+    return world
+
+
+def hut_ops():
+    ops = [
+        BlockOp(x=x, y=y, z=z, block="minecraft:stone")
+        for y in range(3) for z in range(4) for x in range(5)
+    ]
+    ops.append(BlockOp(x=2, y=1, z=0, block="minecraft:oak_door"))  # Overwrites a stone op
+    ops.append(BlockOp(x=9, y=0, z=9, block="minecraft:stone"))  # Not adjacent to the rest
+    return ops
+
+
+def test_merged_commands_place_exactly_the_last_write_per_cell():
+    ops = hut_ops()
+    expected = {(op.x, op.y, op.z): op.block for op in ops}
+    compiled = compile_plan(ops)
+    assert placed(compiled) == expected
+    # Boxes never overlap, so the order of commands cannot change the result
+    assert sum(command.volume for command in compiled.commands) == len(expected)
+    assert compiled.commands_out < len(ops)
+    assert sorted(idx for command in compiled.commands for idx in command.op_indices) == sorted(
+        max(i for i, op in enumerate(ops) if (op.x, op.y, op.z) == cell) for cell in expected
+    )
+
+
+def test_volume_limit_is_respected():
+    ops = [BlockOp(x=x, y=0, z=z, block="minecraft:stone") for z in range(6) for x in range(6)]
+    compiled = compile_plan(ops, volume_limit=8)
+    assert all(command.volume <= 8 for command in compiled.commands)
+    assert placed(compiled) == {(op.x, op.y, op.z): op.block for op in ops}
+
+
+def test_merge_disabled_keeps_one_command_per_cell_in_write_order():
+    ops = hut_ops()
+    compiled = compile_plan(ops, merge=False)
+    assert all(command.volume == 1 for command in compiled.commands)
+    assert placed(compiled) == {(op.x, op.y, op.z): op.block for op in ops}
+    indices = [command.op_indices[0] for command in compiled.commands]
+    assert indices == sorted(indices)
+
+
+def test_split_box_covers_the_box_under_the_limit():
+    for box_max in ((9, 9, 9), (20, 1, 4)):  # Slabs, then z-rows once a layer is over the limit
+        commands = split_box((0, 0, 0), box_max, "minecraft:stone", volume_limit=50)
+        assert all(command.volume <= 50 for command in commands)
+        cells = [cell for command in commands for cell in command.cells()]
+        assert len(cells) == len(set(cells)) == (box_max[0] + 1) * (box_max[1] + 1) * (box_max[2] + 1)
@@ -0,0 +1,37 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_stream import IncrementalOpParser  # noqa: E402
+
+OPS = [
+    {"x": 0, "y": 0, "z": 0, "block": "minecraft:stone"},
+    {"x": 1, "y": 0, "z": 0, "block": "minecraft:oak_sign", "note": "say \"{hi}\" ]"},  # Braces inside strings
+    {"x": 2, "y": 0, "z": 0, "block": "minecraft:dirt", "extra": {"nested": [1, 2]}},
+]
+DOCUMENT = json.dumps({"reasoning": "a {tiny} hut", "ops": OPS, "done": True})
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, len(DOCUMENT)])
+def test_chunked_input_yields_every_op_once(chunk_size):
+    parser = IncrementalOpParser()
+    ops = []
+    for start in range(0, len(DOCUMENT), chunk_size):
+        ops.extend(parser.feed(DOCUMENT[start:start + chunk_size]))
+    assert ops == OPS
+    assert parser.finished
+
+
+def test_ops_are_returned_as_soon_as_they_close():
+    parser = IncrementalOpParser()
+    first = json.dumps(OPS[0])
+    assert parser.feed('{"ops": [' + first[:-1]) == []
+    assert parser.feed("}, ") == [OPS[0]]
+    assert not parser.finished
+    assert parser.feed(json.dumps(OPS[1]) + "]") == [OPS[1]]
+    assert parser.finished
+    assert parser.feed(', "more": [{"x": 9}]}') == []
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from builder import Builder  # noqa: E402
+from primitives import PrimitivePlan, Shape  # noqa: E402
+
+STONE = "minecraft:stone"
+
+
+def box_cells(corner_min, corner_max):
+    return {
+        (x, y, z)
+        for x in range(corner_min[0], corner_max[0] + 1)
+        for y in range(corner_min[1], corner_max[1] + 1)
+        for z in range(corner_min[2], corner_max[2] + 1)
+    }
+
+
+def placed(compiled):
+    world = {}
+    for command in compiled.commands:
+        for cell in command.cells():
+            world[cell] = command.block
+    return world
+
+
+def test_walls_and_hollow_boxes_cover_their_shell_once():
+    walls = Shape("walls", STONE, (0, 0, 0), (4, 2, 3))
+    expected = box_cells((0, 0, 0), (4, 2, 3)) - box_cells((1, 0, 1), (3, 2, 2))
+    assert len(list(walls.cells())) == len(expected) == walls.volume()
+    assert set(walls.cells()) == expected
+
+    hollow = Shape("hollow_box", STONE, (4, 3, 3), (0, 0, 0))  # Corners in any order
+    expected = box_cells((0, 0, 0), (4, 3, 3)) - box_cells((1, 1, 1), (3, 2, 2))
+    assert len(list(hollow.cells())) == len(expected) == hollow.volume()
+    assert set(hollow.cells()) == expected
+
+
+def test_lines():
+    straight = Shape("line", STONE, (0, 0, 0), (0, 0, 5))
+    assert set(straight.cells()) == box_cells((0, 0, 0), (0, 0, 5))
+    diagonal = Shape("line", STONE, (0, 0, 0), (3, 3, 0))
+    assert diagonal.boxes() == []
+    assert list(diagonal.cells()) == [(0, 0, 0), (1, 1, 0), (2, 2, 0), (3, 3, 0)]
+    assert diagonal.volume() == 4
+
+
+def test_copies_mirrors_and_repeats_resolve_groups():
+    plan = PrimitivePlan.from_dicts([
+        {"kind": "line", "block": STONE, "x1": 0, "x2": 1, "group": "post"},
+        {"kind": "copy", "source": "post", "dz": 4},
+        {"kind": "mirror", "source": "post", "axis": "x", "pivot": 9},
+        {"kind": "repeat", "source": "post", "dy": 2, "count": 2},
+    ])
+    assert [(shape.min_corner, shape.max_corner) for shape in plan.shapes] == [
+        ((0, 0, 0), (1, 0, 0)),
+        ((0, 0, 4), (1, 0, 4)),
+        ((8, 0, 0), (9, 0, 0)),
+        ((0, 2, 0), (1, 2, 0)),
+        ((0, 4, 0), (1, 4, 0)),
+    ]
+    with pytest.raises(ValueError, match="unknown group"):
+        PrimitivePlan.from_dicts([{"kind": "copy", "source": "missing"}])
+
+
+@pytest.mark.parametrize("primitives", [
+    # Disjoint shapes compile straight to fills
+    [
+        {"kind": "hollow_box", "block": STONE, "x2": 6, "y2": 4, "z2": 6},
+        {"kind": "plane", "block": "minecraft:oak_planks", "x1": 8, "x2": 12, "z2": 4},
+    ],
+    # Overlapping shapes go through compile_plan, and the later shape wins
+    [
+        {"kind": "box", "block": STONE, "x2": 6, "y2": 4, "z2": 6},
+        {"kind": "walls", "block": "minecraft:oak_planks", "x1": 1, "z1": 1, "x2": 5, "y2": 2, "z2": 5},
+        {"kind": "line", "block": "minecraft:glass", "x2": 3, "y2": 3},
+    ],
+])
+def test_compile_places_exactly_the_expanded_cells(primitives):
+    plan = PrimitivePlan.from_dicts(primitives)
+    expected = {}
+    for x, y, z, block in plan.cells():
+        expected[(x, y, z)] = block
+    assert placed(plan.compile()) == expected
+
+
+def test_primitive_block_budget_is_enforced():
+    plan = PrimitivePlan.from_dicts([{"kind": "box", "block": STONE, "x2": 9, "y2": 9, "z2": 9}])
+    assert plan.validate((10, 10, 10), [STONE], max_blocks=1000) is None
+    assert plan.validate((10, 10, 10), [STONE], max_blocks=999) == "Plan has too many blocks (1000 > 999)."
+
+    builder = Builder(None, cache_plans=False, max_blocks=10, primitive_max_blocks=999)
+    builder._place = lambda *args: None
+    with pytest.raises(ValueError, match="too many blocks"):
+        builder.build("cube", (0, 64, 0), (9, 73, 9), [STONE], plan=plan)
+    builder.primitive_max_blocks = 1000  # max_blocks does not apply to primitive plans
+    assert builder.build("cube", (0, 64, 0), (9, 73, 9), [STONE], plan=plan) is plan
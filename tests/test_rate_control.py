@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_control import AdaptiveThrottle  # noqa: E402
+
+
+def throttle(**options):
+    settings = {"initial_delay": 0.1, "min_delay": 0.01, "max_delay": 1.0, "increase": 2.0, "decrease": 0.5}
+    settings.update(options)
+    return AdaptiveThrottle(**settings)
+
+
+@pytest.mark.parametrize("rtt, tps", [(0.5, None), (0.1, 12.0), (0.5, 12.0)])
+def test_lag_halves_the_rate(rtt, tps):
+    control = throttle()
+    assert control.record(rtt, tps) == pytest.approx(0.2)
+    assert control.rate == pytest.approx(5.0)
+
+
+def test_healthy_samples_recover_additively():
+    control = throttle()
+    control.record(0.5)  # 10 -> 5 batches/s
+    rates = [1.0 / control.record(0.05, 20.0) for _ in range(3)]
+    assert rates == pytest.approx([7.0, 9.0, 11.0])
+    control.record(None, None)  # No measurement counts as healthy
+    assert control.rate == pytest.approx(13.0)
+
+
+def test_rate_stays_within_the_delay_clamps():
+    control = throttle()
+    for _ in range(100):
+        control.record(0.01, 20.0)
+    assert control.delay == pytest.approx(0.01)
+    for _ in range(100):
+        control.record(2.0, 5.0)
+    assert control.delay == pytest.approx(1.0)
+    assert AdaptiveThrottle(initial_delay=0.0, min_delay=0.01).delay == pytest.approx(0.01)
+
+
+def test_history_is_bounded():
+    control = throttle(history_size=3)
+    for rtt in (0.1, 0.5, 0.1, 0.5):
+        control.record(rtt)
+    snapshot = control.snapshot()
+    assert [sample["rtt"] for sample in snapshot["history"]] == [0.5, 0.1, 0.5]
+    assert snapshot["delay"] == snapshot["history"][-1]["delay"]
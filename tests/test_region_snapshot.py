@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from region_snapshot import RegionSnapshot, SnapshotStore  # noqa: E402
+
+BOUNDS_MIN = (10, 64, -5)
+BOUNDS_MAX = (13, 66, -3)
+
+
+def region():
+    """A full_state read of the bounds: stone floor, a stair, a door and air."""
+    blocks = {}
+    for x in range(BOUNDS_MIN[0], BOUNDS_MAX[0] + 1):
+        for y in range(BOUNDS_MIN[1], BOUNDS_MAX[1] + 1):
+            for z in range(BOUNDS_MIN[2], BOUNDS_MAX[2] + 1):
+                blocks[(x, y, z)] = "minecraft:stone" if y == 64 else "minecraft:air"
+    blocks[(11, 65, -4)] = "minecraft:oak_stairs[facing=east,half=top]"
+    blocks[(12, 65, -4)] = "oak_door[facing=north,half=lower]"  # No namespace
+    return blocks
+
+
+def absolute(snapshot):
+    base_x, base_y, base_z = snapshot.bounds_min
+    return {(base_x + x, base_y + y, base_z + z): block for x, y, z, block in snapshot.cells()}
+
+
+def test_run_length_round_trip_keeps_block_states():
+    blocks = region()
+    snapshot = RegionSnapshot.capture("hut", blocks, BOUNDS_MIN, BOUNDS_MAX)
+    expected = {pos: block if ":" in block else f"minecraft:{block}" for pos, block in blocks.items()}
+    assert absolute(snapshot) == expected
+    assert len(snapshot) == len(blocks)
+    assert sum(snapshot.runs[1::2]) == len(blocks)
+    assert len(snapshot.runs) < 2 * len(blocks)  # Runs actually compress the air and floor
+
+
+def test_cells_missing_from_the_read_count_as_air():
+    snapshot = RegionSnapshot.capture("hut", {(10, 64, -5): "minecraft:stone"}, BOUNDS_MIN, BOUNDS_MAX)
+    cells = absolute(snapshot)
+    assert cells.pop((10, 64, -5)) == "minecraft:stone"
+    assert set(cells.values()) == {"minecraft:air"}
+    assert snapshot.runs == [1, 1, 0, len(snapshot) - 1]
+
+
+def test_store_round_trip_and_eviction(tmp_path):
+    store = SnapshotStore(str(tmp_path), max_snapshots=2)
+    snapshots = [RegionSnapshot.capture(f"b{i}", region(), BOUNDS_MIN, BOUNDS_MAX) for i in range(3)]
+    for i, snapshot in enumerate(snapshots):
+        snapshot.created = float(i)
+        store.put(snapshot)
+        os.utime(tmp_path / f"b{i}.json", (i + 1, i + 1))
+    assert store.build_ids() == ["b1", "b2"]
+    loaded = store.get("b2")
+    assert loaded.to_dict() == snapshots[2].to_dict()
+    assert absolute(loaded) == absolute(snapshots[2])
+    store.delete("b2")
+    assert store.get("b2") is None
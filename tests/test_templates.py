@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from templates import Template, TemplateRegistry  # noqa: E402
+
+# A 3 wide, 1 high, 2 long L: stone along x, a door at the far end of z
+TEMPLATE = Template(
+    "sign", (10, 64, 20), (12, 64, 21),
+    [[0, 0, 0, "minecraft:stone"], [1, 0, 0, "minecraft:stone"], [2, 0, 0, "minecraft:stone"],
+     [0, 0, 1, "minecraft:oak_door"]],
+)
+
+
+def grid(cells, size):
+    """Top-down picture of a one-layer template, rows by z."""
+    width, _, length = size
+    rows = [["." for _ in range(width)] for _ in range(length)]
+    for x, _, z, block in cells:
+        rows[z][x] = "D" if block.endswith("door") else "#"
+    return ["".join(row) for row in rows]
+
+
+def test_quarter_turn_swaps_width_and_length():
+    size = TEMPLATE.transformed_size(90)
+    assert TEMPLATE.size == (3, 1, 2)
+    assert size == (2, 1, 3)
+    cells = TEMPLATE.transformed_cells(90)
+    assert all(0 <= x < size[0] and 0 <= z < size[2] for x, _, z, _ in cells)
+    assert grid(TEMPLATE.transformed_cells(0), TEMPLATE.size) == ["###", "D.."]
+    # Clockwise seen from above: the x row becomes the right-hand column
+    assert grid(cells, size) == ["D#", ".#", ".#"]
+
+
+def test_four_quarter_turns_and_half_turn():
+    assert grid(TEMPLATE.transformed_cells(180), TEMPLATE.size) == ["..D", "###"]
+    assert grid(TEMPLATE.transformed_cells(270), TEMPLATE.transformed_size(270)) == ["#.", "#.", "#D"]
+    template = TEMPLATE
+    for _ in range(4):
+        bounds_max = tuple(s - 1 for s in template.transformed_size(90))
+        template = Template("t", (0, 0, 0), bounds_max, [list(cell) for cell in template.transformed_cells(90)])
+    assert sorted(map(tuple, template.cells)) == sorted(map(tuple, TEMPLATE.cells))
+
+
+def test_mirror_then_rotate():
+    assert grid(TEMPLATE.transformed_cells(0, "x"), TEMPLATE.size) == ["###", "..D"]
+    assert grid(TEMPLATE.transformed_cells(0, "z"), TEMPLATE.size) == ["D..", "###"]
+    assert grid(TEMPLATE.transformed_cells(90, "x"), TEMPLATE.transformed_size(90)) == [".#", ".#", "D#"]
+    with pytest.raises(ValueError):
+        TEMPLATE.transformed_cells(45)
+    with pytest.raises(ValueError):
+        TEMPLATE.transformed_cells(0, "y")
+
+
+def test_registry_round_trip(tmp_path):
+    registry = TemplateRegistry(str(tmp_path))
+    registry.put(TEMPLATE)
+    assert registry.get("sign") == TEMPLATE
+    assert registry.names() == ["sign"]
+    with pytest.raises(ValueError):
+        registry.get("../escape")
@@ -0,0 +1,81 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voxel_plan import VoxelPlan  # noqa: E402
+
+SIZE = (3, 2, 2)
+ROWS = [
+    [0, 0, 0, "minecraft:stone"],
+    [1, 0, 0, "minecraft:stone"],
+    [1, 0, 0, "minecraft:dirt"],  # Last write to a cell wins
+    [2, 1, 1, "minecraft:air"],
+    [0, 1, 0, "minecraft:oak_planks"],
+]
+
+
+def world(blocks):
+    """A [y, z, x] grid of minecraft: ids, air except for blocks {(x, y, z): id}."""
+    width, height, length = SIZE
+    grid = np.full((height, length, width), "minecraft:air", dtype=object)
+    for (x, y, z), block in blocks.items():
+        grid[y, z, x] = block
+    return grid
+
+
+def test_round_trips_through_lists_and_schema():
+    plan = VoxelPlan.from_lists(ROWS, SIZE)
+    assert plan.to_lists() == ROWS
+    schema = SimpleNamespace(ops=[SimpleNamespace(x=x, y=y, z=z, block=block) for x, y, z, block in ROWS])
+    assert VoxelPlan.from_schema(schema, SIZE).to_lists() == ROWS
+
+
+def test_cells_resolve_the_last_write():
+    plan = VoxelPlan.from_lists(ROWS, SIZE)
+    assert sorted(plan.cells()) == sorted([
+        (0, 0, 0, "minecraft:stone"),
+        (1, 0, 0, "minecraft:dirt"),
+        (2, 1, 1, "minecraft:air"),
+        (0, 1, 0, "minecraft:oak_planks"),
+    ])
+    assert plan.block_count() == 4
+
+
+def test_validation_reports_the_first_bad_op():
+    palette = ["minecraft:stone", "minecraft:dirt", "minecraft:air", "minecraft:oak_planks"]
+    assert VoxelPlan.from_lists(ROWS, SIZE).validate(palette, max_blocks=10) is None
+    bad = VoxelPlan.from_lists(ROWS + [[3, 0, 0, "minecraft:stone"], [0, 0, 1, "minecraft:tnt"]], SIZE)
+    assert bad.validate(palette, max_blocks=10) == "Op 5 out of bounds (3,0,0)."
+    assert [idx for idx, _ in bad.violations(palette)] == [5, 6]
+    assert bad.validate(palette, max_blocks=3) == "Plan has too many ops (7 > 3)."
+
+
+def test_diff_applied_to_the_world_gives_the_plan():
+    plan = VoxelPlan.from_lists(ROWS, SIZE)
+    existing = world({(0, 0, 0): "minecraft:stone", (1, 1, 1): "minecraft:dirt", (2, 0, 1): "minecraft:bedrock"})
+    delta = plan.diff(existing, clearable=["minecraft:dirt"])
+    after = existing.copy()
+    for x, y, z, block in delta.cells():
+        after[y, z, x] = block
+    expected = existing.copy()
+    for x, y, z, block in plan.cells():
+        expected[y, z, x] = block
+    expected[1, 1, 1] = "minecraft:air"  # Left empty by the plan and clearable
+    assert (after == expected).all()
+    # Stone already in place and air over air are not placed again
+    assert sorted((x, y, z) for x, y, z, _ in delta.cells()) == [(0, 1, 0), (1, 0, 0), (1, 1, 1)]
+
+
+def test_without_redundant_air():
+    plan = VoxelPlan.from_lists(ROWS + [[0, 0, 1, "minecraft:stone"], [0, 0, 1, "minecraft:air"]], SIZE)
+    # Assuming an empty region, only air that clears an earlier write survives
+    assert sorted((x, y, z) for x, y, z, block in plan.without_redundant_air().cells() if block.endswith("air")) == [
+        (0, 0, 1)
+    ]
+    existing_air = world({(2, 1, 1): "minecraft:stone"}) == "minecraft:air"
+    kept = plan.without_redundant_air(existing_air)
+    assert sorted((x, y, z) for x, y, z, block in kept.cells() if block.endswith("air")) == [(2, 1, 1)]
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wire_protocol  # noqa: E402
+
+
+def decode_all(decoder, data):
+    buffer = bytearray(data)
+    return [cmd for cmd in map(decoder.decode_request, wire_protocol.split_frames(buffer)) if cmd is not None]
+
+
+def test_failed_request_leaves_block_table_in_step():
+    encoder, decoder = wire_protocol.BinaryEncoder(), wire_protocol.BinaryDecoder()
+    decode_all(decoder, encoder.encode_request(1, "place_block", [0, 64, 0, "minecraft:stone"]))
+    bad_batch = [
+        {"method": "place_block", "params": [1, 64, 0, "minecraft:dirt"]},
+        {"method": "place_block", "params": [object(), 64, 0, "minecraft:dirt"]},  # Not JSON serializable
+    ]
+    with pytest.raises(TypeError):
+        encoder.encode_request(2, "batch", [bad_batch])
+    # dirt was never defined on the listener, so the next use must define it
+    [cmd] = decode_all(decoder, encoder.encode_request(3, "place_block", [1, 64, 0, "minecraft:dirt"]))
+    assert cmd == {"method": "place_block", "params": [1, 64, 0, "minecraft:dirt"], "id": 3}
+
+
+def test_out_of_range_coordinates_fall_back_to_json():
+    encoder, decoder = wire_protocol.BinaryEncoder(), wire_protocol.BinaryDecoder()
+    batch = [
+        {"method": "place_block", "params": [2**40, 64, 0, "minecraft:dirt"]},
+        {"method": "fill_region", "params": [0, 64, 0, 1, 64, -2**31 - 1, "minecraft:stone"]},
+    ]
+    [cmd] = decode_all(decoder, encoder.encode_request(1, "batch", [batch]))
+    assert cmd["params"][0] == batch
@@ -0,0 +1,185 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMPTY = 0  # Grid value for cells the plan does not touch
+AIR = "minecraft:air"
+
+
+class VoxelPlan:
+    """
+    A plan stored as NumPy arrays instead of per-block objects.
+    Keeps the raw ops (coordinate arrays plus a uint16 index into palette) in
+    the order they were written, and lazily resolves them into a dense uint16
+    grid indexed [y, z, x] where the last write to a cell wins. palette[0] is
+    reserved for EMPTY.
+    """
+    def __init__(
+        self,
+        size: Tuple[int, int, int],
+        palette: Sequence[str],
+        xs: np.ndarray,
+        ys: np.ndarray,
+        zs: np.ndarray,
+        block_ids: np.ndarray,
+    ):
+        self.size = tuple(size)
+        self.palette = list(palette)
+        self.xs = np.asarray(xs, dtype=np.int32)
+        self.ys = np.asarray(ys, dtype=np.int32)
+        self.zs = np.asarray(zs, dtype=np.int32)
+        self.block_ids = np.asarray(block_ids, dtype=np.uint16)
+        self._grid: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_lists(cls, ops: Sequence[Sequence], size: Tuple[int, int, int]) -> "VoxelPlan":
+        """Builds a plan from [x, y, z, block] rows (the plan cache format)."""
+        palette = [""]
+        index: Dict[str, int] = {}
+        block_ids = np.empty(len(ops), dtype=np.uint16)
+        coords = np.empty((len(ops), 3), dtype=np.int32)
+        for i, (x, y, z, block) in enumerate(ops):
+            block_id = index.get(block)
+            if block_id is None:
+                if len(palette) > 0xFFFF:
+                    raise ValueError("Too many distinct blocks for a uint16 palette")
+                block_id = index[block] = len(palette)
+                palette.append(block)
+            coords[i] = (x, y, z)
+            block_ids[i] = block_id
+        return cls(size, palette, coords[:, 0], coords[:, 1], coords[:, 2], block_ids)
+
+    @classmethod
+    def from_schema(cls, schema, size: Tuple[int, int, int]) -> "VoxelPlan":
+        """Converts a PlanSchema response without creating BlockOp objects."""
+        return cls.from_lists([(op.x, op.y, op.z, op.block) for op in schema.ops], size)
+
+    @classmethod
+    def from_ops(cls, ops, size: Tuple[int, int, int]) -> "VoxelPlan":
+        return cls.from_lists([(op.x, op.y, op.z, op.block) for op in ops], size)
+
+    def __len__(self) -> int:
+        return int(self.block_ids.shape[0])
+
+    def _invalid_masks(self, allowed_palette: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Boolean (out_of_bounds, disallowed) masks over the raw ops."""
+        width, height, length = self.size
+        out_of_bounds = (
+            (self.xs < 0) | (self.xs >= width)
+            | (self.ys < 0) | (self.ys >= height)
+            | (self.zs < 0) | (self.zs >= length)
+        )
+        allowed = set(allowed_palette)
+        allowed_ids = [i for i, block in enumerate(self.palette) if block in allowed]
+        disallowed = ~np.isin(self.block_ids, allowed_ids)
+        return out_of_bounds, disallowed
+
+    def _violation(self, idx: int, out_of_bounds: np.ndarray) -> str:
+        if out_of_bounds[idx]:
+            return f"Op {idx} out of bounds ({self.xs[idx]},{self.ys[idx]},{self.zs[idx]})."
+        return f"Op {idx} uses disallowed block: {self.palette[self.block_ids[idx]]}."
+
+    def validate(self, allowed_palette: Sequence[str], max_blocks: int) -> Optional[str]:
+        """Vectorized bounds and palette checks; same messages as Builder._validate_plan."""
+        if len(self) > max_blocks:
+            return f"Plan has too many ops ({len(self)} > {max_blocks})."
+        out_of_bounds, disallowed = self._invalid_masks(allowed_palette)
+        bad = np.flatnonzero(out_of_bounds | disallowed)
+        if bad.size == 0:
+            return None
+        return self._violation(int(bad[0]), out_of_bounds)
+
+    def violations(self, allowed_palette: Sequence[str]) -> List[Tuple[int, str]]:
+        """Every invalid op as (index, message), ignoring the block budget."""
+        out_of_bounds, disallowed = self._invalid_masks(allowed_palette)
+        return [
+            (idx, self._violation(idx, out_of_bounds))
+            for idx in np.flatnonzero(out_of_bounds | disallowed).tolist()
+        ]
+
+    @property
+    def grid(self) -> np.ndarray:
+        """Dense [y, z, x] grid of palette indices; only valid after validate() passes."""
+        if self._grid is None:
+            width, height, length = self.size
+            grid = np.zeros((height, length, width), dtype=np.uint16)
+            if len(self):
+                linear = (self.ys * length + self.zs) * width + self.xs
+                # Keep the last write per cell: unique over the reversed order
+                _, first_in_reversed = np.unique(linear[::-1], return_index=True)
+                keep = len(self) - 1 - first_in_reversed
+                grid.reshape(-1)[linear[keep]] = self.block_ids[keep]
+            self._grid = grid
+        return self._grid
+
+    def _from_grid(self, grid: np.ndarray) -> "VoxelPlan":
+        """New plan whose ops are the non-empty cells of grid, in execution order."""
+        ys, zs, xs = np.nonzero(grid)
+        plan = VoxelPlan(self.size, self.palette, xs, ys, zs, grid[ys, zs, xs])
+        plan._grid = grid
+        return plan
+
+    def _air_id(self) -> Optional[int]:
+        return self.palette.index(AIR) if AIR in self.palette else None
+
+    def without_redundant_air(self, existing_air: Optional[np.ndarray] = None) -> "VoxelPlan":
+        """
+        Drops air placements that would not change anything. With existing_air
+        (a boolean [y, z, x] mask of cells that are air in the world) those cells
+        are dropped; without it the region is assumed empty, so air only survives
+        where it clears a block written earlier in the plan.
+        """
+        air_id = self._air_id()
+        if air_id is None:
+            return self
+        grid = self.grid.copy()
+        if existing_air is None:
+            solid = self.block_ids != air_id
+            existing_air = np.ones(grid.shape, dtype=bool)
+            existing_air[self.ys[solid], self.zs[solid], self.xs[solid]] = False
+        grid[(grid == air_id) & existing_air] = EMPTY
+        return self._from_grid(grid)
+
+    def diff(self, existing: np.ndarray, clearable: Sequence[str]) -> "VoxelPlan":
+        """
+        Returns the changes needed to turn the world into this plan.
+        existing is a [y, z, x] array of block ids already in the region. Cells
+        the plan leaves empty are cleared to air only when they hold a block in
+        clearable.
+        """
+        lookup = {block: i for i, block in enumerate(self.palette) if i != EMPTY}
+        palette = list(self.palette)
+        if AIR not in lookup:
+            lookup[AIR] = len(palette)
+            palette.append(AIR)
+        names, inverse = np.unique(existing, return_inverse=True)
+        name_ids = np.array([lookup.get(name, 0xFFFF) for name in names], dtype=np.uint32)
+        existing_ids = name_ids[inverse].reshape(existing.shape)
+        clearable_mask = np.isin(existing, [block for block in clearable if block != AIR])
+
+        grid = self.grid.astype(np.uint32)
+        delta = np.where((grid != EMPTY) & (grid != existing_ids), grid, EMPTY)
+        delta = np.where((grid == EMPTY) & clearable_mask, lookup[AIR], delta)
+        result = VoxelPlan(self.size, palette, [], [], [], [])
+        return result._from_grid(delta.astype(np.uint16))
+
+    def cells(self) -> Iterator[Tuple[int, int, int, str]]:
+        """Yields (x, y, z, block) for every resolved cell, bottom-up in y, z, x order."""
+        grid = self.grid
+        ys, zs, xs = np.nonzero(grid)
+        palette = self.palette
+        for x, y, z, block_id in zip(xs.tolist(), ys.tolist(), zs.tolist(), grid[ys, zs, xs].tolist()):
+            yield x, y, z, palette[block_id]
+
+    def block_count(self) -> int:
+        return int(np.count_nonzero(self.grid))
+
+    def to_lists(self) -> List[List]:
+        """Raw ops as [x, y, z, block] rows, in the order they were written."""
+        palette = self.palette
+        return [
+            [x, y, z, palette[block_id]]
+            for x, y, z, block_id in zip(
+                self.xs.tolist(), self.ys.tolist(), self.zs.tolist(), self.block_ids.tolist()
+            )
+        ]
@@ -0,0 +1,257 @@
+import json
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Compact binary framing for listener traffic.
+# Connections start in newline-delimited JSON. The client's first "ping" may offer
+# protocols ({"protocols": [...]}); if the listener picks PROTOCOL_BINARY, both
+# sides switch to length-prefixed frames for everything after the pong.
+#
+# Frame:        u32 length | u8 opcode | u32 request id | body
+# Batch item:   u8 opcode | u32 length | body
+# Block ids are sent once per connection as OP_DEFINE_BLOCK frames and referenced
+# by u16 index afterwards.
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary1"
+SUPPORTED_PROTOCOLS = [PROTOCOL_BINARY, PROTOCOL_JSON]  # Preference order
+
+OP_DEFINE_BLOCK = 0
+OP_JSON = 1
+OP_PLACE_BLOCK = 2
+OP_FILL_REGION = 3
+OP_MOVE_TO = 4
+OP_GET_BLOCK_AT = 5
+OP_BATCH = 6
+OP_RESPONSE = 7
+
+TAG_NONE = 0
+TAG_TRUE = 1
+TAG_FALSE = 2
+TAG_STR = 3
+TAG_JSON = 4
+TAG_ERROR = 5
+TAG_BATCH = 6
+
+_LENGTH = struct.Struct(">I")
+_HEADER = struct.Struct(">BI")
+_ITEM_HEADER = struct.Struct(">BI")
+_BLOCK_INDEX = struct.Struct(">H")
+_PLACE = struct.Struct(">iiiH")
+_FILL = struct.Struct(">iiiiiiH")
+_MOVE = struct.Struct(">ddd")
+_POSITION = struct.Struct(">iii")
+_TAG = struct.Struct(">B")
+
+
+def choose_protocol(offered: Sequence[str]) -> str:
+    """Picks the first offered protocol this side supports, defaulting to JSON."""
+    for protocol in offered:
+        if protocol in SUPPORTED_PROTOCOLS:
+            return protocol
+    return PROTOCOL_JSON
+
+
+def _frame(opcode: int, request_id: int, body: bytes) -> bytes:
+    return _LENGTH.pack(_HEADER.size + len(body)) + _HEADER.pack(opcode, request_id) + body
+
+
+def split_frames(buffer: bytearray) -> List[bytes]:
+    """Removes every complete frame from buffer and returns their payloads."""
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= _LENGTH.size:
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        end = offset + _LENGTH.size + length
+        if end > len(buffer):
+            break
+        frames.append(bytes(buffer[offset + _LENGTH.size:end]))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+def read_header(payload: bytes) -> Optional[Tuple[int, int]]:
+    """(opcode, request id) of a frame payload, or None if it is too short to have them."""
+    if len(payload) < _HEADER.size:
+        return None
+    return _HEADER.unpack_from(payload, 0)
+
+
+def _is_int(value: Any) -> bool:
+    """True for ints that fit the frames' signed 32-bit fields; anything else goes as OP_JSON."""
+    return isinstance(value, int) and not isinstance(value, bool) and -2**31 <= value < 2**31
+
+
+class BinaryEncoder:
+    """Client-side request encoder; owns the connection's block string table."""
+    def __init__(self):
+        self._block_ids: Dict[str, int] = {}
+
+    def encode_request(self, request_id: int, method: str, params: Sequence[Any]) -> bytes:
+        # New block ids join the table only once the whole request has encoded,
+        # so a request that fails partway never leaves an id the listener lacks.
+        new_ids: Dict[str, int] = {}
+        opcode, body = self._encode_command(method, params, new_ids)
+        frame = _frame(opcode, request_id, body)
+        defines = bytearray()
+        for block_type, index in new_ids.items():
+            defines += _frame(OP_DEFINE_BLOCK, 0, _BLOCK_INDEX.pack(index) + block_type.encode('utf-8'))
+        self._block_ids.update(new_ids)
+        return bytes(defines) + frame
+
+    def _block_index(self, block_type: str, new_ids: Dict[str, int]) -> int:
+        index = self._block_ids.get(block_type, new_ids.get(block_type))
+        if index is None:
+            index = len(self._block_ids) + len(new_ids)
+            if index > 0xFFFF:
+                raise ValueError("Too many distinct block ids for one connection")
+            new_ids[block_type] = index
+        return index
+
+    def _encode_command(self, method: str, params: Sequence[Any], new_ids: Dict[str, int]):
+        if method == "place_block" and len(params) == 4 and all(_is_int(v) for v in params[:3]):
+            x, y, z, block_type = params
+            return OP_PLACE_BLOCK, _PLACE.pack(x, y, z, self._block_index(block_type, new_ids))
+        if method == "fill_region" and len(params) == 7 and all(_is_int(v) for v in params[:6]):
+            block_index = self._block_index(params[6], new_ids)
+            return OP_FILL_REGION, _FILL.pack(*params[:6], block_index)
+        if method == "move_to" and len(params) == 3:
+            return OP_MOVE_TO, _MOVE.pack(*(float(v) for v in params))
+        if method == "get_block_at" and len(params) == 3 and all(_is_int(v) for v in params):
+            return OP_GET_BLOCK_AT, _POSITION.pack(*params)
+        if method == "batch" and len(params) == 1:
+            items = params[0]
+            body = bytearray(_LENGTH.pack(len(items)))
+            for item in items:
+                opcode, item_body = self._encode_command(item["method"], item.get("params", []), new_ids)
+                body += _ITEM_HEADER.pack(opcode, len(item_body))
+                body += item_body
+            return OP_BATCH, bytes(body)
+        return OP_JSON, json.dumps({"method": method, "params": list(params)}).encode('utf-8')
+
+
+class BinaryDecoder:
+    """Listener-side request decoder; mirrors the client's block string table."""
+    def __init__(self):
+        self._block_names: List[str] = []
+
+    def decode_request(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        """Returns a cmd_data dict like the JSON protocol's, or None for table updates."""
+        opcode, request_id = _HEADER.unpack_from(payload, 0)
+        body = memoryview(payload)[_HEADER.size:]
+        if opcode == OP_DEFINE_BLOCK:
+            (index,) = _BLOCK_INDEX.unpack_from(body, 0)
+            name = bytes(body[_BLOCK_INDEX.size:]).decode('utf-8')
+            if index == len(self._block_names):
+                self._block_names.append(name)
+            else:
+                self._block_names[index] = name
+            return None
+        cmd_data = self._decode_command(opcode, body)
+        cmd_data["id"] = request_id
+        return cmd_data
+
+    def _decode_command(self, opcode: int, body: memoryview) -> Dict[str, Any]:
+        if opcode == OP_PLACE_BLOCK:
+            x, y, z, block_index = _PLACE.unpack_from(body, 0)
+            return {"method": "place_block", "params": [x, y, z, self._block_names[block_index]]}
+        if opcode == OP_FILL_REGION:
+            values = _FILL.unpack_from(body, 0)
+            return {"method": "fill_region", "params": list(values[:6]) + [self._block_names[values[6]]]}
+        if opcode == OP_MOVE_TO:
+            return {"method": "move_to", "params": list(_MOVE.unpack_from(body, 0))}
+        if opcode == OP_GET_BLOCK_AT:
+            return {"method": "get_block_at", "params": list(_POSITION.unpack_from(body, 0))}
+        if opcode == OP_BATCH:
+            (count,) = _LENGTH.unpack_from(body, 0)
+            offset = _LENGTH.size
+            items = []
+            for _ in range(count):
+                item_opcode, length = _ITEM_HEADER.unpack_from(body, offset)
+                offset += _ITEM_HEADER.size
+                items.append(self._decode_command(item_opcode, body[offset:offset + length]))
+                offset += length
+            return {"method": "batch", "params": [items]}
+        if opcode == OP_JSON:
+            return json.loads(bytes(body).decode('utf-8'))
+        raise ValueError(f"Unknown opcode: {opcode}")
+
+
+def _encode_value(value: Any, out: bytearray) -> None:
+    if value is None:
+        out += _TAG.pack(TAG_NONE)
+    elif value is True:
+        out += _TAG.pack(TAG_TRUE)
+    elif value is False:
+        out += _TAG.pack(TAG_FALSE)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out += _TAG.pack(TAG_STR) + _LENGTH.pack(len(data)) + data
+    else:
+        data = json.dumps(value).encode('utf-8')
+        out += _TAG.pack(TAG_JSON) + _LENGTH.pack(len(data)) + data
+
+
+def _encode_error(message: str, out: bytearray) -> None:
+    data = str(message).encode('utf-8')
+    out += _TAG.pack(TAG_ERROR) + _LENGTH.pack(len(data)) + data
+
+
+def encode_response(response: Dict[str, Any], method: Optional[str] = None) -> bytes:
+    """Encodes a listener response dict; batch results use a per-item status list."""
+    body = bytearray()
+    if response.get("status") != "success":
+        _encode_error(response.get("error"), body)
+    elif method == "batch" and isinstance(response.get("result"), list):
+        items = response["result"]
+        body += _TAG.pack(TAG_BATCH) + _LENGTH.pack(len(items))
+        for item in items:
+            if item.get("status") == "success":
+                _encode_value(item.get("result"), body)
+            else:
+                _encode_error(item.get("error"), body)
+    else:
+        _encode_value(response.get("result"), body)
+    return _frame(OP_RESPONSE, response.get("id") or 0, bytes(body))
+
+
+def _decode_value(body: memoryview, offset: int):
+    """Returns (status dict, next offset) for the tagged value at offset."""
+    (tag,) = _TAG.unpack_from(body, offset)
+    offset += _TAG.size
+    if tag == TAG_NONE:
+        return {"status": "success", "result": None}, offset
+    if tag == TAG_TRUE:
+        return {"status": "success", "result": True}, offset
+    if tag == TAG_FALSE:
+        return {"status": "success", "result": False}, offset
+    if tag == TAG_BATCH:
+        (count,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        items = []
+        for _ in range(count):
+            item, offset = _decode_value(body, offset)
+            items.append(item)
+        return {"status": "success", "result": items}, offset
+    (length,) = _LENGTH.unpack_from(body, offset)
+    offset += _LENGTH.size
+    text = bytes(body[offset:offset + length]).decode('utf-8')
+    offset += length
+    if tag == TAG_STR:
+        return {"status": "success", "result": text}, offset
+    if tag == TAG_JSON:
+        return {"status": "success", "result": json.loads(text)}, offset
+    if tag == TAG_ERROR:
+        return {"status": "error", "error": text}, offset
+    raise ValueError(f"Unknown value tag: {tag}")
+
+
+def decode_response(payload: bytes) -> Dict[str, Any]:
+    """Decodes a response frame payload into the same dict shape as the JSON protocol."""
+    opcode, request_id = _HEADER.unpack_from(payload, 0)
+    if opcode != OP_RESPONSE:
+        raise ValueError(f"Expected response frame, got opcode {opcode}")
+    response, _ = _decode_value(memoryview(payload)[_HEADER.size:], 0)
+    response["id"] = request_id
+    return response